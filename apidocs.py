@@ -0,0 +1,185 @@
+"""OpenAPI spec and Swagger UI.
+
+Flasgger rebuilds the spec on every request to ``/apispec_1.json`` by walking
+the ``swag_from`` dict of every route. Here the spec is built once per worker
+on first request, or loaded from ``OPENAPI_SPEC_PATH`` when it was written at
+build time with ``flask openapi-spec``. It is then served as fixed bytes with
+a strong ETag. With ``SWAGGER_ENABLED`` off, flasgger is not registered at
+all; a prebuilt spec file is still served if one is configured.
+
+Routes document themselves with :func:`swag_from` from this module, so
+flasgger (and jsonschema, yaml and mistune behind it) is only imported when
+the UI is enabled.
+"""
+import hashlib
+import threading
+import click
+from flask import current_app, request
+
+SPEC_ENDPOINT = 'apispec_1'
+SPEC_ROUTE = '/apispec_1.json'
+
+
+def swag_from(specs):
+    """Attach an OpenAPI ``specs`` dict to a view.
+
+    Sets the same ``specs_dict`` attribute flasgger's ``swag_from`` does for a
+    dict spec, without importing flasgger or wrapping the view.
+    """
+    def decorator(function):
+        function.specs_dict = specs
+        return function
+    return decorator
+
+SWAGGER_CONFIG = {
+    "headers": [],
+    "specs": [
+        {
+            "endpoint": SPEC_ENDPOINT,
+            "route": SPEC_ROUTE,
+            "rule_filter": lambda rule: True,  # all in
+            "model_filter": lambda tag: True,  # all in
+        }
+    ],
+    "static_url_path": "/flasgger_static",
+    "swagger_ui": True,
+    "specs_route": "/apidocs/",
+    'securityDefinitions': {
+        'BearerAuth': {
+            'type': 'apiKey',
+            'name': 'Authorization',
+            'in': 'header',
+            'description': 'Enter Bearer token in the format: Bearer <token>'
+        }
+    },
+    "definitions": {
+        "User": {
+            "type": "object",
+            "properties": {
+                "id": {"type": "integer"},
+                "name": {"type": "string"},
+                "email": {"type": "string"},
+                "blood_type": {"type": "string", "example": "O+"},
+                "location": {"type": "string"},
+                "gender": {"type": "string"}
+            }
+        },
+        "Donor": {
+            "type": "object",
+            "properties": {
+                "id": {"type": "integer"},
+                "user": {"$ref": "#/definitions/User"},
+                "medical_history": {"type": "string"},
+                "is_available": {"type": "boolean"},
+                "last_donation": {"type": "string", "format": "date-time"},
+                "eligible_from": {"type": "string", "format": "date-time", "nullable": True,
+                                  "description": "When the donor may donate again; null if they never have"},
+                "created_at": {"type": "string", "format": "date-time"},
+                "updated_at": {"type": "string", "format": "date-time"}
+            }
+        },
+        "BloodRequest": {
+            "type": "object",
+            "properties": {
+                "id": {"type": "integer"},
+                "requester_id": {"type": "integer"},
+                "donor_id": {"type": "integer"},
+                "blood_type": {"type": "string"},
+                "quantity": {"type": "integer"},
+                "status": {"type": "string", "enum": ["Pending", "Fulfilled", "Cancelled"]},
+                "created_at": {"type": "string", "format": "date-time"},
+                "updated_at": {"type": "string", "format": "date-time"}
+            }
+        },
+        "BloodDonation": {
+            "type": "object",
+            "properties": {
+                "id": {"type": "integer"},
+                "user_id": {"type": "integer"},
+                "blood_group": {"type": "string"},
+                "date": {"type": "string", "format": "date"},
+                "time": {"type": "string"},
+                "status": {"type": "string"},
+                "ref": {"type": "string"},
+                "created_at": {"type": "string", "format": "date-time"},
+                "updated_at": {"type": "string", "format": "date-time"}
+            }
+        },
+        "BloodStats": {
+            "type": "object",
+            "properties": {
+                "blood_type": {"type": "string", "example": "O+"},
+                "location": {"type": "string", "description": "Lower-cased; empty when unknown"},
+                "pending_requests": {"type": "integer"},
+                "units_requested": {"type": "number", "description": "Total quantity of the pending requests"},
+                "available_donors": {"type": "integer",
+                                     "description": "Donors marked available, including those still deferred after a "
+                                                    "recent donation (eligible_from in the future); GET /donors/?eligible=true "
+                                                    "lists who can donate today"},
+                "donations": {"type": "integer"},
+                "total_requests": {"type": "integer"},
+                "fulfilled_requests": {"type": "integer"},
+                "fulfilment_rate": {"type": "number", "nullable": True,
+                                    "description": "fulfilled_requests / total_requests"}
+            }
+        }
+    }
+}
+
+
+class CachedSpec:
+    """The encoded spec, produced by ``build`` (or read from ``path``) on first use."""
+
+    def __init__(self, build=None, path=None):
+        self._build = build
+        self.path = path
+        self._body = None
+        self.etag = None
+        self._lock = threading.Lock()
+
+    def body(self):
+        if self._body is None:
+            with self._lock:
+                if self._body is None:
+                    self._body = self._load()
+                    self.etag = hashlib.sha1(self._body).hexdigest()
+        return self._body
+
+    def _load(self):
+        if self.path:
+            with open(self.path, 'rb') as f:
+                return f.read()
+        return current_app.json.dumps(self._build()).encode()
+
+    def view(self):
+        body = self.body()
+        if request.if_none_match.contains(self.etag):
+            response = current_app.response_class(status=304)
+        else:
+            response = current_app.response_class(body, mimetype='application/json')
+        response.set_etag(self.etag)
+        # Public: the spec is the same for every caller and only changes on deploy
+        response.cache_control.public = True
+        response.cache_control.no_cache = True
+        return response
+
+
+def init_docs(app):
+    path = app.config['OPENAPI_SPEC_PATH']
+    if not app.config['SWAGGER_ENABLED']:
+        if path:
+            app.add_url_rule(SPEC_ROUTE, SPEC_ENDPOINT, CachedSpec(path=path).view)
+        return
+
+    from flasgger import Swagger
+    swagger = Swagger(app, config=SWAGGER_CONFIG)
+    spec = CachedSpec(lambda: swagger.get_apispecs(SPEC_ENDPOINT), path)
+    app.view_functions[f'flasgger.{SPEC_ENDPOINT}'] = spec.view
+    app.extensions['openapi_spec'] = spec
+
+    @app.cli.command('openapi-spec')
+    @click.argument('output', type=click.File('w'), default='-')
+    def openapi_spec_command(output):
+        """Write the OpenAPI spec, e.g. at build time for OPENAPI_SPEC_PATH."""
+        output.write(current_app.json.dumps(swagger.get_apispecs(SPEC_ENDPOINT)))
+        output.write('\n')
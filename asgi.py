@@ -0,0 +1,42 @@
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+from database import warm_pool
+from events import asgi_stream
+from main import create_app
+
+# The production server (Procfile, gunicorn.conf.py). Views and their database
+# calls run on a pool of ASGI_THREADS threads, as under a threaded WSGI worker.
+# The one thing served natively on the event loop is the blood request event
+# stream, so an idle subscriber holds no thread.
+flask_app = create_app()
+# Each worker imports this module, so each warms its own pool and runs its own job threads
+warm_pool(flask_app)
+flask_app.extensions['job_runner'].start()
+
+_view_threads = ThreadPoolExecutor(max_workers=flask_app.config['ASGI_THREADS'], thread_name_prefix='asgi-view')
+
+
+class _WsgiInstance(WsgiToAsgiInstance):
+    # asgiref runs the WSGI app "thread sensitive" by default: on one thread
+    # shared by the whole process, so each view would wait for the one before it
+    run_wsgi_app = sync_to_async(WsgiToAsgiInstance.__dict__['run_wsgi_app'].func, thread_sensitive=False,
+                                 executor=_view_threads)
+
+
+class _WsgiToAsgi(WsgiToAsgi):
+    async def __call__(self, scope, receive, send):
+        await _WsgiInstance(self.wsgi_application, self.duplicate_header_limit)(scope, receive, send)
+
+
+wsgi_app = _WsgiToAsgi(flask_app)
+
+STREAM_PATH = '/blood-requests/stream'
+
+
+async def app(scope, receive, send):
+    # Event stream subscribers wait on the event loop rather than each holding a thread
+    if scope['type'] == 'http' and scope['method'] == 'GET' and scope['path'] == STREAM_PATH:
+        await asgi_stream(flask_app, scope, receive, send)
+    else:
+        await wsgi_app(scope, receive, send)
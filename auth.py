@@ -1,12 +1,58 @@
+import datetime
 import os
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask import Blueprint, current_app, request, jsonify
+from sqlalchemy.orm import Session
+from flask_jwt_extended import create_access_token, jwt_required, get_jwt
 from models.User.model import User # Assuming User model is in models/User/model.py
-from flasgger import swag_from
-from database import db
+from apidocs import swag_from
+from database import db, has_replica, read_replica
+import geo
 
 auth_bp = Blueprint("auth", __name__, url_prefix="/auth")
 
+def lookup_user(user_id):
+    """Identity snapshot for ``user_id``, from the per-worker cache when possible."""
+    cache = current_app.extensions['user_cache']
+    identity = cache.get(user_id)
+    if identity is None:
+        user = _load_user(user_id)
+        if user is None:
+            return None
+        identity = user.identity()
+        cache.set(user_id, identity)
+    return identity
+
+def _load_user(user_id):
+    if not has_replica():
+        return db.session.get(User, user_id)
+    with read_replica():
+        user = db.session.get(User, user_id)
+    if user is None:
+        # Registered moments ago and not replicated yet
+        with read_replica(False):
+            return db.session.get(User, user_id)
+    # Keep the replica's copy out of the identity map, so a view that writes
+    # to the user loads it from the primary
+    db.session.expunge(user)
+    return user
+
+@db.event.listens_for(User, 'after_update')
+@db.event.listens_for(User, 'after_delete')
+def _user_changed(mapper, connection, target):
+    Session.object_session(target).info.setdefault('changed_user_ids', set()).add(target.id)
+
+@db.event.listens_for(Session, 'after_commit')
+def _evict_changed_users(session):
+    changed = session.info.pop('changed_user_ids', None)
+    if changed:
+        cache = current_app.extensions['user_cache']
+        for user_id in changed:
+            cache.pop(user_id)
+
+@db.event.listens_for(Session, 'after_rollback')
+def _discard_changed_users(session):
+    session.info.pop('changed_user_ids', None)
+
 @auth_bp.route("/login", methods=["POST"])
 @swag_from({
     'tags': ['Auth'],
@@ -42,6 +88,9 @@ auth_bp = Blueprint("auth", __name__, url_prefix="/auth")
         },
         401: {
             'description': 'Bad email or password'
+        },
+        503: {
+            'description': 'Too many logins in progress, retry shortly'
         }
     }
 })
@@ -53,7 +102,12 @@ def login():
     user = User.query.filter_by(email=email).first()
 
     if user and user.check_password(password):
+        # Upgrade hashes made with older parameters while we have the plain password
+        if user.password_needs_rehash():
+            user.set_password(password)
+            db.session.commit()
         access_token = create_access_token(identity=str(user.id))
+        current_app.extensions['user_cache'].set(user.id, user.identity())
         return jsonify(access_token=access_token, user=user.to_dict()), 200
     
     return jsonify({"msg": "Bad email or password"}), 401
@@ -75,7 +129,9 @@ def login():
                     'name': {'type': 'string', 'example': 'Jane Doe'},
                     'blood_type': {'type': 'string', 'example': 'A+'},
                     'gender': {'type': 'string', 'example': 'female'},
-                    'location': {'type': 'string', 'example': 'City, Country'}
+                    'location': {'type': 'string', 'example': 'City, Country'},
+                    'latitude': {'type': 'number', 'example': 6.5244},
+                    'longitude': {'type': 'number', 'example': 3.3792}
                 }
             }
         }
@@ -101,6 +157,11 @@ def register():
     if not all(key in data for key in ('email', 'password', 'name', 'blood_type', 'location')):
         return jsonify({"msg": "Missing required fields"}), 400
 
+    try:
+        latitude, longitude = geo.validate_coordinates(data.get('latitude'), data.get('longitude'))
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+
     if User.query.filter_by(email=data['email']).first():
         return jsonify({"msg": "Email already registered"}), 409
 
@@ -109,7 +170,9 @@ def register():
         name=data['name'],
         blood_type=data['blood_type'],
         gender = data['gender'],
-        location=data['location']
+        location=data['location'],
+        latitude=latitude,
+        longitude=longitude
     )
     new_user.set_password(data['password']) # Assuming you have a set_password method
 
@@ -142,10 +205,9 @@ def register():
     }
 })
 def logout():
-    # JWT is handled by the @jwt_required() decorator.
-    # On the client side, you would simply discard the token.
-    # If you have a token blocklist, you would add the token here.
-    jti = get_jwt_identity() # Get the identity from the token if needed
-    print(f"User {jti} logged out") # Log the logout event
+    # Revoke the token until it would have expired anyway
+    token = get_jwt()
+    expires_at = datetime.datetime.utcfromtimestamp(token["exp"]) if "exp" in token else datetime.datetime.max
+    current_app.extensions['revoked_tokens'].revoke(token["jti"], expires_at)
 
     return jsonify({"msg": "Successfully logged out"}), 200
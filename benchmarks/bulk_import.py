@@ -0,0 +1,64 @@
+"""Benchmark the bulk import endpoints.
+
+Streams generated NDJSON through POST /blood-requests/import and
+POST /users/import and reports rows/sec. User import is dominated by password
+hashing, so it is run at the configured hash cost with PASSWORD_HASH_WORKERS
+taken from the environment.
+
+Usage::
+
+    PASSWORD_HASH_WORKERS=4 python benchmarks/bulk_import.py --requests 100000 --users 2000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask_jwt_extended import create_access_token
+
+from main import create_app
+from database import db
+from models.User.model import User
+
+
+def ndjson(rows):
+    return ''.join(json.dumps(row) + '\n' for row in rows).encode()
+
+
+def timed_import(client, path, body, headers):
+    start = time.perf_counter()
+    response = client.post(path, data=body, content_type='application/x-ndjson', headers=headers)
+    elapsed = time.perf_counter() - start
+    report = json.loads(response.data)
+    assert report['failed'] == 0, report['errors'][:5]
+    return report['inserted'], elapsed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=100000)
+    parser.add_argument('--users', type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp}/bench.db'})
+        with app.app_context():
+            db.create_all()
+            db.session.add(User(name='Hospital', email='hospital@bench.test', blood_type='O+', password_hash='!'))
+            db.session.commit()
+            token = create_access_token(identity='1')
+        client = app.test_client()
+        headers = {'Authorization': f'Bearer {token}'}
+
+        body = ndjson({'name': f'Patient {i}', 'blood_type': 'O+', 'quantity': 1, 'location': 'Clinic'} for i in range(args.requests))
+        rows, elapsed = timed_import(client, '/blood-requests/import', body, headers)
+        print(f'blood requests: {rows} rows in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s)')
+
+        body = ndjson({'name': f'User {i}', 'email': f'user{i}@bench.test', 'password': f'pw{i}', 'blood_type': 'A+'} for i in range(args.users))
+        rows, elapsed = timed_import(client, '/users/import', body, headers)
+        print(f'users ({app.config["PASSWORD_HASH_METHOD"]}, {app.config["PASSWORD_HASH_WORKERS"]} hash workers): '
+              f'{rows} rows in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s)')
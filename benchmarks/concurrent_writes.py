@@ -0,0 +1,124 @@
+"""Benchmark concurrent writers on one SQLite file, like gunicorn workers.
+
+Each worker process builds its own app on a shared database file and sends
+POST /blood-requests/ through the test client with the user cache off, so
+every request also reads. Meanwhile another process acts like a slow
+streaming export: it keeps a read statement open for ``--hold`` seconds at a
+time. Reports, per SQLite setting, the requests that failed (all "database is
+locked"), throughput and p95 latency:
+
+* ``legacy`` -- the previous defaults: rollback journal, ``synchronous=FULL``
+* ``wal`` -- WAL and ``synchronous=NORMAL``
+
+Both use the same ``SQLITE_BUSY_TIMEOUT_MS`` (5s by default).
+
+Usage::
+
+    python benchmarks/concurrent_writes.py --workers 8 --requests 200 --hold 6
+"""
+import argparse
+import multiprocessing
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from main import create_app
+from database import db
+
+SCENARIOS = {
+    'legacy': {'SQLITE_JOURNAL_MODE': '', 'SQLITE_SYNCHRONOUS': ''},
+    'wal': {},
+}
+
+
+def make_app(path, overrides):
+    return create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}', 'USER_CACHE_TTL': 0, **overrides})
+
+
+def worker(path, overrides, token, requests, start, results):
+    app = make_app(path, overrides)
+    # Failures are counted; their tracebacks would drown the report
+    app.logger.disabled = True
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {token}'}
+    body = {'blood_type': 'O+', 'quantity': 1, 'location': 'Lagos', 'name': 'Patient', 'phone': '0800'}
+    start.wait()
+    timings, failed = [], 0
+    for _ in range(requests):
+        began = time.perf_counter()
+        response = client.post('/blood-requests/', json=body, headers=headers)
+        timings.append(time.perf_counter() - began)
+        failed += response.status_code != 201
+    results.put((timings, failed))
+
+
+def reader(path, hold, start, stop):
+    connection = sqlite3.connect(path)
+    start.wait()
+    while not stop.is_set():
+        rows = connection.execute('WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n LIMIT 1000000) '
+                                  'SELECT i FROM n, blood_request')
+        rows.fetchone()
+        stop.wait(hold)
+        rows.close()
+        time.sleep(0.05)
+    connection.close()
+
+
+def run(overrides, workers, requests, hold):
+    from flask_jwt_extended import create_access_token
+    from models.User.model import User
+    from models.BloodRequest.model import BloodRequest
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = f'{tmp}/bench.db'
+        app = make_app(path, overrides)
+        with app.app_context():
+            db.create_all()
+            user = User(name='Hospital', email='hospital@bench.test', blood_type='O+', password_hash='x')
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(BloodRequest(requester_id=user.id, blood_type='O+', quantity=1, location='Lagos',
+                                        name='Patient', phone='0800'))
+            db.session.commit()
+            token = create_access_token(identity=str(user.id))
+            db.engine.dispose()
+
+        start, stop, results = multiprocessing.Event(), multiprocessing.Event(), multiprocessing.Queue()
+        processes = [multiprocessing.Process(target=worker, args=(path, overrides, token, requests, start, results))
+                     for _ in range(workers)]
+        processes.append(multiprocessing.Process(target=reader, args=(path, hold, start, stop)))
+        for process in processes:
+            process.start()
+        time.sleep(1)
+        began = time.perf_counter()
+        start.set()
+        collected = [results.get() for _ in range(workers)]
+        elapsed = time.perf_counter() - began
+        stop.set()
+        for process in processes:
+            process.join()
+
+    timings = [t for worker_timings, _ in collected for t in worker_timings]
+    failed = sum(f for _, f in collected)
+    p95 = statistics.quantiles(timings, n=20)[-1] * 1000
+    return failed, len(timings), (len(timings) - failed) / elapsed, p95
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=200, help='per worker')
+    parser.add_argument('--hold', type=float, default=6, help='seconds the reader keeps each statement open')
+    args = parser.parse_args()
+
+    multiprocessing.set_start_method('fork')
+    print(f'{"scenario":<14} {"failed":>12} {"writes/s":>10} {"p95":>10}')
+    for name, overrides in SCENARIOS.items():
+        failed, total, throughput, p95 = run(overrides, args.workers, args.requests, args.hold)
+        print(f'{name:<14} {failed:>5}/{total:<6} {throughput:>10,.0f} {p95:>8.1f}ms')
@@ -0,0 +1,70 @@
+"""Benchmark polling list endpoints with and without If-None-Match.
+
+Seeds blood requests and donors, then polls GET /blood-requests/ and
+GET /donors/ the way a mobile client does and compares a full 200 response
+with a 304 revalidation.
+
+Usage::
+
+    python benchmarks/conditional.py --rows 10000 --polls 500
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask_jwt_extended import create_access_token
+
+from main import create_app
+from database import db
+from models.User.model import User
+from bulk_import import ndjson
+
+
+def poll(client, url, headers, polls):
+    timings = []
+    for _ in range(polls):
+        start = time.perf_counter()
+        response = client.get(url, headers=headers)
+        response.get_data()
+        timings.append(time.perf_counter() - start)
+    return response, statistics.median(timings) * 1000
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--polls', type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp}/bench.db'})
+        with app.app_context():
+            db.create_all()
+            db.session.add(User(name='Hospital', email='hospital@bench.test', blood_type='O+', password_hash='!'))
+            db.session.commit()
+            token = create_access_token(identity='1')
+        client = app.test_client()
+        headers = {'Authorization': f'Bearer {token}'}
+
+        with app.app_context():
+            db.session.execute(User.__table__.insert(), [
+                {'name': f'Donor {i}', 'email': f'donor{i}@bench.test', 'password_hash': '!', 'blood_type': 'O+'} for i in range(args.rows)
+            ])
+            db.session.execute(db.text('INSERT INTO donor (user_id, is_available, created_at, updated_at) '
+                                       'SELECT id, 1, created_at, updated_at FROM user WHERE id > 1'))
+            db.session.commit()
+        body = ndjson({'name': f'Patient {i}', 'blood_type': 'O+', 'quantity': 1, 'location': 'Clinic'} for i in range(args.rows))
+        client.post('/blood-requests/import', data=body, content_type='application/x-ndjson', headers=headers)
+
+        print(f'{"endpoint":<30} {"200 p50":>9} {"304 p50":>9}')
+        for url in ('/blood-requests/?limit=50', '/blood-requests/?limit=500', '/donors/?limit=50', '/donors/?limit=500'):
+            response, full = poll(client, url, headers, args.polls)
+            conditional = {**headers, 'If-None-Match': response.headers['ETag']}
+            response, revalidated = poll(client, url, conditional, args.polls)
+            assert response.status_code == 304
+            print(f'{url:<30} {full:>7.2f}ms {revalidated:>7.2f}ms')
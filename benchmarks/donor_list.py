@@ -0,0 +1,110 @@
+"""Benchmark the GET /donors read path.
+
+Compares three ways of producing the donor list:
+
+* ``baseline``   -- ORM query, lazy ``donor.user`` load and two COUNT queries per
+  user (the behaviour before counters and the projection read path)
+* ``orm``        -- ORM query with lazy ``donor.user`` load and counter columns
+* ``projection`` -- single joined SELECT serialized with ``Donor.row_to_dict``
+
+Usage::
+
+    python benchmarks/donor_list.py --sizes 10000 100000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import event, insert, select
+from werkzeug.security import generate_password_hash
+
+from main import create_app
+from database import db
+from models.User.model import User
+from models.Donor.model import Donor
+
+PAGE_SIZE = 50
+BLOOD_TYPES = ['O-', 'O+', 'A-', 'A+', 'B-', 'B+', 'AB-', 'AB+']
+
+
+def seed(count):
+    password_hash = generate_password_hash('benchmark')
+    users = [
+        {
+            'id': i,
+            'name': f'Donor {i}',
+            'email': f'donor{i}@bench.test',
+            'password_hash': password_hash,
+            'blood_type': BLOOD_TYPES[i % len(BLOOD_TYPES)],
+            'location': f'City {i % 100}',
+        }
+        for i in range(1, count + 1)
+    ]
+    db.session.execute(insert(User), users)
+    db.session.execute(insert(Donor), [
+        {'id': i, 'user_id': i, 'blood_type': users[i - 1]['blood_type'], 'medical_history': ''} for i in range(1, count + 1)
+    ])
+    db.session.commit()
+
+
+def baseline(limit):
+    donors = Donor.query.join(User).order_by(Donor.created_at, Donor.id).limit(limit).all()
+    out = []
+    for donor in donors:
+        data = donor.to_dict()
+        data['user']['donations'] = donor.user.donations.count()
+        data['user']['requests'] = donor.user.requests.count()
+        out.append(data)
+    return out
+
+
+def orm(limit):
+    donors = Donor.query.join(User).order_by(Donor.created_at, Donor.id).limit(limit).all()
+    return [donor.to_dict() for donor in donors]
+
+
+def projection(limit):
+    stmt = select(*Donor.projection()).join(User, Donor.user_id == User.id).order_by(Donor.created_at, Donor.id).limit(limit)
+    return [Donor.row_to_dict(row) for row in db.session.execute(stmt)]
+
+
+def measure(fn, limit):
+    statements = []
+    def record(*args):
+        statements.append(1)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    start = time.perf_counter()
+    try:
+        rows = fn(limit)
+    finally:
+        elapsed = time.perf_counter() - start
+        event.remove(db.engine, 'before_cursor_execute', record)
+    db.session.expunge_all()
+    return len(rows), len(statements), elapsed
+
+
+def run(count):
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp}/bench.db'})
+        with app.app_context():
+            db.create_all()
+            seed(count)
+            print(f'\n{count} donors')
+            print(f'{"mode":<12}{"queries/page":>14}{"full-table rows/s":>20}{"full-table s":>14}')
+            for fn in (baseline, orm, projection):
+                _, page_queries, _ = measure(fn, PAGE_SIZE)
+                rows, _, elapsed = measure(fn, count)
+                print(f'{fn.__name__:<12}{page_queries:>14}{rows / elapsed:>20,.0f}{elapsed:>14.2f}')
+            db.session.remove()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    for size in parser.parse_args().sizes:
+        run(size)
@@ -0,0 +1,65 @@
+"""Benchmark the streaming export endpoint.
+
+Seeds blood requests through POST /blood-requests/import, then streams
+GET /blood-requests/export in each format and reports rows/sec and the peak
+Python heap allocated while the response was produced. The peak should stay
+flat as the row count grows.
+
+Usage::
+
+    python benchmarks/export.py --rows 10000 100000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask_jwt_extended import create_access_token
+
+from main import create_app
+from database import db
+from models.User.model import User
+from bulk_import import ndjson
+
+
+def timed_export(client, fmt, headers):
+    tracemalloc.start()
+    start = time.perf_counter()
+    response = client.get(f'/blood-requests/export?format={fmt}', headers=headers, buffered=False)
+    lines = 0
+    for chunk in response.response:
+        lines += chunk.count(b'\n')
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    response.close()
+    return lines, elapsed, peak
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000])
+    args = parser.parse_args()
+
+    print(f'{"rows":>8}  {"format":<7} {"rows/s":>10}  {"peak heap":>10}')
+    for count in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp}/bench.db'})
+            with app.app_context():
+                db.create_all()
+                db.session.add(User(name='Hospital', email='hospital@bench.test', blood_type='O+', password_hash='!'))
+                db.session.commit()
+                token = create_access_token(identity='1')
+            client = app.test_client()
+            headers = {'Authorization': f'Bearer {token}'}
+            body = ndjson({'name': f'Patient {i}', 'blood_type': 'O+', 'quantity': 1, 'location': 'Clinic'} for i in range(count))
+            client.post('/blood-requests/import', data=body, content_type='application/x-ndjson', headers=headers)
+
+            for fmt in ('ndjson', 'csv'):
+                lines, elapsed, peak = timed_export(client, fmt, headers)
+                rows = lines - (fmt == 'csv')
+                print(f'{rows:>8}  {fmt:<7} {rows / elapsed:>10,.0f}  {peak / 1024:>8,.0f}KB')
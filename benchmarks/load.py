@@ -0,0 +1,439 @@
+"""Load-test every endpoint on a seeded database and compare against a baseline.
+
+Seeds a temporary SQLite database with ``seed.py`` (or uses ``--database``),
+then runs one phase per scenario: ``--clients`` threads send ``--requests``
+requests between them, after one untimed warm-up request each. Every route
+in the app is covered; reads pick random rows, writes act as the owning user
+and create fresh emails and donor profiles so they succeed every time.
+Reports per scenario:
+
+* throughput and p50/p95/p99 latency as seen by the client
+* errors -- any response other than 200 or 201 (the password hasher's 503
+  backpressure included)
+* SQL statements per request, from the server's ``/metrics`` before and
+  after the phase
+
+Targets:
+
+* ``testclient`` -- the app in this process through the Flask test client,
+  so client and server share the interpreter
+* ``gunicorn`` -- ``gunicorn wsgi:app`` as deployed, over HTTP. Each worker
+  keeps its own metrics, so SQL/request is only reported with one worker
+
+Pass ``--save`` to record the results and ``--baseline`` to compare against
+a recorded run; new errors, any rise in SQL/request, or a p95 increase or
+throughput drop beyond ``--tolerance`` fail the run with exit status 1.
+Latency under concurrency swings by a third between identical runs on a
+small machine, so the default tolerance only catches gross slowdowns; the
+SQL count is exact and catches added queries.
+
+Usage::
+
+    python benchmarks/load.py --target testclient --baseline benchmarks/baselines/load-testclient.json
+    python benchmarks/load.py --target gunicorn --scale full --clients 16
+"""
+import argparse
+import datetime
+import http.client
+import itertools
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, namedtuple
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import func, select
+
+from main import create_app
+from database import db
+from models.User.model import User
+from models.Donor.model import Donor
+from models.BloodRequest.model import BloodRequest
+from models.BloodDonation.model import BloodDonation
+from seed import PASSWORD, seed
+from server_modes import free_port, wait_until_up
+
+SCALES = {
+    'small': {'users': 10_000, 'donors': 5_000, 'requests': 100_000, 'donations': 20_000},
+    'full': {'users': 100_000, 'donors': 50_000, 'requests': 1_000_000, 'donations': 200_000},
+}
+JWT_SECRET = 'benchmark-secret-key-of-32-bytes!'
+BLOOD_TYPES = ['O+', 'A+', 'B+', 'O-', 'A-', 'AB+', 'B-', 'AB-']
+CITIES = ['Lagos', 'Abuja', 'Kano', 'Ibadan', 'Enugu']
+IMPORT_ROWS = 10
+# Routes a load test has no business driving; the event stream never
+# completes, so it has no latency to measure
+SKIPPED_ENDPOINTS = {'static', 'flasgger.static', 'flasgger.apidocs', 'flasgger.oauth_redirect', 'flasgger.<lambda>',
+                     'blood-request.stream_blood_requests'}
+
+Call = namedtuple('Call', 'method path body content_type token')
+
+
+class Workload:
+    """What scenarios draw on: row counts, tokens and ids that are safe to write with."""
+
+    def __init__(self, app, run_id):
+        self.app = app
+        self.run_id = run_id
+        self.serial = itertools.count()
+        self._tokens = {}
+        with app.app_context():
+            self.users = db.session.scalar(select(func.max(User.id)))
+            self.donors = db.session.scalar(select(func.max(Donor.id)))
+            self.blood_requests = db.session.scalar(select(func.max(BloodRequest.id)))
+            self.donations = db.session.scalar(select(func.max(BloodDonation.id)))
+            # Requests with their requesters, for updates made as the owner
+            sample = random.Random(0).sample(range(1, self.blood_requests + 1), min(1000, self.blood_requests))
+            self.owned_requests = db.session.execute(
+                select(BloodRequest.id, BloodRequest.requester_id).where(BloodRequest.id.in_(sample))).all()
+            # Each donor profile created uses up one user without one
+            self._non_donors = iter(db.session.scalars(
+                select(User.id).where(~User.id.in_(select(Donor.user_id))).order_by(User.id)).all())
+        self._lock = threading.Lock()
+
+    def token(self, user_id):
+        token = self._tokens.get(user_id)
+        if token is None:
+            token = self._tokens[user_id] = self.fresh_token(user_id)
+        return token
+
+    def fresh_token(self, user_id):
+        with self.app.app_context():
+            return create_access_token(identity=str(user_id))
+
+    def non_donor(self):
+        with self._lock:
+            user_id = next(self._non_donors, None)
+        if user_id is None:
+            raise RuntimeError('ran out of users without a donor profile; seed more users or send fewer requests')
+        return user_id
+
+    def email(self):
+        return f'load-{self.run_id}-{next(self.serial)}@bench.test'
+
+
+def _json(method, path, body=None, token=None):
+    return Call(method, path, json.dumps(body).encode() if body is not None else None, 'application/json', token)
+
+
+def _ndjson(path, rows, token):
+    body = ''.join(json.dumps(row) + '\n' for row in rows).encode()
+    return Call('POST', path, body, 'application/x-ndjson', token)
+
+
+def _day(rng):
+    return datetime.date(2025, 1, 1) + datetime.timedelta(days=rng.randrange(640))
+
+
+def _person(w, rng):
+    return {'email': w.email(), 'password': PASSWORD, 'name': 'Load Test', 'blood_type': rng.choice(BLOOD_TYPES),
+            'gender': rng.choice(('F', 'M')), 'location': rng.choice(CITIES)}
+
+
+def _blood_request(rng):
+    return {'blood_type': rng.choice(BLOOD_TYPES), 'quantity': rng.randint(1, 4), 'location': rng.choice(CITIES),
+            'name': 'Patient', 'phone': '0800'}
+
+
+def _reader(w, rng):
+    return w.token(rng.randint(1, w.users))
+
+
+def _export_window(rng, days):
+    since = _day(rng)
+    return f'since={since}&until={since + datetime.timedelta(days=days)}'
+
+
+def _update_donor(w, rng):
+    donor = rng.randint(1, w.donors)
+    # Seeded donor n belongs to user n
+    return _json('PUT', f'/donors/{donor}', {'is_available': rng.random() < 0.85}, w.token(donor))
+
+
+def _update_request(w, rng):
+    owned = rng.choice(w.owned_requests)
+    return _json('PUT', f'/blood-requests/{owned.id}', {'status': rng.choice(('Pending', 'Fulfilled'))},
+                 w.token(owned.requester_id))
+
+
+def _create_donation(w, rng):
+    donor = rng.randint(1, w.donors)
+    return _json('POST', '/blood-donations/',
+                 {'blood_group': rng.choice(BLOOD_TYPES), 'donation_date': _day(rng).isoformat()}, w.token(donor))
+
+
+# name -> (endpoint, share of --requests, builder). Password hashing costs
+# ~100ms a time, so the scenarios that hash get a tenth of the requests.
+SCENARIOS = {
+    'index': ('index', 1, lambda w, rng: _json('GET', '/')),
+    'openapi': ('flasgger.apispec_1', 1, lambda w, rng: _json('GET', '/apispec_1.json')),
+    'metrics': ('metrics_view', 1, lambda w, rng: _json('GET', '/metrics')),
+    'auth.login': ('auth.login', 0.1, lambda w, rng: _json(
+        'POST', '/auth/login', {'email': f'user{rng.randint(1, w.users)}@bench.test', 'password': PASSWORD})),
+    'auth.register': ('auth.register', 0.1, lambda w, rng: _json('POST', '/auth/register', _person(w, rng))),
+    'auth.logout': ('auth.logout', 1, lambda w, rng: _json(
+        'POST', '/auth/logout', token=w.fresh_token(rng.randint(1, w.users)))),
+    'users.list': ('user.get_users', 1, lambda w, rng: _json('GET', '/users/?limit=50', token=_reader(w, rng))),
+    'users.get': ('user.get_user', 1, lambda w, rng: _json(
+        'GET', f'/users/{rng.randint(1, w.users)}', token=_reader(w, rng))),
+    'users.create': ('user.create_user', 0.1, lambda w, rng: _json('POST', '/users/', _person(w, rng))),
+    'users.import': ('user.import_users', 0.1, lambda w, rng: _ndjson(
+        '/users/import', [_person(w, rng) for _ in range(IMPORT_ROWS)], _reader(w, rng))),
+    'donors.list': ('donor_bp.get_donors', 1, lambda w, rng: _json(
+        'GET', f'/donors/?limit=50&blood_group={rng.choice(BLOOD_TYPES).replace("+", "%2B")}',
+        token=_reader(w, rng))),
+    'donors.near': ('donor_bp.get_donors', 1, lambda w, rng: _json(
+        'GET', '/donors/?limit=20&near=6.5244,3.3792&radius_km=25', token=_reader(w, rng))),
+    'donors.get': ('donor_bp.get_donor', 1, lambda w, rng: _json(
+        'GET', f'/donors/{rng.randint(1, w.donors)}', token=_reader(w, rng))),
+    'donors.create': ('donor_bp.create_donor', 1, lambda w, rng: _json(
+        'POST', '/donors/', {'medical_history': '', 'is_available': True}, w.token(w.non_donor()))),
+    'donors.update': ('donor_bp.update_donor', 1, _update_donor),
+    'donors.import': ('donor_bp.import_donors', 0.1, lambda w, rng: _ndjson(
+        '/donors/import', [{'user_id': w.non_donor()} for _ in range(IMPORT_ROWS)], _reader(w, rng))),
+    'requests.list': ('blood-request.get_blood_requests', 1, lambda w, rng: _json(
+        'GET', '/blood-requests/?limit=50', token=_reader(w, rng))),
+    'requests.export': ('blood-request.export_blood_requests', 1, lambda w, rng: _json(
+        'GET', f'/blood-requests/export?{_export_window(rng, 1)}', token=_reader(w, rng))),
+    'requests.get': ('blood-request.get_blood_request', 1, lambda w, rng: _json(
+        'GET', f'/blood-requests/{rng.randint(1, w.blood_requests)}', token=_reader(w, rng))),
+    'requests.matches': ('blood-request.get_blood_request_matches', 1, lambda w, rng: _json(
+        'GET', f'/blood-requests/{rng.randint(1, w.blood_requests)}/matches?limit=20', token=_reader(w, rng))),
+    'requests.create': ('blood-request.create_blood_request', 1, lambda w, rng: _json(
+        'POST', '/blood-requests/', _blood_request(rng), _reader(w, rng))),
+    'requests.update': ('blood-request.update_blood_request', 1, _update_request),
+    'requests.import': ('blood-request.import_blood_requests', 1, lambda w, rng: _ndjson(
+        '/blood-requests/import', [_blood_request(rng) for _ in range(IMPORT_ROWS)], _reader(w, rng))),
+    'donations.create': ('blood_donation.create_blood_donation', 1, _create_donation),
+    'donations.list': ('blood_donation.get_blood_donations', 1, lambda w, rng: _json(
+        'GET', '/blood-donations/?limit=50', token=_reader(w, rng))),
+    'donations.export': ('blood_donation.export_blood_donations', 1, lambda w, rng: _json(
+        'GET', f'/blood-donations/export?{_export_window(rng, 7)}', token=_reader(w, rng))),
+    'donations.get': ('blood_donation.get_blood_donation', 1, lambda w, rng: _json(
+        'GET', f'/blood-donations/{rng.randint(1, w.donations)}', token=_reader(w, rng))),
+    'stats': ('stats.get_stats', 1, lambda w, rng: _json('GET', '/stats/', token=_reader(w, rng))),
+}
+
+
+class TestClientTarget:
+    name = 'testclient'
+    workers = 1
+
+    def __init__(self, app):
+        self.app = app
+
+    def session(self):
+        client = self.app.test_client()
+
+        def send(call):
+            headers = {'Authorization': f'Bearer {call.token}'} if call.token else {}
+            # Buffered, so the response is closed and the metrics middleware records it
+            response = client.open(call.path, method=call.method, data=call.body, content_type=call.content_type,
+                                   headers=headers, buffered=True)
+            return response.status_code, response.data
+        return send
+
+    def close(self):
+        pass
+
+
+class GunicornTarget:
+    name = 'gunicorn'
+
+    def __init__(self, database, workers):
+        self.workers = workers
+        self.port = free_port()
+        env = {**os.environ, 'DATABASE_URL': database, 'JWT_SECRET_KEY': JWT_SECRET}
+        self.process = subprocess.Popen(['gunicorn', '-w', str(workers), '-b', f'127.0.0.1:{self.port}', 'wsgi:app'],
+                                        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        wait_until_up(self.port, self.process)
+
+    def session(self):
+        connection = None
+
+        def send(call):
+            nonlocal connection
+            headers = {'Content-Type': call.content_type}
+            if call.token:
+                headers['Authorization'] = f'Bearer {call.token}'
+            if connection is None:
+                connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=60)
+            try:
+                connection.request(call.method, call.path, body=call.body, headers=headers)
+                response = connection.getresponse()
+                return response.status, response.read()
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                connection = None
+                return 0, b''
+        return send
+
+    def close(self):
+        self.process.terminate()
+        self.process.wait()
+
+
+SAMPLE = re.compile(r'^(\w+)\{endpoint="([^"]*)",method="[^"]*",status="[^"]*"\} (\S+)$')
+
+
+def sql_totals(target):
+    """Statements and requests so far per endpoint, from ``/metrics``."""
+    status, data = target.session()(_json('GET', '/metrics'))
+    totals = Counter()
+    for line in data.decode().splitlines():
+        match = SAMPLE.match(line)
+        if match and match[1] in ('http_request_sql_statements_total', 'http_request_duration_seconds_count'):
+            totals[match[1], match[2]] += float(match[3])
+    return totals
+
+
+def _percentile(ordered, p):
+    return ordered[min(int(len(ordered) * p), len(ordered) - 1)] * 1000
+
+
+def run_scenario(target, workload, name, total, clients):
+    endpoint, _, build = SCENARIOS[name]
+    before = sql_totals(target)
+    latencies, statuses = [], Counter()
+    lock = threading.Lock()
+    started = []
+    # Timing starts once every client has warmed up
+    barrier = threading.Barrier(clients, action=lambda: started.append(time.perf_counter()))
+    counts = [total // clients + (n < total % clients) for n in range(clients)]
+
+    def client(n):
+        rng = random.Random(n)
+        send = target.session()
+        send(build(workload, rng))
+        barrier.wait()
+        local, local_statuses = [], Counter()
+        for _ in range(counts[n]):
+            call = build(workload, rng)
+            started = time.perf_counter()
+            status, _ = send(call)
+            local.append(time.perf_counter() - started)
+            local_statuses[status] += 1
+        with lock:
+            latencies.extend(local)
+            statuses.update(local_statuses)
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started[0]
+
+    after = sql_totals(target)
+    served = after['http_request_duration_seconds_count', endpoint] - before['http_request_duration_seconds_count', endpoint]
+    sql = after['http_request_sql_statements_total', endpoint] - before['http_request_sql_statements_total', endpoint]
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': sum(count for status, count in statuses.items() if status not in (200, 201)),
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(_percentile(latencies, 0.5), 2),
+        'p95_ms': round(_percentile(latencies, 0.95), 2),
+        'p99_ms': round(_percentile(latencies, 0.99), 2),
+        'sql_per_request': round(sql / served, 2) if served and target.workers == 1 else None,
+    }
+
+
+def regressions(results, baseline, tolerance):
+    """Describe each result that is worse than its baseline by more than ``tolerance``."""
+    found = []
+    for name, now in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        # Sub-millisecond p95s move by more than any sensible tolerance
+        if now['p95_ms'] > before['p95_ms'] * (1 + tolerance) and now['p95_ms'] - before['p95_ms'] > 1:
+            found.append(f"{name}: p95 {before['p95_ms']}ms -> {now['p95_ms']}ms")
+        if now['rps'] < before['rps'] * (1 - tolerance):
+            found.append(f"{name}: throughput {before['rps']} -> {now['rps']} req/s")
+        if now['errors'] > before['errors']:
+            found.append(f"{name}: errors {before['errors']} -> {now['errors']}")
+        if None not in (now['sql_per_request'], before['sql_per_request']) \
+                and now['sql_per_request'] > before['sql_per_request'] + 0.5:
+            found.append(f"{name}: SQL/request {before['sql_per_request']} -> {now['sql_per_request']}")
+    return found
+
+
+def prepare(database, counts):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': database, 'JWT_SECRET_KEY': JWT_SECRET, 'METRICS_ENABLED': False})
+    with app.app_context():
+        db.create_all()
+        if not db.session.scalar(select(func.count()).select_from(User)):
+            started = time.perf_counter()
+            seeded = seed(**counts)
+            print(f"seeded {', '.join(f'{count:,} {name}' for name, count in seeded.items())} "
+                  f'in {time.perf_counter() - started:.1f}s')
+        db.engine.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--target', choices=('testclient', 'gunicorn'), default='testclient')
+    parser.add_argument('--scale', choices=SCALES, default='small', help='rows to seed a new database with')
+    parser.add_argument('--database', help='database URL to use (and seed if empty) instead of a temporary one')
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=200, help='per scenario, before its share is applied')
+    parser.add_argument('--workers', type=int, default=1, help='gunicorn workers')
+    parser.add_argument('--only', nargs='+', choices=SCENARIOS, metavar='SCENARIO', help='run just these scenarios')
+    parser.add_argument('--save', help='write the results to this JSON file')
+    parser.add_argument('--baseline', help='compare against results saved with --save')
+    parser.add_argument('--tolerance', type=float, default=0.5, help='allowed relative slowdown')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = args.database or f'sqlite:///{tmp}/load.db'
+        prepare(database, SCALES[args.scale])
+        app = create_app({'SQLALCHEMY_DATABASE_URI': database, 'JWT_SECRET_KEY': JWT_SECRET})
+        # Every error is counted; the tracebacks would drown the report
+        app.logger.disabled = True
+        workload = Workload(app, int(time.time()))
+        target = TestClientTarget(app) if args.target == 'testclient' else GunicornTarget(database, args.workers)
+
+        served = {rule.endpoint for rule in app.url_map.iter_rules()} - SKIPPED_ENDPOINTS
+        uncovered = served - {endpoint for endpoint, _, _ in SCENARIOS.values()}
+        if uncovered:
+            print(f"not covered by any scenario: {', '.join(sorted(uncovered))}")
+
+        meta = {'target': args.target, 'scale': args.scale if not args.database else args.database,
+                'clients': args.clients, 'requests': args.requests, 'workers': target.workers}
+        print(', '.join(f'{key} {value}' for key, value in meta.items()))
+        print(f'{"scenario":<18}{"requests":>9}{"errors":>8}{"req/s":>9}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}'
+              f'{"SQL/req":>9}')
+        results = {}
+        try:
+            for name in args.only or SCENARIOS:
+                total = max(args.clients, int(args.requests * SCENARIOS[name][1]))
+                result = results[name] = run_scenario(target, workload, name, total, args.clients)
+                sql = '-' if result['sql_per_request'] is None else f"{result['sql_per_request']:.2f}"
+                print(f"{name:<18}{result['requests']:>9}{result['errors']:>8}{result['rps']:>9.1f}"
+                      f"{result['p50_ms']:>9.1f}{result['p95_ms']:>9.1f}{result['p99_ms']:>9.1f}{sql:>9}")
+        finally:
+            target.close()
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'meta': meta, 'results': results}, f, indent=2, sort_keys=True)
+            f.write('\n')
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline['meta'] != meta:
+            print(f"baseline was recorded with {baseline['meta']}; comparing anyway")
+        found = regressions(results, baseline['results'], args.tolerance)
+        print('\n'.join(['regressions:', *found]) if found else 'no regressions against the baseline')
+        sys.exit(1 if found else 0)
@@ -0,0 +1,63 @@
+"""Benchmark GET /blood-requests/<id>/matches latency.
+
+Seeds donors of all eight blood types, then times the endpoint end to end
+through the Flask test client for every recipient type.
+
+Usage::
+
+    python benchmarks/matches.py --donors 100000 --repeat 50
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask_jwt_extended import create_access_token
+
+from main import create_app
+from database import db
+from models.BloodRequest.model import BloodRequest
+from models.BloodRequest.compatibility import BLOOD_TYPES
+from donor_list import seed
+
+
+def run(count, repeat):
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp}/bench.db'})
+        with app.app_context():
+            db.create_all()
+            seed(count)
+            request_ids = {}
+            for blood_type in BLOOD_TYPES:
+                req = BloodRequest(requester_id=1, blood_type=blood_type, quantity=1, location='City 1', name='Bench', phone=None)
+                db.session.add(req)
+                db.session.commit()
+                request_ids[blood_type] = req.id
+            token = create_access_token(identity='1')
+            db.session.remove()
+
+        client = app.test_client()
+        headers = {'Authorization': f'Bearer {token}'}
+        print(f'\n{count} donors, {repeat} requests per type')
+        print(f'{"recipient":<10}{"p50 ms":>10}{"p95 ms":>10}')
+        for blood_type, request_id in request_ids.items():
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                response = client.get(f'/blood-requests/{request_id}/matches', headers=headers)
+                timings.append((time.perf_counter() - start) * 1000)
+                assert response.status_code == 200
+            timings.sort()
+            print(f'{blood_type:<10}{statistics.median(timings):>10.2f}{timings[int(len(timings) * 0.95) - 1]:>10.2f}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--donors', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+    run(args.donors, args.repeat)
@@ -0,0 +1,66 @@
+"""Benchmark serving the OpenAPI spec and the cost of registering flasgger.
+
+Compares GET /apispec_1.json rebuilt per request (flasgger's own view)
+against the cached document, then measures ``create_app`` time and Python
+heap with ``SWAGGER_ENABLED`` on and off. The heap includes the one-off spec
+build triggered by the first request.
+
+Usage::
+
+    python benchmarks/openapi.py --requests 200
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import jsonify
+
+from main import create_app
+from apidocs import SPEC_ENDPOINT, SPEC_ROUTE
+
+CONFIG = {'SQLALCHEMY_DATABASE_URI': 'sqlite://'}
+
+
+def median_ms(client, requests, headers=None):
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        client.get(SPEC_ROUTE, headers=headers).get_data()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    app = create_app(CONFIG)
+    client = app.test_client()
+    etag = client.get(SPEC_ROUTE).headers['ETag']
+    median_ms(client, args.requests)
+    cached = median_ms(client, args.requests)
+    revalidated = median_ms(client, args.requests, {'If-None-Match': etag})
+    # What flasgger's own view does: jsonify get_apispecs() per request. Outside
+    # debug mode flasgger memoizes the dict, so only the encoding is repeated.
+    build = app.extensions['openapi_spec']._build
+    app.view_functions[f'flasgger.{SPEC_ENDPOINT}'] = lambda: jsonify(build())
+    encoded = median_ms(client, args.requests)
+    app.debug = True
+    rebuilt = median_ms(client, args.requests)
+    print(f'spec p50: rebuilt (debug) {rebuilt:.2f}ms, re-encoded {encoded:.2f}ms, cached {cached:.2f}ms, 304 {revalidated:.2f}ms')
+
+    for enabled in (True, False):
+        tracemalloc.start()
+        start = time.perf_counter()
+        app = create_app({**CONFIG, 'SWAGGER_ENABLED': enabled})
+        elapsed = time.perf_counter() - start
+        app.test_client().get(SPEC_ROUTE)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f'SWAGGER_ENABLED={enabled!s:<5}  create_app {elapsed * 1000:.1f}ms  peak heap {peak / 1024:,.0f}KB')
@@ -0,0 +1,95 @@
+"""Benchmark the /donors name and location filters against table size.
+
+For each backend and size, times the filter with a plain leading-wildcard
+ILIKE (full scan) and through the search index (search.contains), for a rare
+and a common term.
+
+Usage::
+
+    python benchmarks/search.py --sizes 10000 100000 1000000
+    python benchmarks/search.py --url postgresql://localhost/bloodbit_bench
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import insert, select
+
+from main import create_app
+from database import db
+from models.User.model import User
+import search
+
+FIRST_NAMES = ['Ada', 'Bola', 'Chidi', 'Dayo', 'Emeka', 'Funmi', 'Gbenga', 'Halima', 'Ifeoma', 'Jide']
+LAST_NAMES = ['Obi', 'Ade', 'Eze', 'Okafor', 'Bello', 'Musa', 'Okoro', 'Balogun', 'Nwosu', 'Yusuf']
+CITIES = ['Lagos', 'Abuja', 'Ibadan', 'Kano', 'Enugu', 'Port Harcourt', 'Benin City', 'Jos', 'Ilorin', 'Owerri']
+TERMS = {'common': 'lagos', 'rare': 'zz-rare'}
+REPEAT = 20
+
+
+def seed(count):
+    rng = random.Random(1)
+    batch = []
+    for i in range(1, count + 1):
+        location = f'{rng.choice(CITIES)} district {i % 500}'
+        if i % 10000 == 0:
+            location = 'zz-rare village'
+        batch.append({
+            'name': f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+            'email': f'user{i}@bench.test',
+            'password_hash': '!',
+            'blood_type': 'O+',
+            'location': location,
+        })
+        if len(batch) == 10000:
+            db.session.execute(insert(User), batch)
+            batch = []
+    if batch:
+        db.session.execute(insert(User), batch)
+    db.session.commit()
+
+
+def timed(condition):
+    stmt = select(User.id).where(condition).order_by(User.created_at, User.id).limit(50)
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        db.session.execute(stmt).all()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def run(url, count):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': url})
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        seed(count)
+        dialect = db.engine.dialect.name
+        for label, term in TERMS.items():
+            scan = timed(User.location.ilike(f'%{term}%'))
+            indexed = timed(search.contains(dialect, User.id, User.location, term))
+            print(f'{dialect:<12}{count:>10}{label:>8}{scan:>12.2f}{indexed:>12.2f}')
+        db.session.remove()
+        db.drop_all()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--url', help='database URL to benchmark instead of a temporary SQLite file')
+    args = parser.parse_args()
+
+    print(f'{"backend":<12}{"rows":>10}{"term":>8}{"ilike ms":>12}{"index ms":>12}')
+    for size in args.sizes:
+        if args.url:
+            run(args.url, size)
+        else:
+            with tempfile.TemporaryDirectory() as tmp:
+                run(f'sqlite:///{tmp}/bench.db', size)
@@ -0,0 +1,181 @@
+"""Seed a database with realistic synthetic data for benchmarks and load tests.
+
+Rows are generated from a fixed random seed and written with Core
+``executemany`` inserts in chunks, inside one transaction, so a million
+blood requests take seconds rather than the minutes the ORM would need.
+The data is shaped like production:
+
+* users spread over a dozen cities with jittered coordinates (and grid
+  cells) and the usual ABO/Rh mix
+* donors are the first ``--donors`` users; most are available and about half
+  have donated before
+* requests and donations over the past two years, oldest first, with
+  ``request_count``/``donation_count`` kept in step and ``blood_stats``
+  recounted at the end
+* every user's password is ``benchmark``
+
+Import ``seed`` to seed inside an app context, or run it against a database::
+
+    python benchmarks/seed.py --database sqlite:///bench.db --users 100000 --donors 50000 --requests 1000000
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import current_app
+from sqlalchemy import func, insert, select, text
+
+import geo
+from database import db
+from hashing import get_hasher
+from models.User.model import User
+from models.Donor.model import Donor, eligible_from
+from models.BloodRequest.model import BloodRequest
+from models.BloodDonation.model import BloodDonation
+from models.BloodStats.reconcile import reconcile
+from models.TableVersion.model import bump_versions
+
+PASSWORD = 'benchmark'
+CHUNK_SIZE = 50_000
+# Share of each type among donors, roughly as in blood services' published figures
+BLOOD_TYPE_WEIGHTS = {'O+': 38, 'A+': 34, 'B+': 9, 'O-': 7, 'A-': 6, 'AB+': 3, 'B-': 2, 'AB-': 1}
+CITIES = [
+    ('Lagos', 6.5244, 3.3792), ('Abuja', 9.0765, 7.3986), ('Kano', 12.0022, 8.5920),
+    ('Ibadan', 7.3775, 3.9470), ('Port Harcourt', 4.8156, 7.0498), ('Benin City', 6.3350, 5.6037),
+    ('Enugu', 6.4584, 7.5464), ('Kaduna', 10.5105, 7.4165), ('Jos', 9.8965, 8.8583),
+    ('Ilorin', 8.4966, 4.5421), ('Accra', 5.6037, -0.1870), ('Nairobi', -1.2921, 36.8219),
+]
+FIRST_NAMES = ['Ada', 'Bola', 'Chidi', 'Dayo', 'Emeka', 'Funmi', 'Gbenga', 'Halima', 'Ifeoma', 'Jide',
+               'Kemi', 'Lola', 'Musa', 'Ngozi', 'Ola', 'Segun', 'Tunde', 'Uche', 'Yemi', 'Zainab']
+LAST_NAMES = ['Adeyemi', 'Bello', 'Chukwu', 'Danjuma', 'Eze', 'Fashola', 'Garba', 'Ibrahim', 'Johnson',
+              'Kalu', 'Lawal', 'Mohammed', 'Nwosu', 'Okafor', 'Okonkwo', 'Salami', 'Usman', 'Yusuf']
+REQUEST_STATUSES = (['Pending'] * 60) + (['Fulfilled'] * 35) + (['Cancelled'] * 5)
+HISTORY = datetime.timedelta(days=730)
+
+
+def _timestamps(rng, count, now):
+    """``count`` ascending datetimes spread over the last two years."""
+    start = now - HISTORY
+    step = HISTORY / max(count, 1)
+    return (start + step * i + datetime.timedelta(seconds=rng.random() * step.total_seconds()) for i in range(count))
+
+
+def _insert(connection, model, rows):
+    rows = iter(rows)
+    while True:
+        chunk = [row for _, row in zip(range(CHUNK_SIZE), rows)]
+        if not chunk:
+            return
+        connection.execute(insert(model), chunk)
+
+
+def seed(users=100_000, donors=50_000, requests=1_000_000, donations=200_000, random_seed=0, now=None):
+    """Seed an empty database; call inside an app context. Returns the row counts."""
+    if donors > users:
+        raise ValueError('donors must not exceed users')
+    if db.session.scalar(select(func.count()).select_from(User)):
+        raise ValueError('the database already has users; seed an empty one')
+
+    rng = random.Random(random_seed)
+    now = now or datetime.datetime.utcnow().replace(microsecond=0)
+    blood_types = rng.choices(list(BLOOD_TYPE_WEIGHTS), weights=list(BLOOD_TYPE_WEIGHTS.values()), k=users)
+    cities = [rng.choice(CITIES) for _ in range(users)]
+
+    request_rows = []
+    request_counts = Counter()
+    for i, created_at in enumerate(_timestamps(rng, requests, now), 1):
+        requester = rng.randint(1, users)
+        request_counts[requester] += 1
+        city, latitude, longitude = rng.choice(CITIES)
+        status = rng.choice(REQUEST_STATUSES)
+        request_rows.append({
+            'id': i, 'requester_id': requester, 'blood_type': rng.choice(blood_types),
+            'quantity': rng.randint(1, 4), 'location': city, 'latitude': latitude, 'longitude': longitude,
+            'name': f'Patient {i}', 'phone': f'080{rng.randrange(10 ** 8):08d}', 'status': status,
+            'donor_id': rng.randint(1, donors) if status == 'Fulfilled' and donors else None,
+            'created_at': created_at, 'updated_at': created_at,
+        })
+
+    donation_rows = []
+    donation_counts = Counter()
+    last_donation = {}
+    for i, created_at in enumerate(_timestamps(rng, donations if donors else 0, now), 1):
+        donor = rng.randint(1, donors)
+        donation_counts[donor] += 1
+        last_donation[donor] = created_at
+        donation_rows.append({
+            'id': i, 'userId': donor, 'bloodGroup': blood_types[donor - 1], 'date': created_at.date(),
+            'time': created_at.time(), 'status': 'Completed' if rng.random() < 0.8 else 'Scheduled',
+            'ref': f'DN{i:08d}', 'created_at': created_at, 'updated_at': created_at,
+        })
+
+    password_hash = get_hasher().hash(PASSWORD)
+
+    def user_rows():
+        for i, created_at in enumerate(_timestamps(rng, users, now), 1):
+            city, latitude, longitude = cities[i - 1]
+            latitude += rng.uniform(-0.3, 0.3)
+            longitude += rng.uniform(-0.3, 0.3)
+            yield {
+                'id': i, 'name': f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+                'email': f'user{i}@bench.test', 'password_hash': password_hash, 'blood_type': blood_types[i - 1],
+                'location': city, 'gender': rng.choice(('F', 'M')), 'latitude': latitude, 'longitude': longitude,
+                'geo_cell': geo.cell_key(latitude, longitude), 'donation_count': donation_counts[i],
+                'request_count': request_counts[i], 'created_at': created_at, 'updated_at': created_at,
+            }
+
+    deferral_days = current_app.config['DONATION_DEFERRAL_DAYS']
+
+    def donor_rows():
+        for i, created_at in enumerate(_timestamps(rng, donors, now), 1):
+            yield {
+                'id': i, 'user_id': i, 'blood_type': blood_types[i - 1], 'medical_history': '',
+                'is_available': rng.random() < 0.85,
+                'last_donation': last_donation.get(i),
+                'eligible_from': eligible_from(last_donation.get(i), deferral_days),
+                'created_at': created_at, 'updated_at': created_at,
+            }
+
+    connection = db.session.connection()
+    _insert(connection, User, user_rows())
+    _insert(connection, Donor, donor_rows())
+    _insert(connection, BloodRequest, request_rows)
+    _insert(connection, BloodDonation, donation_rows)
+    if connection.dialect.name == 'postgresql':
+        # Explicit ids leave the serial sequences behind
+        for table in ('user', 'donor', 'blood_request', 'blood_donation'):
+            connection.execute(text(f"SELECT setval(pg_get_serial_sequence('\"{table}\"', 'id'), "
+                                    f"(SELECT COALESCE(MAX(id), 1) FROM \"{table}\"))"))
+    bump_versions(connection, 'user', 'donor', 'blood_request', 'blood_donation')
+    reconcile()
+    db.session.commit()
+    return {'users': users, 'donors': donors, 'requests': requests, 'donations': len(donation_rows)}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database', required=True, help='database URL; tables are created if missing')
+    parser.add_argument('--users', type=int, default=100_000)
+    parser.add_argument('--donors', type=int, default=50_000)
+    parser.add_argument('--requests', type=int, default=1_000_000)
+    parser.add_argument('--donations', type=int, default=200_000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    from main import create_app
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': args.database, 'METRICS_ENABLED': False})
+    with app.app_context():
+        db.create_all()
+        start = time.perf_counter()
+        counts = seed(args.users, args.donors, args.requests, args.donations, args.seed)
+        elapsed = time.perf_counter() - start
+    rows = sum(counts.values())
+    print(', '.join(f'{count:,} {name}' for name, count in counts.items()))
+    print(f'{rows:,} rows in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s)')
@@ -0,0 +1,131 @@
+"""Benchmark encoding 10k model rows to a JSON response body.
+
+Compares, per model:
+
+* ``isoformat`` -- the previous hand-written ``to_dict`` calling
+  ``isoformat()`` per datetime, encoded by the standard library provider
+* ``default`` -- the compiled ``to_dict`` with the standard library provider
+* ``orjson`` -- the compiled ``to_dict`` with the orjson provider
+
+Usage::
+
+    python benchmarks/serialization.py --rows 10000
+"""
+import argparse
+import datetime
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from main import create_app
+from models.User.model import User
+from models.Donor.model import Donor
+from models.BloodRequest.model import BloodRequest
+from models.BloodDonation.model import BloodDonation
+
+NOW = datetime.datetime(2026, 1, 2, 3, 4, 5, 678901)
+
+
+def iso(value):
+    return value.isoformat() if value is not None else None
+
+
+def legacy_user(user):
+    return {
+        'id': user.id, 'name': user.name, 'email': user.email, 'blood_type': user.blood_type,
+        'location': user.location, 'gender': user.gender, 'latitude': user.latitude, 'longitude': user.longitude,
+        'created_at': iso(user.created_at), 'updated_at': iso(user.updated_at),
+        'donations': user.donation_count, 'requests': user.request_count,
+    }
+
+
+def legacy_donor(donor):
+    return {
+        'id': donor.id, 'user': legacy_user(donor.user), 'medical_history': donor.medical_history,
+        'is_available': donor.is_available, 'last_donation': iso(donor.last_donation),
+        'created_at': iso(donor.created_at), 'updated_at': iso(donor.updated_at),
+    }
+
+
+def legacy_request(req):
+    return {
+        'id': req.id, 'requester_id': req.requester_id, 'blood_type': req.blood_type, 'quantity': req.quantity,
+        'location': req.location, 'latitude': req.latitude, 'longitude': req.longitude, 'name': req.name,
+        'phone': req.phone, 'status': req.status, 'donor_id': req.donor_id,
+        'created_at': iso(req.created_at), 'updated_at': iso(req.updated_at),
+    }
+
+
+def legacy_donation(donation):
+    return {
+        'id': donation.id, 'user_id': donation.userId, 'blood_group': donation.bloodGroup,
+        'date': iso(donation.date), 'time': iso(donation.time), 'status': donation.status, 'ref': donation.ref,
+        'created_at': iso(donation.created_at), 'updated_at': iso(donation.updated_at),
+    }
+
+
+def make_user(i):
+    user = User(name=f'User {i}', email=f'user{i}@bench.test', blood_type='O+', location='Lagos', gender='F',
+                latitude=6.5, longitude=3.4)
+    user.id, user.donation_count, user.request_count = i, 3, 1
+    user.created_at = user.updated_at = NOW
+    return user
+
+
+def make_donor(i):
+    donor = Donor(user_id=i, medical_history='Healthy', last_donation=NOW)
+    donor.id, donor.user = i, make_user(i)
+    donor.created_at = donor.updated_at = NOW
+    return donor
+
+
+def make_request(i):
+    req = BloodRequest(requester_id=i, blood_type='O+', quantity=1, location='Lagos', name=f'Patient {i}', phone='0800')
+    req.id = i
+    req.created_at = req.updated_at = NOW
+    return req
+
+
+def make_donation(i):
+    donation = BloodDonation(userId=i, bloodGroup='O+', date=NOW.date(), time=NOW.time(), status='Completed')
+    donation.id = i
+    donation.created_at = donation.updated_at = NOW
+    return donation
+
+
+MODELS = [
+    ('User', make_user, legacy_user),
+    ('Donor', make_donor, legacy_donor),
+    ('BloodRequest', make_request, legacy_request),
+    ('BloodDonation', make_donation, legacy_donation),
+]
+
+
+def best_of(runs, function):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    apps = {name: create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'JSON_PROVIDER': name}) for name in ('default', 'orjson')}
+    print(f'{"model":<14} {"isoformat":>10} {"default":>10} {"orjson":>10}   (ms per {args.rows} rows)')
+    for name, make, legacy in MODELS:
+        objects = [make(i) for i in range(args.rows)]
+        results = []
+        for label, app, to_dict in (('isoformat', apps['default'], legacy),
+                                    ('default', apps['default'], type(objects[0]).to_dict),
+                                    ('orjson', apps['orjson'], type(objects[0]).to_dict)):
+            with app.app_context():
+                results.append(best_of(args.runs, lambda: app.json.response([to_dict(obj) for obj in objects]).get_data()))
+        print(f'{name:<14} {results[0]:>10.1f} {results[1]:>10.1f} {results[2]:>10.1f}')
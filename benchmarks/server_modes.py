@@ -0,0 +1,138 @@
+"""Load-test the WSGI (gthread) and ASGI (uvicorn) gunicorn workers side by side.
+
+Seeds a temporary SQLite database, starts each server with the same number
+of worker processes, and drives GET /blood-requests/ and GET /donors/ from
+concurrent client threads. Reports requests/sec and p50/p99 latency.
+
+Usage::
+
+    python benchmarks/server_modes.py --workers 1 --clients 16 --seconds 15
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from main import create_app
+from database import db
+from donor_list import seed
+from models.BloodRequest.model import BloodRequest
+
+PATHS = ['/blood-requests/?limit=50', '/donors/?limit=50']
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def prepare(path, donors):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}'})
+    with app.app_context():
+        db.create_all()
+        seed(donors)
+        db.session.add_all(
+            BloodRequest(requester_id=i % donors + 1, blood_type='O+', quantity=1, location='City', name=f'Patient {i}', phone=None)
+            for i in range(1000)
+        )
+        db.session.commit()
+
+
+def request(port, method, path, body=None, headers=None):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    conn.request(method, path, body=json.dumps(body) if body else None,
+                 headers={'Content-Type': 'application/json', **(headers or {})})
+    response = conn.getresponse()
+    data = response.read()
+    conn.close()
+    return response.status, data
+
+
+def wait_until_up(port, process):
+    for _ in range(200):
+        if process.poll() is not None:
+            raise RuntimeError('server exited during startup')
+        try:
+            request(port, 'GET', '/')
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError('server did not start')
+
+
+def drive(port, token, clients, seconds):
+    latencies = []
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+    headers = {'Authorization': f'Bearer {token}'}
+
+    def client(n):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        local = []
+        i = n
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            conn.request('GET', PATHS[i % len(PATHS)], headers=headers)
+            conn.getresponse().read()
+            local.append(time.perf_counter() - start)
+            i += 1
+        conn.close()
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    latencies.sort()
+    return len(latencies) / seconds, latencies[len(latencies) // 2] * 1000, latencies[int(len(latencies) * 0.99)] * 1000
+
+
+def run_mode(name, command, env, clients, seconds):
+    port = free_port()
+    command = [part.format(port=port) for part in command]
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_up(port, process)
+        request(port, 'POST', '/users/', {'name': 'Bench', 'email': 'bench@bench.test', 'password': 'bench', 'blood_type': 'O+'})
+        status, data = request(port, 'POST', '/auth/login', {'email': 'bench@bench.test', 'password': 'bench'})
+        token = json.loads(data)['access_token']
+        drive(port, token, clients, 2)  # warm-up
+        rps, p50, p99 = drive(port, token, clients, seconds)
+        print(f'{name:<24}{rps:>10.1f}{p50:>10.1f}{p99:>10.1f}')
+    finally:
+        process.terminate()
+        process.wait()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--seconds', type=int, default=15)
+    parser.add_argument('--donors', type=int, default=10000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = f'{tmp}/bench.db'
+        prepare(db_path, args.donors)
+        env = {**os.environ, 'DATABASE_URL': f'sqlite:///{db_path}', 'JWT_SECRET_KEY': 'benchmark-secret-key-of-32-bytes!'}
+        modes = [
+            ('gunicorn gthread', ['gunicorn', '-k', 'gthread', '-w', str(args.workers), '-b', '127.0.0.1:{port}', 'wsgi:app']),
+            ('gunicorn asgi', ['gunicorn', '-w', str(args.workers), '-b', '127.0.0.1:{port}', 'asgi:app']),
+        ]
+        print(f'{args.workers} worker(s), {args.clients} clients, {args.seconds}s per mode')
+        print(f'{"mode":<24}{"req/s":>10}{"p50 ms":>10}{"p99 ms":>10}')
+        for name, command in modes:
+            run_mode(name, command, env, args.clients, args.seconds)
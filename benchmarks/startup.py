@@ -0,0 +1,131 @@
+"""Benchmark worker cold start.
+
+Each run starts a fresh interpreter with ``-X importtime`` that imports
+``wsgi`` the way gunicorn does, then serves its first requests through the
+test client. Reports, as the median over runs:
+
+* ``import`` -- importing ``wsgi`` (modules plus ``create_app``)
+* ``first /`` and ``first /users/`` -- time to the first static and first
+  database-backed response after that
+* ``process`` -- interpreter launch to the first DB-backed response
+* ``rss`` -- peak resident memory of the worker
+
+The slowest packages by self import time come from the ``-X importtime`` log.
+Pass ``--save`` to record the results and ``--baseline`` to compare against
+a recorded run.
+
+Usage::
+
+    python benchmarks/startup.py --runs 5 --baseline benchmarks/baselines/startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+CHILD = '''
+import json, resource, time
+start = time.perf_counter()
+from wsgi import app
+imported = time.perf_counter()
+from flask_jwt_extended import create_access_token
+from database import db
+with app.app_context():
+    db.create_all()
+    token = create_access_token(identity='1')
+client = app.test_client()
+ready = time.perf_counter()
+client.get('/')
+first_static = time.perf_counter()
+client.get('/users/', headers={'Authorization': f'Bearer {token}'})
+first_db = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - start) * 1000,
+    'first_static_ms': (first_static - ready) * 1000,
+    'first_db_ms': (first_db - first_static) * 1000,
+    'rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+}))
+'''
+
+METRICS = [
+    ('import_ms', 'import', 'ms'),
+    ('first_static_ms', 'first /', 'ms'),
+    ('first_db_ms', 'first /users/', 'ms'),
+    ('process_ms', 'process', 'ms'),
+    ('rss_kb', 'rss', 'KB'),
+]
+
+
+def run_once(env):
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {**env, 'DATABASE_URL': f'sqlite:///{tmp}/startup.db'}
+        start = time.perf_counter()
+        proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', CHILD], cwd=ROOT, env=env,
+                              capture_output=True, text=True, check=True)
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        result['process_ms'] = (time.perf_counter() - start) * 1000
+        return result, proc.stderr
+
+
+def self_time_by_package(importtime_log):
+    totals = Counter()
+    for line in importtime_log.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, module = line[len('import time:'):].split('|')
+        totals[module.strip().split('.')[0]] += int(self_us)
+    return totals
+
+
+def measure(env, runs):
+    results, log = [], ''
+    for _ in range(runs):
+        result, log = run_once(env)
+        results.append(result)
+    summary = {key: round(statistics.median(r[key] for r in results), 1) for key, _, _ in METRICS}
+    return summary, self_time_by_package(log)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=8)
+    parser.add_argument('--save', help='write the results to this JSON file')
+    parser.add_argument('--baseline', help='compare against results saved with --save')
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    scenarios = {
+        'default': {},
+        'swagger-off': {'SWAGGER_ENABLED': 'false'},
+    }
+    saved = {}
+    for name, overrides in scenarios.items():
+        summary, packages = measure({**os.environ, **overrides}, args.runs)
+        saved[name] = summary
+        print(f'\n{name}')
+        for key, label, unit in METRICS:
+            line = f'  {label:<14} {summary[key]:>10,.1f}{unit}'
+            if key in baseline.get(name, {}):
+                before = baseline[name][key]
+                line += f'   baseline {before:>10,.1f}{unit} ({(summary[key] - before) / before:+.0%})'
+            print(line)
+        print('  slowest packages (self import time):')
+        for package, us in packages.most_common(args.top):
+            print(f'    {package:<22} {us / 1000:>7.1f}ms')
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(saved, f, indent=2, sort_keys=True)
+            f.write('\n')
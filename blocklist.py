@@ -0,0 +1,84 @@
+import datetime
+import threading
+import time
+from sqlalchemy import delete, select
+from database import db, read_replica
+from models.TokenBlocklist.model import TokenBlocklist
+
+
+class RevokedTokens:
+    """Per-worker set of revoked token JTIs mirrored from the ``token_blocklist`` table.
+
+    ``is_revoked`` is a dict lookup. At most every ``refresh_interval`` seconds
+    one caller reloads the unexpired rows through the ``expires_at`` index,
+    while the others keep checking the current set, so a token revoked by
+    another worker is rejected here within that interval. Only tokens that
+    have not expired yet are kept, which bounds the set to the revocations of
+    one token lifetime. A refresh interval of 0 checks the table on every call.
+
+    Tokens revoked in this worker are in the set at once. A refresh keeps the
+    ones revoked after its SELECT started, which its rows may not include.
+    """
+
+    def __init__(self, refresh_interval):
+        self.refresh_interval = refresh_interval
+        self._expires = {}
+        # None until the first refresh has loaded the table
+        self._next_refresh = None
+        # monotonic() when the SELECT behind _expires started
+        self._snapshot = None
+        # jti -> (expires_at, monotonic() at revocation) for tokens revoked in this worker
+        self._revoked_here = {}
+        self._lock = threading.Lock()
+
+    def revoke(self, jti, expires_at):
+        entry = TokenBlocklist(jti=jti, expires_at=expires_at)
+        db.session.add(entry)
+        db.session.commit()
+        with self._lock:
+            self._expires[jti] = expires_at
+            self._revoked_here[jti] = (expires_at, time.monotonic())
+
+    def is_revoked(self, jti):
+        with self._lock:
+            now = time.monotonic()
+            due = self._next_refresh is None or now >= self._next_refresh
+            if due and self._next_refresh is not None:
+                # This caller refreshes; the others use the current set meanwhile
+                self._next_refresh = now + self.refresh_interval
+        if due:
+            self.refresh()
+        return jti in self._expires
+
+    def refresh(self):
+        now = datetime.datetime.utcnow()
+        started = time.monotonic()
+        # From the primary, so replication lag never delays a revocation
+        with read_replica(False):
+            rows = db.session.execute(
+                select(TokenBlocklist.jti, TokenBlocklist.expires_at).where(TokenBlocklist.expires_at > now)
+            ).all()
+        with self._lock:
+            if self._snapshot is not None and started < self._snapshot:
+                # A refresh that started later has already landed
+                return
+            # Revoked here before the SELECT started means committed before it
+            self._revoked_here = {jti: entry for jti, entry in self._revoked_here.items() if entry[1] >= started}
+            expires = {row.jti: row.expires_at for row in rows}
+            expires.update((jti, expires_at) for jti, (expires_at, _) in self._revoked_here.items())
+            self._expires = expires
+            self._snapshot = started
+            self._next_refresh = time.monotonic() + self.refresh_interval
+
+
+def prune_expired(batch_size=1000):
+    """Delete expired blocklist rows ``batch_size`` at a time; returns the number removed."""
+    removed = 0
+    while True:
+        now = datetime.datetime.utcnow()
+        ids = select(TokenBlocklist.id).where(TokenBlocklist.expires_at <= now).limit(batch_size)
+        result = db.session.execute(delete(TokenBlocklist).where(TokenBlocklist.id.in_(ids)))
+        db.session.commit()
+        removed += result.rowcount
+        if result.rowcount < batch_size:
+            return removed
@@ -0,0 +1,176 @@
+"""Streaming NDJSON/CSV import.
+
+Records are parsed one line at a time from the request body, validated and
+inserted ``BULK_IMPORT_CHUNK_SIZE`` rows at a time with a single executemany
+``INSERT`` and one commit per chunk. Rows that fail validation or violate a
+constraint are reported by line number without aborting the import.
+"""
+import csv
+import datetime
+import json
+from itertools import islice
+from flask import current_app, request, jsonify
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from database import db
+from models.TableVersion.model import bump_versions
+
+NDJSON_TYPES = ('application/x-ndjson', 'application/jsonl', 'application/json-seq')
+CSV_TYPES = ('text/csv',)
+
+
+class UnsupportedFormat(ValueError):
+    pass
+
+
+def iter_records():
+    """Yield ``(line, record)`` pairs from the request body, or ``(line, error)`` for unparsable lines."""
+    mimetype = request.mimetype
+    if mimetype in NDJSON_TYPES:
+        return _iter_ndjson(request.stream)
+    if mimetype in CSV_TYPES:
+        return _iter_csv(request.stream)
+    raise UnsupportedFormat(f"Unsupported content type {mimetype or '(none)'}; use application/x-ndjson or text/csv")
+
+
+def _iter_ndjson(stream):
+    for line, raw in enumerate(stream, 1):
+        if not raw.strip():
+            continue
+        try:
+            record = json.loads(raw)
+        except ValueError as e:
+            yield line, ValueError(f'Invalid JSON: {e}')
+            continue
+        yield line, record if isinstance(record, dict) else ValueError('Each line must be a JSON object')
+
+
+def _iter_csv(stream):
+    # Lines are decoded one at a time so a bad byte fails only the record it is
+    # in; they are counted here because reader.line_num skips lines it rejects
+    undecodable = set()
+    read = [0]
+
+    def lines():
+        for raw in stream:
+            read[0] += 1
+            try:
+                yield raw.decode('utf-8')
+            except UnicodeDecodeError:
+                undecodable.add(read[0])
+                yield raw.decode('utf-8', errors='replace')
+
+    reader = csv.DictReader(lines())
+    try:
+        reader.fieldnames
+    except csv.Error as e:
+        yield 1, ValueError(f'Invalid CSV header: {e}')
+        return
+    if undecodable:
+        yield 1, ValueError('CSV header is not valid UTF-8')
+        return
+
+    previous = read[0]
+    while True:
+        try:
+            record = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            yield read[0], ValueError(f'Invalid CSV: {e}')
+        else:
+            if undecodable.intersection(range(previous + 1, read[0] + 1)):
+                yield read[0], ValueError('Invalid UTF-8')
+            else:
+                # Empty cells mean "not given", like a missing JSON key
+                yield read[0], {key: value for key, value in record.items() if value not in ('', None)}
+        previous = read[0]
+
+
+def parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    if str(value).strip().lower() in ('1', 'true', 'yes', 'y'):
+        return True
+    if str(value).strip().lower() in ('0', 'false', 'no', 'n'):
+        return False
+    raise ValueError(f'Invalid boolean {value!r}')
+
+
+def parse_datetime(value):
+    try:
+        return datetime.datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'Invalid date {value!r}; use ISO 8601')
+
+
+def require(record, *keys):
+    missing = [key for key in keys if record.get(key) in (None, '')]
+    if missing:
+        raise ValueError(f"Missing required fields: {', '.join(missing)}")
+
+
+def import_records(model, validate, prepare=None, after_insert=None):
+    """Import the request body into ``model`` and return the JSON report response.
+
+    ``validate(record)`` returns the row to insert or raises ``ValueError``.
+    ``prepare(rows)`` may rewrite a validated chunk in place (e.g. hash
+    passwords in parallel) and ``after_insert(rows)`` runs in the chunk's
+    transaction with the rows that made it in.
+    """
+    try:
+        records = iter_records()
+    except UnsupportedFormat as e:
+        return jsonify({'message': str(e)}), 415
+
+    chunk_size = current_app.config['BULK_IMPORT_CHUNK_SIZE']
+    inserted, errors = 0, []
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            break
+
+        lines, rows = [], []
+        for line, record in chunk:
+            try:
+                if isinstance(record, Exception):
+                    raise record
+                rows.append(validate(record))
+                lines.append(line)
+            except (ValueError, TypeError) as e:
+                errors.append({'line': line, 'error': str(e)})
+
+        if rows:
+            if prepare:
+                prepare(rows)
+            inserted += _insert_chunk(model, lines, rows, errors, after_insert)
+
+    return jsonify({'inserted': inserted, 'failed': len(errors), 'errors': errors}), 200
+
+
+def _insert_chunk(model, lines, rows, errors, after_insert):
+    try:
+        db.session.execute(insert(model), rows)
+        if after_insert:
+            after_insert(rows)
+        bump_versions(db.session.connection(), model.__table__.name)
+        db.session.commit()
+        return len(rows)
+    except IntegrityError:
+        db.session.rollback()
+
+    # Something in the chunk violates a constraint: retry row by row to find it
+    good = []
+    for line, row in zip(lines, rows):
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(model), [row])
+            good.append(row)
+        except IntegrityError as e:
+            errors.append({'line': line, 'error': str(e.orig)})
+    if good:
+        if after_insert:
+            after_insert(good)
+        bump_versions(db.session.connection(), model.__table__.name)
+    db.session.commit()
+    return len(good)
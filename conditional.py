@@ -0,0 +1,74 @@
+"""Conditional GET support.
+
+Detail responses get a strong ETag derived from the row they render. List
+responses get one derived from the request URL and the ``table_version``
+counters of every table they read. Each flush bumps those counters in the
+same transaction as the write; models no list reads set ``__versioned__ =
+False`` to skip the bump. A matching ``If-None-Match`` is answered with
+``304 Not Modified`` before the list query runs or anything is serialised.
+"""
+import functools
+import hashlib
+from flask import make_response, request
+from sqlalchemy.orm import Session
+from database import db
+from models.TableVersion.model import bump_versions, get_versions
+
+
+def _versioned(obj):
+    return getattr(obj, '__versioned__', True)
+
+
+@db.event.listens_for(Session, 'after_flush')
+def _bump_flushed_tables(session, flush_context):
+    names = {obj.__table__.name for obj in session.new if _versioned(obj)}
+    names.update(obj.__table__.name for obj in session.deleted if _versioned(obj))
+    names.update(obj.__table__.name for obj in session.dirty
+                 if _versioned(obj) and session.is_modified(obj, include_collections=False))
+    if names:
+        bump_versions(session.connection(), *names)
+
+
+def make_etag(*parts):
+    """Strong ETag from the values that change whenever a payload does."""
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+def not_modified(etag):
+    """A 304 response if the request's ``If-None-Match`` matches ``etag``, else ``None``."""
+    if request.if_none_match.contains(etag):
+        return with_etag(make_response('', 304), etag)
+    return None
+
+
+def with_etag(response, etag):
+    response = make_response(response)
+    response.set_etag(etag)
+    # The payload depends on the caller being authenticated, so only private caches may keep it
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+def versioned(*tables, vary=None):
+    """Give a list view an ETag built from the URL and the versions of ``tables``.
+
+    ``tables`` must name every table the response reads. The versions are read
+    before the view runs, so a write that lands in between makes the ETag
+    older than the payload and the next poll simply refetches. ``vary()``, if
+    given, returns anything else the payload depends on, such as the date.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            versions = get_versions(*tables)
+            etag = make_etag(request.full_path, sorted(versions.items()), vary() if vary else None)
+            response = not_modified(etag)
+            if response is not None:
+                return response
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                response = with_etag(response, etag)
+            return response
+        return wrapper
+    return decorator
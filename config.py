@@ -5,4 +5,86 @@ class Config:
     SECRET_KEY = os.getenv('SECRET_KEY')
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///database.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Optional read replica; GET requests and the JWT user lookup read from it
+    DATABASE_REPLICA_URL = os.getenv('DATABASE_REPLICA_URL')
+    # Per-worker connection pool; ignored for in-memory SQLite
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 30))
+    # Seconds before a pooled connection is replaced; -1 keeps them forever
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800))
+    DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes')
+    # Connections each server worker opens at start (capped at DB_POOL_SIZE)
+    DB_POOL_WARMUP = int(os.getenv('DB_POOL_WARMUP', DB_POOL_SIZE))
+    # Threads each ASGI worker runs views on (see asgi.py); GUNICORN_THREADS under gthread
+    ASGI_THREADS = int(os.getenv('ASGI_THREADS', 16))
+    # Applied to every SQLite connection; an empty value leaves SQLite's default
+    SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000))
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY',"secret")
+    PAGINATION_DEFAULT_LIMIT = int(os.getenv('PAGINATION_DEFAULT_LIMIT', 50))
+    PAGINATION_MAX_LIMIT = int(os.getenv('PAGINATION_MAX_LIMIT', 500))
+    GEO_DEFAULT_RADIUS_KM = float(os.getenv('GEO_DEFAULT_RADIUS_KM', 50))
+    GEO_MAX_RADIUS_KM = float(os.getenv('GEO_MAX_RADIUS_KM', 500))
+    # Per-worker cache of the JWT user lookup; a TTL of 0 disables it
+    USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', 10000))
+    USER_CACHE_TTL = float(os.getenv('USER_CACHE_TTL', 60))
+    # How often each worker reloads revoked token ids from token_blocklist
+    BLOCKLIST_REFRESH_SECONDS = float(os.getenv('BLOCKLIST_REFRESH_SECONDS', 5))
+    BLOCKLIST_PRUNE_BATCH_SIZE = int(os.getenv('BLOCKLIST_PRUNE_BATCH_SIZE', 1000))
+    # werkzeug method string, e.g. "scrypt:32768:8:1" or "pbkdf2:sha256:600000"
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    PASSWORD_SALT_LENGTH = int(os.getenv('PASSWORD_SALT_LENGTH', 16))
+    # 0 hashes on the request thread; N > 0 uses a per-worker pool of N processes.
+    # The request thread waits either way, so this only frees capacity for other
+    # requests on ASGI (the default, see gunicorn.conf.py) or threaded workers
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 0))
+    # Hashes allowed in flight per worker process before requests get a 503; keep
+    # below ASGI_THREADS (GUNICORN_THREADS under gthread) so logins cannot take
+    # every thread. A sync worker serves one request at a time and never reaches it
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', 8))
+    BULK_IMPORT_CHUNK_SIZE = int(os.getenv('BULK_IMPORT_CHUNK_SIZE', 1000))
+    # Rows fetched per server-side cursor round trip and written per response chunk
+    EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', 1000))
+    # 'orjson' (falls back to 'default' when not installed) or 'default' for the standard library
+    JSON_PROVIDER = os.getenv('JSON_PROVIDER', 'orjson')
+    # Off in production to skip registering flasgger; a spec written by
+    # `flask openapi-spec` at OPENAPI_SPEC_PATH is still served at /apispec_1.json
+    SWAGGER_ENABLED = os.getenv('SWAGGER_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    OPENAPI_SPEC_PATH = os.getenv('OPENAPI_SPEC_PATH')
+    # Per-request latency/SQL/serialization metrics served at /metrics
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    # Statements slower than this are logged with the endpoint that ran them
+    SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 200))
+    # Background job threads per server process (gunicorn and ASGI workers);
+    # 0 leaves jobs to `flask run-jobs`
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', 2))
+    # How often idle job threads look for work queued by other processes
+    JOB_POLL_SECONDS = float(os.getenv('JOB_POLL_SECONDS', 5))
+    JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', 5))
+    # Delay before the first retry, doubled for each one after
+    JOB_RETRY_DELAY_SECONDS = float(os.getenv('JOB_RETRY_DELAY_SECONDS', 30))
+    # A job running this long is assumed lost with its worker and run again
+    JOB_LOCK_TIMEOUT_SECONDS = float(os.getenv('JOB_LOCK_TIMEOUT_SECONDS', 600))
+    # 'log', 'memory' or 'package.module:Class' (a notifier.Notifier subclass)
+    NOTIFIER = os.getenv('NOTIFIER', 'log')
+    # Donor notifications sent at once per process
+    NOTIFY_CONCURRENCY = int(os.getenv('NOTIFY_CONCURRENCY', 8))
+    NOTIFY_RADIUS_KM = float(os.getenv('NOTIFY_RADIUS_KM', 25))
+    # Donors matched, and notified, per job
+    NOTIFY_BATCH_SIZE = int(os.getenv('NOTIFY_BATCH_SIZE', 500))
+    # Recent blood request events kept per process for Last-Event-ID resumes
+    EVENT_BUFFER_SIZE = int(os.getenv('EVENT_BUFFER_SIZE', 1000))
+    # How often streams look for requests written by other processes
+    EVENT_POLL_SECONDS = float(os.getenv('EVENT_POLL_SECONDS', 5))
+    # Comment sent on idle streams so proxies keep them open
+    EVENT_HEARTBEAT_SECONDS = float(os.getenv('EVENT_HEARTBEAT_SECONDS', 15))
+    # Streams one gthread worker process holds open at once before answering 503;
+    # keep it below GUNICORN_THREADS so other requests still get a thread. Streams
+    # served by asgi.py, the default, wait on the event loop and are not counted.
+    EVENT_MAX_THREAD_SUBSCRIBERS = int(os.getenv('EVENT_MAX_THREAD_SUBSCRIBERS', 8))
+    # How often the reconcile_stats job recomputes the /stats summary table; 0 turns it off
+    STATS_RECONCILE_SECONDS = float(os.getenv('STATS_RECONCILE_SECONDS', 3600))
+    # Days after a donation before a donor is eligible again (whole blood: 56)
+    DONATION_DEFERRAL_DAYS = int(os.getenv('DONATION_DEFERRAL_DAYS', 56))
@@ -1,10 +1,149 @@
 import os
+from contextlib import contextmanager
+from contextvars import ContextVar
 from dotenv import load_dotenv
+from flask import g, has_request_context, request
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
 
 load_dotenv()
 
-db = SQLAlchemy()
+# Bind key of the optional read replica (DATABASE_REPLICA_URL)
+REPLICA_BIND = 'replica'
+READ_METHODS = frozenset({'GET', 'HEAD'})
+
+_replica_reads = ContextVar('replica_reads', default=None)
+
+class RoutingSession(Session):
+    """Session that sends reads to the replica bind when one is configured.
+
+    Reads go to the replica while handling a GET/HEAD request, or inside
+    ``read_replica()``; ``read_replica(False)`` pins them to the primary.
+    Flushes and DML statements always go to the primary, and once a request
+    has written, the rest of its reads follow to the primary so it sees its
+    own writes. Replication lag still applies between
+    requests: a client reading straight after its own POST may briefly see
+    the old data.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and REPLICA_BIND in self._db.engines:
+            if self._flushing or getattr(clause, 'is_dml', False):
+                if has_request_context():
+                    g._db_wrote = True
+            elif _reads_from_replica():
+                return self._db.engines[REPLICA_BIND]
+        return super().get_bind(mapper, clause, bind, **kwargs)
+
+def _reads_from_replica():
+    forced = _replica_reads.get()
+    if not has_request_context():
+        return bool(forced)
+    if g.get('_db_wrote'):
+        return False
+    return forced if forced is not None else request.method in READ_METHODS
+
+@contextmanager
+def read_replica(enabled=True):
+    """Send reads in the block to the replica (or the primary when not
+    ``enabled``), whatever the request method."""
+    token = _replica_reads.set(enabled)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+def has_replica():
+    return REPLICA_BIND in db.engines
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 def get_database_url():
     return os.getenv("DATABASE_URL", "sqlite:///database.db")
+
+def _is_memory_sqlite(url):
+    url = make_url(url)
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+def engine_options(config):
+    """Pool settings for the main engine from the ``DB_POOL_*`` config keys.
+
+    In-memory SQLite gets none: Flask-SQLAlchemy gives it a single shared
+    connection, which pool sizing would break.
+    """
+    if _is_memory_sqlite(config['SQLALCHEMY_DATABASE_URI']):
+        return {}
+    return {
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': config['DB_POOL_PRE_PING'],
+    }
+
+def init_db(app):
+    """Bind ``db`` to ``app`` with engine options and per-backend connect hooks.
+
+    Options set explicitly in ``SQLALCHEMY_ENGINE_OPTIONS`` win over the
+    ``DB_POOL_*`` defaults. ``DATABASE_REPLICA_URL`` adds the read replica
+    bind used by ``RoutingSession``.
+    """
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        **engine_options(app.config),
+        **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}),
+    }
+    if app.config['DATABASE_REPLICA_URL']:
+        app.config['SQLALCHEMY_BINDS'] = {
+            REPLICA_BIND: app.config['DATABASE_REPLICA_URL'],
+            **(app.config.get('SQLALCHEMY_BINDS') or {}),
+        }
+    db.init_app(app)
+    # init_app makes a metadata for every bind key. The replica mirrors the
+    # primary's tables rather than owning any, and an empty 'replica' entry
+    # would make create_all() fail for apps without one
+    db.metadatas.pop(REPLICA_BIND, None)
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == 'sqlite':
+                init_sqlite(engine, app.config)
+
+def init_sqlite(engine, config):
+    """Apply the ``SQLITE_*`` pragmas to every new connection of ``engine``.
+
+    With the default rollback journal a writer cannot commit while any
+    reader is mid-statement (a streamed export holds its read lock for the
+    whole download), and pysqlite gives up after 5 seconds with "database is
+    locked". In WAL mode readers and the single writer no longer block each
+    other, ``synchronous=NORMAL`` is safe (a crash can lose the last commits
+    but not corrupt the file), and ``busy_timeout`` sets how long writers
+    queue behind each other.
+    """
+    pragmas = [f"busy_timeout = {int(config['SQLITE_BUSY_TIMEOUT_MS'])}"]
+    if config['SQLITE_SYNCHRONOUS']:
+        pragmas.append(f"synchronous = {config['SQLITE_SYNCHRONOUS']}")
+    if config['SQLITE_JOURNAL_MODE'] and not _is_memory_sqlite(engine.url):
+        pragmas.append(f"journal_mode = {config['SQLITE_JOURNAL_MODE']}")
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, _connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(f'PRAGMA {pragma}')
+        cursor.close()
+
+def warm_pool(app, count=None):
+    """Open up to ``count`` pooled connections (default ``DB_POOL_WARMUP``) and return them to the pool.
+
+    Run once per worker at start so the first requests do not pay for
+    connecting and running the connect hooks.
+    """
+    if count is None:
+        count = app.config['DB_POOL_WARMUP']
+    with app.app_context():
+        pool_size = getattr(db.engine.pool, 'size', lambda: 0)()
+        connections = [db.engine.connect() for _ in range(min(count, pool_size))]
+        for connection in connections:
+            connection.close()
+    return len(connections)
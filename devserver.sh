@@ -1,3 +1,7 @@
 #!/bin/bash
 source .venv/bin/activate
-gunicorn --bind 0.0.0.0:$PORT wsgi:app
+if [ "$SERVER_MODE" = "wsgi" ]; then
+    GUNICORN_WORKER_CLASS=gthread gunicorn --bind 0.0.0.0:$PORT wsgi:app
+else
+    gunicorn --bind 0.0.0.0:$PORT asgi:app
+fi
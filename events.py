@@ -0,0 +1,389 @@
+"""In-process pub/sub of blood request changes, served as Server-Sent Events.
+
+Inserts and updates of ``BloodRequest`` are rendered once when they flush and
+published to the process's :class:`EventBus` after the transaction commits.
+The bus keeps the last ``EVENT_BUFFER_SIZE`` events in a ring buffer and
+wakes subscribers through one shared ``Condition`` (threads) and one
+``asyncio.Event`` per event loop (ASGI), so an idle subscriber costs nothing
+but its connection.
+
+Writes committed by other processes, and Core writes such as bulk imports,
+are picked up by polling ``blood_request`` by ``updated_at`` at most every
+``EVENT_POLL_SECONDS``, and only while someone is subscribed. Event ids are
+the row's ``(updated_at, id)`` cursor, so they are the same in every
+process: a client reconnecting with ``Last-Event-ID`` resumes from the
+buffer, or from the table when the buffer has moved on, and is sent a
+``reset`` event if it missed more than a buffer's worth.
+
+In production (``asgi.py`` under the ASGI workers ``gunicorn.conf.py`` sets)
+the stream is served natively and each subscriber is a coroutine. Served
+through WSGI, each subscriber holds a thread of a ``gthread`` worker, at most
+``EVENT_MAX_THREAD_SUBSCRIBERS`` per process so the rest of the API keeps
+some threads. A server that runs one request per process (gunicorn's sync
+worker) would be taken down by a few idle clients, so there the stream
+answers 503.
+"""
+import asyncio
+import datetime
+import threading
+import time
+from collections import deque, namedtuple
+from flask import current_app, request
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import Session
+from werkzeug.test import EnvironBuilder
+from database import db
+import geo
+from models.BloodRequest.model import BloodRequest
+from pagination import InvalidPageRequest, decode_cursor, encode_cursor
+
+# Rows committed by other processes may carry an updated_at a little older
+# than rows already seen; polling looks back this far for them
+POLL_LOOKBACK = datetime.timedelta(seconds=30)
+# created_at and updated_at get separate utcnow() defaults, so a row read back
+# from the table counts as new while they are this close
+CREATED_WINDOW = datetime.timedelta(seconds=1)
+
+Event = namedtuple('Event', 'id type blood_type location latitude longitude frame')
+
+# Sent instead of a replay the client must rebuild its state from GET /blood-requests/
+RESET = Event(None, 'reset', None, None, None, None, 'event: reset\ndata: {}\n\n')
+KEEPALIVE_FRAME = ': keepalive\n\n'
+# Set in the environ of stream requests dispatched by asgi_stream
+ASGI_ENVIRON_KEY = 'blood_request_events.asgi'
+
+
+class StreamUnavailable(Exception):
+    """This worker cannot hold another stream open; the client should retry later."""
+
+
+def blood_request_event(req, event_type=None):
+    """The event for ``req`` as it is now, with its SSE frame rendered once for every subscriber."""
+    event_id = encode_cursor(req.updated_at, req.id)
+    if event_type is None:
+        event_type = 'created' if req.updated_at - req.created_at < CREATED_WINDOW else 'updated'
+    frame = f'id: {event_id}\nevent: {event_type}\ndata: {current_app.json.dumps(req.to_dict())}\n\n'
+    return Event(event_id, event_type, req.blood_type, req.location, req.latitude, req.longitude, frame)
+
+
+def _queue_event(target, event_type):
+    Session.object_session(target).info.setdefault('blood_request_events', []).append(
+        blood_request_event(target, event_type))
+
+@db.event.listens_for(BloodRequest, 'after_insert')
+def _request_created(mapper, connection, target):
+    _queue_event(target, 'created')
+
+@db.event.listens_for(BloodRequest, 'after_update')
+def _request_updated(mapper, connection, target):
+    _queue_event(target, 'updated')
+
+@db.event.listens_for(Session, 'after_commit')
+def _publish_events(session):
+    events = session.info.pop('blood_request_events', None)
+    if events:
+        current_app.extensions['blood_request_events'].publish(events)
+
+@db.event.listens_for(Session, 'after_rollback')
+def _discard_events(session):
+    session.info.pop('blood_request_events', None)
+
+
+class EventBus:
+    def __init__(self, app, buffer_size, poll_interval, max_thread_subscribers):
+        self.app = app
+        self.buffer_size = buffer_size
+        self.poll_interval = poll_interval
+        # One per stream holding a server thread; see subscribe()
+        self.thread_slots = threading.BoundedSemaphore(max_thread_subscribers)
+        # (sequence number, event), oldest first
+        self._events = deque(maxlen=buffer_size)
+        self._ids = {}
+        self._seq = 0
+        self._condition = threading.Condition()
+        self._wakers = {}
+        self._poll_lock = threading.Lock()
+        self._next_poll = 0
+        self._high_water = None
+
+    @property
+    def seq(self):
+        return self._seq
+
+    def publish(self, events):
+        with self._condition:
+            published = False
+            for event in events:
+                # The same write arrives from the commit hook and from polling
+                if event.id in self._ids:
+                    continue
+                if len(self._events) == self.buffer_size:
+                    del self._ids[self._events[0][1].id]
+                self._seq += 1
+                self._events.append((self._seq, event))
+                self._ids[event.id] = self._seq
+                published = True
+            if published:
+                self._condition.notify_all()
+            wakers = list(self._wakers.values()) if published else ()
+        for waker in wakers:
+            waker.wake()
+
+    def after(self, seq):
+        """``(seq, event)`` for the events published after ``seq``, oldest first."""
+        newer = []
+        with self._condition:
+            for item in reversed(self._events):
+                if item[0] <= seq:
+                    break
+                newer.append(item)
+        newer.reverse()
+        return newer
+
+    def position(self, event_id):
+        """Sequence number of a buffered event, or ``None`` once it has left the buffer."""
+        with self._condition:
+            return self._ids.get(event_id)
+
+    def wait(self, seq, timeout):
+        """Block until an event newer than ``seq`` is published; False on timeout."""
+        with self._condition:
+            return self._condition.wait_for(lambda: self._seq > seq, timeout)
+
+    def async_waker(self):
+        """The :class:`AsyncWaker` for the running event loop."""
+        loop = asyncio.get_running_loop()
+        with self._condition:
+            waker = self._wakers.get(loop)
+            if waker is None:
+                waker = self._wakers[loop] = AsyncWaker(loop)
+            return waker
+
+    def poll_due(self):
+        return bool(self.poll_interval) and time.monotonic() >= self._next_poll
+
+    def poll(self):
+        """Publish rows written elsewhere since the last poll; at most once per interval per process."""
+        if not self.poll_due():
+            return
+        if not self._poll_lock.acquire(blocking=False):
+            return
+        try:
+            self._next_poll = time.monotonic() + self.poll_interval
+            with self.app.app_context():
+                since = (self._high_water or datetime.datetime.utcnow()) - POLL_LOOKBACK
+                rows = db.session.scalars(
+                    select(BloodRequest).where(BloodRequest.updated_at > since)
+                    .order_by(BloodRequest.updated_at, BloodRequest.id).limit(self.buffer_size)
+                ).all()
+                events = [blood_request_event(row) for row in rows]
+            self._high_water = max([self._high_water or since + POLL_LOOKBACK, *(row.updated_at for row in rows)])
+            self.publish(events)
+        finally:
+            self._poll_lock.release()
+
+
+class AsyncWaker:
+    """Wakes every coroutine waiting on one event loop with a single thread-safe call."""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.event = asyncio.Event()
+
+    def wake(self):
+        self.loop.call_soon_threadsafe(self._fire)
+
+    def _fire(self):
+        # Waiters hold the old event; the next wait gets a fresh one
+        self.event, event = asyncio.Event(), self.event
+        event.set()
+
+
+class Subscription:
+    """One client's position in the bus, its filters and what it must catch up on first."""
+
+    def __init__(self, bus, matches, seq, backlog, heartbeat, holds_thread=False):
+        self.bus = bus
+        self.matches = matches
+        self.seq = seq
+        self.backlog = backlog
+        self.heartbeat = heartbeat
+        self.holds_thread = holds_thread
+        self._replayed = {event.id for event in backlog}
+
+    def close(self):
+        """Give back the thread slot taken by :func:`subscribe`; called when the response closes."""
+        if self.holds_thread:
+            self.holds_thread = False
+            self.bus.thread_slots.release()
+
+    def take(self):
+        """Frames for the matching events published since the last call."""
+        frames = []
+        for seq, event in self.bus.after(self.seq):
+            self.seq = seq
+            if event.id not in self._replayed and self.matches(event):
+                frames.append(event.frame)
+        return ''.join(frames)
+
+    def _first_frames(self):
+        return ''.join(event.frame for event in self.backlog) or KEEPALIVE_FRAME
+
+    def _wait_seconds(self):
+        return min(self.heartbeat, self.bus.poll_interval or self.heartbeat)
+
+    def frames(self):
+        """Blocking generator of SSE text, for WSGI servers."""
+        yield self._first_frames()
+        last_sent = time.monotonic()
+        while True:
+            frames = self.take()
+            if not frames:
+                self.bus.wait(self.seq, self._wait_seconds())
+                self.bus.poll()
+                frames = self.take()
+            if frames:
+                yield frames
+                last_sent = time.monotonic()
+            elif time.monotonic() - last_sent >= self.heartbeat:
+                yield KEEPALIVE_FRAME
+                last_sent = time.monotonic()
+
+    async def async_frames(self):
+        """The same, as an async generator for the ASGI stream."""
+        loop = asyncio.get_running_loop()
+        waker = self.bus.async_waker()
+        yield self._first_frames()
+        last_sent = time.monotonic()
+        while True:
+            # Taken before looking, so an event published in between still wakes us
+            woken = waker.event
+            frames = self.take()
+            if not frames:
+                try:
+                    await asyncio.wait_for(woken.wait(), self._wait_seconds())
+                except asyncio.TimeoutError:
+                    pass
+                if self.bus.poll_due():
+                    await loop.run_in_executor(None, self.bus.poll)
+                frames = self.take()
+            if frames:
+                yield frames
+                last_sent = time.monotonic()
+            elif time.monotonic() - last_sent >= self.heartbeat:
+                yield KEEPALIVE_FRAME
+                last_sent = time.monotonic()
+
+
+def _request_filter(args):
+    blood_types = set(args['blood_type'].split(',')) if args.get('blood_type') else None
+    location = args.get('location', '').lower() or None
+    near = geo.parse_near(args['near']) if args.get('near') else None
+    radius_km = min(float(args.get('radius_km', current_app.config['GEO_DEFAULT_RADIUS_KM'])),
+                    current_app.config['GEO_MAX_RADIUS_KM'])
+
+    def matches(event):
+        if blood_types is not None and event.blood_type not in blood_types:
+            return False
+        if location is not None and (event.location or '').lower() != location:
+            return False
+        if near is not None:
+            if event.latitude is None:
+                return False
+            return geo.haversine_km(near[0], near[1], event.latitude, event.longitude) <= radius_km
+        return True
+    return matches
+
+
+def _replay(bus, last_event_id, matches):
+    """Events after ``last_event_id`` from the table, or a reset when there are too many to replay."""
+    try:
+        updated_at, id = decode_cursor(last_event_id)
+    except InvalidPageRequest:
+        return [RESET]
+    rows = db.session.scalars(
+        select(BloodRequest)
+        .where(tuple_(BloodRequest.updated_at, BloodRequest.id) > tuple_(updated_at, id))
+        .order_by(BloodRequest.updated_at, BloodRequest.id).limit(bus.buffer_size + 1)
+    ).all()
+    if len(rows) > bus.buffer_size:
+        return [RESET]
+    return [event for event in map(blood_request_event, rows) if matches(event)]
+
+
+def subscribe():
+    """Subscribe the current request; filters come from the query string.
+
+    Raises ``ValueError`` for bad filters and :class:`StreamUnavailable` when
+    the stream would hold a thread this worker cannot spare.
+    """
+    bus = current_app.extensions['blood_request_events']
+    matches = _request_filter(request.args)
+    holds_thread = not request.environ.get(ASGI_ENVIRON_KEY)
+    if holds_thread:
+        if not request.environ.get('wsgi.multithread'):
+            raise StreamUnavailable('The event stream needs a threaded or ASGI worker')
+        if not bus.thread_slots.acquire(blocking=False):
+            raise StreamUnavailable('Too many open event streams on this worker')
+    seq, backlog = bus.seq, []
+    try:
+        last_event_id = request.headers.get('Last-Event-ID')
+        if last_event_id:
+            position = bus.position(last_event_id)
+            if position is not None:
+                seq = position
+            else:
+                backlog = _replay(bus, last_event_id, matches)
+    except BaseException:
+        if holds_thread:
+            bus.thread_slots.release()
+        raise
+    return Subscription(bus, matches, seq, backlog, current_app.config['EVENT_HEARTBEAT_SECONDS'], holds_thread)
+
+
+def init_events(app):
+    app.extensions['blood_request_events'] = EventBus(
+        app, app.config['EVENT_BUFFER_SIZE'], app.config['EVENT_POLL_SECONDS'],
+        app.config['EVENT_MAX_THREAD_SUBSCRIBERS'])
+
+
+def _dispatch(app, scope):
+    headers = [(name.decode('latin-1'), value.decode('latin-1')) for name, value in scope['headers']]
+    environ = EnvironBuilder(path=scope.get('root_path', '') + scope['path'], method=scope['method'],
+                             query_string=scope['query_string'].decode('latin-1'), headers=headers).get_environ()
+    environ[ASGI_ENVIRON_KEY] = True
+    with app.request_context(environ):
+        return app.full_dispatch_request()
+
+
+async def asgi_stream(app, scope, receive, send):
+    """Serve the stream view natively under ASGI.
+
+    The view still runs on a thread, through Flask, for authentication and
+    filters; only the waiting afterwards happens on the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    response = await loop.run_in_executor(None, _dispatch, app, scope)
+    headers = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in response.headers.items()]
+    await send({'type': 'http.response.start', 'status': response.status_code, 'headers': headers})
+    subscription = getattr(response, 'subscription', None)
+    if subscription is None:
+        await send({'type': 'http.response.body', 'body': response.get_data()})
+        response.close()
+        return
+
+    async def stream():
+        async for text in subscription.async_frames():
+            await send({'type': 'http.response.body', 'body': text.encode(), 'more_body': True})
+
+    async def disconnected():
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    tasks = [asyncio.ensure_future(stream()), asyncio.ensure_future(disconnected())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        response.close()
@@ -0,0 +1,133 @@
+"""Fixed-size lat/lon grid used to index donor coordinates.
+
+The globe is cut into ``CELL_DEGREES`` x ``CELL_DEGREES`` cells and each row
+with coordinates stores the integer key of the cell it falls in. A radius
+search then walks rings of cells outwards from the centre cell, which turns
+"nearest donors" into a handful of ``geo_cell IN (...)`` index lookups.
+"""
+import math
+
+CELL_DEGREES = 0.1
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+_ROWS = round(180 / CELL_DEGREES)
+_COLS = round(360 / CELL_DEGREES)
+# Most rings a radius search walks, and so most statements it runs; a 500 km
+# radius needs 46
+MAX_RINGS = 64
+
+
+def validate_coordinates(latitude, longitude):
+    """Return ``(latitude, longitude)`` as floats, or ``(None, None)`` when both are missing."""
+    if latitude is None and longitude is None:
+        return None, None
+    try:
+        latitude, longitude = float(latitude), float(longitude)
+    except (TypeError, ValueError):
+        raise ValueError('latitude and longitude must both be numbers')
+    if not -90 <= latitude <= 90 or not -180 <= longitude <= 180:
+        raise ValueError('latitude/longitude out of range')
+    return latitude, longitude
+
+
+def parse_near(value):
+    """Parse a ``near=lat,lon`` query value."""
+    parts = value.split(',')
+    if len(parts) != 2:
+        raise ValueError('near must be "lat,lon"')
+    return validate_coordinates(*parts)
+
+
+def _row_col(latitude, longitude):
+    row = min(int((latitude + 90) / CELL_DEGREES), _ROWS - 1)
+    col = int((longitude + 180) / CELL_DEGREES) % _COLS
+    return row, col
+
+
+def cell_key(latitude, longitude):
+    if latitude is None or longitude is None:
+        return None
+    row, col = _row_col(latitude, longitude)
+    return row * _COLS + col
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def rings(latitude, longitude, radius_km):
+    """Yield ``(cells, covered_km)`` for ring 0, 1, 2, ... around the point.
+
+    ``cells`` are the keys of the ring's cells and ``covered_km`` is a lower
+    bound on the distance from the point to anything outside the rings yielded
+    so far: once the k-th nearest candidate is within it, the search can stop.
+
+    Only cells that can hold a point within ``radius_km`` are walked. Cells
+    narrow towards the poles, so the rings grow faster in columns than in rows
+    to cover the window in as many rings as it has rows, and never more than
+    ``MAX_RINGS``: the last ring holds the rest of the window and is yielded
+    with ``covered_km`` of infinity.
+    """
+    row0, col0 = _row_col(latitude, longitude)
+    row_lo, row_hi, col_reach, widest = _window(latitude, longitude, radius_km)
+    row_reach = max(row0 - row_lo, row_hi - row0)
+
+    def box_cols(c):
+        if 2 * c + 1 >= _COLS:
+            return set(range(_COLS))
+        return {(col0 + i) % _COLS for i in range(-c, c + 1)}
+
+    prev_rows, prev_cols = range(0), set()
+    r = 0
+    while True:
+        if r >= MAX_RINGS - 1:
+            r = row_reach
+        c = col_reach if r >= row_reach else math.ceil(col_reach * r / row_reach)
+        rows = range(max(row0 - r, row_lo), min(row0 + r, row_hi) + 1)
+        cols = box_cols(c)
+        new_cols = cols - prev_cols
+        cells = [row * _COLS + col for row in rows for col in (new_cols if row in prev_rows else cols)]
+
+        if r >= row_reach:
+            yield sorted(cells), math.inf
+            return
+        west = (col0 - c) * CELL_DEGREES - 180
+        east = (col0 + c + 1) * CELL_DEGREES - 180
+        offset = math.radians(min(longitude - west, east - longitude))
+        covered = min(
+            (latitude - (rows.start * CELL_DEGREES - 90)) * KM_PER_DEGREE if rows.start > row_lo else math.inf,
+            (rows.stop * CELL_DEGREES - 90 - latitude) * KM_PER_DEGREE if rows.stop <= row_hi else math.inf,
+            2 * EARTH_RADIUS_KM * math.asin(min(1, widest * math.sin(offset / 2))) if c < col_reach else math.inf,
+        )
+        yield sorted(cells), covered
+        prev_rows, prev_cols = rows, cols
+        r += 1
+
+
+def _window(latitude, longitude, radius_km):
+    """``(row_lo, row_hi, col_reach, widest)`` of the cells within ``radius_km`` of the point.
+
+    Rows span the latitude band the radius reaches. ``widest`` is the cosine
+    of the band's highest latitude: no two points inside the band are closer
+    than ``2R asin(widest sin(dlon / 2))``, which bounds how many columns
+    either side (``col_reach``) the radius can reach; half the globe when the
+    band touches a pole.
+    """
+    band = radius_km / KM_PER_DEGREE
+    south, north = max(latitude - band, -90), min(latitude + band, 90)
+    row_lo, _ = _row_col(south, longitude)
+    row_hi, _ = _row_col(north, longitude)
+    widest = math.cos(math.radians(max(abs(south), abs(north))))
+    reach = math.sin(radius_km / EARTH_RADIUS_KM / 2) / widest if widest > 1e-9 else math.inf
+    if reach >= 1:
+        return row_lo, row_hi, _COLS // 2, widest
+    dlon = math.degrees(2 * math.asin(reach))
+    return row_lo, row_hi, min(math.ceil(dlon / CELL_DEGREES), _COLS // 2), widest
+
+
+def cells_within(latitude, longitude, radius_km):
+    """Keys of every cell that may hold a point within ``radius_km`` of the point."""
+    return [cell for ring, _ in rings(latitude, longitude, radius_km) for cell in ring]
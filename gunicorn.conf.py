@@ -0,0 +1,30 @@
+"""gunicorn settings, picked up automatically from the working directory.
+
+Bind address, worker count and the like still come from the command line
+(see devserver.sh and Procfile); this file sets the worker class and adds
+the worker hooks, which warm the connection pool and start the background
+job threads.
+"""
+import os
+from flask import Flask
+from database import warm_pool
+
+# ASGI workers for asgi:app, as the Procfile serves it: an open
+# /blood-requests/stream is a coroutine on the worker's event loop, so
+# thousands of idle subscribers cost little more than their sockets, and
+# views run on ASGI_THREADS threads. GUNICORN_WORKER_CLASS=gthread serves
+# wsgi:app from GUNICORN_THREADS threads instead; there each stream holds a
+# thread, and past EVENT_MAX_THREAD_SUBSCRIBERS it answers 503. The sync
+# worker refuses streams altogether.
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'uvicorn_worker.UvicornWorker')
+threads = int(os.getenv('GUNICORN_THREADS', 16))
+
+
+def post_worker_init(worker):
+    # Runs in each worker once it has loaded the app, before it accepts requests.
+    # asgi.py does both for the app it wraps when it is imported.
+    if not isinstance(worker.wsgi, Flask):
+        return
+    opened = warm_pool(worker.wsgi)
+    worker.log.info("Warmed %d database connection(s)", opened)
+    worker.wsgi.extensions['job_runner'].start()
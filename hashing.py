@@ -0,0 +1,115 @@
+"""Password hashing with configurable cost and a bounded worker pool.
+
+Hashing is deliberately CPU-bound. Under a login spike it can starve every
+other request, so :class:`PasswordHasher` caps how many hashes a worker
+process runs (or queues) at once and can move the work into a process pool.
+Calls over the cap fail fast with :class:`HasherBusy`.
+
+Both only help on a worker that serves requests concurrently: the ASGI
+worker ``gunicorn.conf.py`` sets, or gunicorn's ``gthread``. The request
+thread still waits for its hash, so with one request per process (the sync
+worker) a login ties up the whole worker and the cap can never be reached.
+With threads, at most ``max_pending`` of them are busy with hashes and the
+rest keep serving other endpoints; keep it below the thread count.
+"""
+import functools
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class HasherBusy(Exception):
+    """Too many password hashes in flight on this worker."""
+
+
+def _timed(fn, *args):
+    # Runs in the pool process; the start time lets the caller measure queueing
+    started = time.time()
+    return fn(*args), started, time.time()
+
+
+class PasswordHasher:
+    def __init__(self, method='scrypt', salt_length=16, workers=0, max_pending=8):
+        self.method = method
+        self.salt_length = salt_length
+        self.workers = workers
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            'calls': 0,
+            'rejected': 0,
+            'queue_seconds_total': 0.0,
+            'queue_seconds_max': 0.0,
+            'hash_seconds_total': 0.0,
+        }
+
+    @functools.cached_property
+    def method_prefix(self):
+        # The prefix werkzeug writes for this method, e.g. "scrypt:32768:8:1".
+        # Found by hashing once, on first use rather than at worker boot.
+        return generate_password_hash('', self.method, self.salt_length).split('$', 1)[0]
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method, self.salt_length)
+
+    def verify(self, pwhash, password):
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        return pwhash.split('$', 1)[0] != self.method_prefix
+
+    def hash_many(self, passwords):
+        """Hash a batch, spread over the pool when there is one.
+
+        Meant for bulk imports; it does not count against ``max_pending``.
+        """
+        if not self.workers:
+            return [generate_password_hash(password, self.method, self.salt_length) for password in passwords]
+        count = len(passwords)
+        return list(self._executor().map(
+            generate_password_hash, passwords, [self.method] * count, [self.salt_length] * count,
+            chunksize=max(1, count // (self.workers * 4))
+        ))
+
+    def _executor(self):
+        # Created lazily so each forked server worker gets its own pool
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self._pool
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._stats_lock:
+                self.stats['rejected'] += 1
+            raise HasherBusy()
+        try:
+            submitted = time.time()
+            if self.workers:
+                result, started, finished = self._executor().submit(_timed, fn, *args).result()
+            else:
+                result, started, finished = _timed(fn, *args)
+        finally:
+            self._slots.release()
+
+        queued = max(0.0, started - submitted)
+        with self._stats_lock:
+            self.stats['calls'] += 1
+            self.stats['queue_seconds_total'] += queued
+            self.stats['queue_seconds_max'] = max(self.stats['queue_seconds_max'], queued)
+            self.stats['hash_seconds_total'] += finished - started
+        return result
+
+    def shutdown(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+
+def get_hasher():
+    return current_app.extensions['password_hasher']
@@ -0,0 +1,251 @@
+"""Durable background jobs run by a small thread pool in each worker process.
+
+``enqueue`` adds a row to the ``job`` table in the caller's session, so a job
+exists exactly when the write that caused it commits, and nothing is lost to
+a restart. Each worker process runs ``JOB_WORKERS`` threads (started by the
+gunicorn and ASGI entry points) that claim due jobs with a conditional
+``UPDATE``, so several processes can share one table. A committed enqueue
+wakes the local threads at once; other processes find it within
+``JOB_POLL_SECONDS``.
+
+A handler is a function of the job's payload, registered with
+:func:`handler`. It runs in an app context, and whatever it adds to the
+session (follow-up jobs included) commits together with the job's removal.
+If it raises, its writes are rolled back and the job is retried with
+exponential backoff until ``JOB_MAX_ATTEMPTS`` is reached, after which it is
+kept as ``failed``. A job left ``running`` for ``JOB_LOCK_TIMEOUT_SECONDS``
+is assumed to have died with its worker and is claimed again.
+
+A handler registered with :func:`periodic` instead runs on a schedule: the
+runner queues it when it starts, and each successful run queues the next one.
+"""
+import datetime
+import logging
+import threading
+from collections import namedtuple
+from flask import current_app
+from sqlalchemy import and_, delete, or_, select, update
+from sqlalchemy.orm import Session
+from database import db
+from models.Job.model import Job
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {}
+# kind -> config key holding its interval in seconds
+PERIODIC = {}
+
+# What a worker needs from the row it claimed
+ClaimedJob = namedtuple('ClaimedJob', 'id kind payload attempts max_attempts')
+
+
+class RetryLater(Exception):
+    """Raised by a handler to retry the job, optionally with a new payload.
+
+    Use the payload to record progress, e.g. so a retry only resends what
+    failed.
+    """
+
+    def __init__(self, message, payload=None):
+        super().__init__(message)
+        self.payload = payload
+
+
+def handler(kind):
+    """Register the decorated function to run jobs of ``kind``."""
+    def register(fn):
+        HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+def periodic(kind, interval_setting):
+    """Register the decorated function to run as ``kind`` every ``app.config[interval_setting]`` seconds.
+
+    An interval of 0 turns it off. It is called with an empty payload.
+    """
+    def register(fn):
+        PERIODIC[kind] = interval_setting
+        return handler(kind)(fn)
+    return register
+
+
+def schedule(kind, delay=0):
+    """Queue the next run of periodic job ``kind`` unless one is already pending."""
+    queued = db.session.scalar(select(Job.id).where(Job.kind == kind, Job.status == 'pending').limit(1))
+    if queued is None:
+        enqueue(kind, {}, delay)
+
+
+def enqueue(kind, payload, delay=0):
+    """Add a job to the current session; it runs once the session commits."""
+    job = Job(kind=kind, payload=payload, status='pending', attempts=0,
+              max_attempts=current_app.config['JOB_MAX_ATTEMPTS'],
+              run_at=datetime.datetime.utcnow() + datetime.timedelta(seconds=delay))
+    db.session.add(job)
+    db.session.info['jobs_enqueued'] = True
+    return job
+
+
+@db.event.listens_for(Session, 'after_commit')
+def _wake_runner(session):
+    if session.info.pop('jobs_enqueued', None):
+        runner = current_app.extensions.get('job_runner')
+        if runner is not None:
+            runner.wake()
+
+@db.event.listens_for(Session, 'after_rollback')
+def _discard_enqueued(session):
+    session.info.pop('jobs_enqueued', None)
+
+
+class JobRunner:
+    def __init__(self, app, workers, poll_interval, retry_delay, lock_timeout):
+        self.app = app
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.retry_delay = retry_delay
+        self.lock_timeout = datetime.timedelta(seconds=lock_timeout)
+        self._threads = []
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+
+    def start(self):
+        """Start the worker threads; call in each server process, after any fork."""
+        if self._threads or not self.workers:
+            return
+        try:
+            self.schedule_periodic()
+        except Exception:
+            # The workers still run whatever is queued; the next start tries again
+            logger.exception('Could not schedule periodic jobs')
+        self._stop.clear()
+        self._threads = [threading.Thread(target=self._work, name=f'job-worker-{n}', daemon=True)
+                         for n in range(self.workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def wake(self):
+        self._wake.set()
+
+    def schedule_periodic(self):
+        """Queue each periodic job that is neither pending nor running, e.g. on first deploy."""
+        with self.app.app_context():
+            active = set(db.session.scalars(
+                select(Job.kind).where(Job.kind.in_(PERIODIC), Job.status.in_(('pending', 'running')))
+            ))
+            for kind, setting in PERIODIC.items():
+                if kind not in active and self.app.config[setting]:
+                    enqueue(kind, {})
+            db.session.commit()
+
+    def run_pending(self):
+        """Run due jobs on this thread until there are none; returns how many ran."""
+        ran = 0
+        while self.run_one():
+            ran += 1
+        return ran
+
+    def run_one(self):
+        """Claim and run the next due job; False when there was none."""
+        with self.app.app_context():
+            job = self._claim()
+            if job is None:
+                return False
+            self._execute(job)
+            return True
+
+    def _work(self):
+        while not self._stop.is_set():
+            # Cleared before looking, so a wake-up while busy is not lost
+            self._wake.clear()
+            try:
+                while not self._stop.is_set() and self.run_one():
+                    pass
+            except Exception:
+                # The database is unreachable or similar; try again next poll
+                logger.exception('Job worker failed to claim a job')
+            self._wake.wait(self.poll_interval)
+
+    def _claim(self):
+        now = datetime.datetime.utcnow()
+        claimable = or_(
+            and_(Job.status == 'pending', Job.run_at <= now),
+            and_(Job.status == 'running', Job.locked_at < now - self.lock_timeout),
+        )
+        while True:
+            job = db.session.execute(
+                select(Job.id, Job.kind, Job.payload, Job.attempts, Job.max_attempts)
+                .where(claimable).order_by(Job.run_at, Job.id).limit(1)
+            ).first()
+            if job is None:
+                db.session.rollback()
+                return None
+            # Only one claimant sees a row count of 1; the others move on to the next job
+            claimed = db.session.execute(
+                update(Job).where(Job.id == job.id, claimable)
+                .values(status='running', locked_at=now, attempts=Job.attempts + 1)
+            ).rowcount
+            db.session.commit()
+            if claimed:
+                return ClaimedJob(job.id, job.kind, job.payload, job.attempts + 1, job.max_attempts)
+
+    def _execute(self, job):
+        try:
+            if job.attempts > job.max_attempts:
+                # Claimed again after its worker died on the last attempt
+                raise RuntimeError('worker stopped during the final attempt')
+            run = HANDLERS.get(job.kind)
+            if run is None:
+                raise LookupError(f'no handler for job kind {job.kind!r}')
+            run(job.payload)
+            db.session.execute(delete(Job).where(Job.id == job.id))
+            interval = current_app.config[PERIODIC[job.kind]] if job.kind in PERIODIC else 0
+            if interval:
+                # Processes that started together may each have queued a run; they collapse here
+                schedule(job.kind, interval)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            self._failed(job, e)
+        finally:
+            db.session.remove()
+
+    def _failed(self, job, error):
+        values = {'last_error': f'{type(error).__name__}: {error}', 'locked_at': None}
+        if isinstance(error, RetryLater) and error.payload is not None:
+            values['payload'] = error.payload
+        if job.attempts >= job.max_attempts:
+            logger.error('Job %s (%s) failed after %d attempts: %s', job.id, job.kind, job.attempts, error)
+            values['status'] = 'failed'
+        else:
+            logger.warning('Job %s (%s) failed, will retry: %s', job.id, job.kind, error)
+            delay = self.retry_delay * 2 ** (job.attempts - 1)
+            values.update(status='pending', run_at=datetime.datetime.utcnow() + datetime.timedelta(seconds=delay))
+        db.session.execute(update(Job).where(Job.id == job.id).values(values))
+        db.session.commit()
+
+
+def init_jobs(app):
+    """Create the app's job runner; ``start()`` it in the processes that should run jobs."""
+    runner = app.extensions['job_runner'] = JobRunner(
+        app,
+        workers=app.config['JOB_WORKERS'],
+        poll_interval=app.config['JOB_POLL_SECONDS'],
+        retry_delay=app.config['JOB_RETRY_DELAY_SECONDS'],
+        lock_timeout=app.config['JOB_LOCK_TIMEOUT_SECONDS'],
+    )
+
+    @app.cli.command('run-jobs')
+    def run_jobs_command():
+        """Run due background jobs, then exit."""
+        print(f"Ran {runner.run_pending()} job(s)")
+
+    return runner
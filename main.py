@@ -1,13 +1,29 @@
-from flask import Flask
-from flasgger import Swagger
+import click
+from flask import Flask, jsonify
+from flask.cli import FlaskGroup
 from flask_jwt_extended import JWTManager
-from flask_migrate import Migrate
-from database import db
-from auth import auth_bp
+from database import db, init_db
+import search
+from apidocs import init_docs
+from serialization import init_json
+from metrics import init_metrics
+from auth import auth_bp, lookup_user
+from cache import TTLCache
+from blocklist import RevokedTokens, prune_expired
+from hashing import HasherBusy, PasswordHasher
+from events import init_events
+from jobs import init_jobs
+from notifier import load_notifier
 from models.User.route import user_bp
 from models.Donor.route import donor_bp
 from models.BloodRequest.route import blood_request_bp
-from models.User.model import User
+from models.BloodDonation.route import blood_donation_bp
+from models.BloodStats.route import stats_bp
+
+def _loaded_by_flask_cli():
+    """True when the app is being built for a ``flask`` command such as ``flask db upgrade``."""
+    ctx = click.get_current_context(silent=True)
+    return ctx is not None and isinstance(ctx.find_root().command, FlaskGroup)
 
 def create_app(config_overrides=None):
     app = Flask(__name__)
@@ -17,87 +33,75 @@ def create_app(config_overrides=None):
         app.config.update(config_overrides)
 
     jwt = JWTManager(app)
-    db.init_app(app)
-    migrate = Migrate(app, db)  # Initialize Migrate
+    init_json(app)
+    init_db(app)
+    if _loaded_by_flask_cli():
+        # Only `flask db` needs Flask-Migrate, and importing it pulls in Alembic
+        from flask_migrate import Migrate
+        Migrate(app, db, include_object=search.include_object)
+
+    app.extensions['password_hasher'] = PasswordHasher(
+        method=app.config['PASSWORD_HASH_METHOD'],
+        salt_length=app.config['PASSWORD_SALT_LENGTH'],
+        workers=app.config['PASSWORD_HASH_WORKERS'],
+        max_pending=app.config['PASSWORD_HASH_MAX_PENDING'],
+    )
+
+    @app.errorhandler(HasherBusy)
+    def hasher_busy(_error):
+        response = jsonify({"msg": "Too many requests in progress, retry shortly"})
+        response.headers['Retry-After'] = '1'
+        return response, 503
+
+    app.extensions['user_cache'] = TTLCache(app.config['USER_CACHE_SIZE'], app.config['USER_CACHE_TTL'])
 
     @jwt.user_lookup_loader
     def user_lookup_callback(_jwt_header, jwt_data):
         identity = jwt_data["sub"]
-        return db.session.get(User, int(identity))
-
-    swagger_config = {
-        "headers": [],
-        "specs": [
-            {
-                "endpoint": 'apispec_1',
-                "route": '/apispec_1.json',
-                "rule_filter": lambda rule: True,  # all in
-                "model_filter": lambda tag: True,  # all in
-            }
-        ],
-        "static_url_path": "/flasgger_static",
-        "swagger_ui": True,
-        "specs_route": "/apidocs/",
-        'securityDefinitions': {
-            'BearerAuth': {
-                'type': 'apiKey',
-                'name': 'Authorization',
-                'in': 'header',
-                'description': 'Enter Bearer token in the format: Bearer <token>'
-            }
-        },
-        "definitions": {
-            "User": {
-                "type": "object",
-                "properties": {
-                    "id": {"type": "integer"},
-                    "name": {"type": "string"},
-                    "email": {"type": "string"},
-                    "blood_type": {"type": "string", "example": "O+"},
-                    "location": {"type": "string"},
-                    "gender": {"type": "string"}
-                }
-            },
-            "Donor": {
-                "type": "object",
-                "properties": {
-                    "id": {"type": "integer"},
-                    "user": {"$ref": "#/definitions/User"},
-                    "medical_history": {"type": "string"},
-                    "is_available": {"type": "boolean"},
-                    "last_donation": {"type": "string", "format": "date-time"},
-                    "created_at": {"type": "string", "format": "date-time"},
-                    "updated_at": {"type": "string", "format": "date-time"}
-                }
-            },
-            "BloodRequest": {
-                "type": "object",
-                "properties": {
-                    "id": {"type": "integer"},
-                    "requester_id": {"type": "integer"},
-                    "donor_id": {"type": "integer"},
-                    "blood_type": {"type": "string"},
-                    "quantity": {"type": "integer"},
-                    "status": {"type": "string", "enum": ["pending", "fulfilled", "cancelled"]},
-                    "created_at": {"type": "string", "format": "date-time"},
-                    "updated_at": {"type": "string", "format": "date-time"}
-                }
-            }
-        }
-    }
-    swagger = Swagger(app, config=swagger_config)
+        return lookup_user(int(identity))
+
+    app.extensions['revoked_tokens'] = RevokedTokens(app.config['BLOCKLIST_REFRESH_SECONDS'])
+
+    @jwt.token_in_blocklist_loader
+    def token_in_blocklist_callback(_jwt_header, jwt_data):
+        return app.extensions['revoked_tokens'].is_revoked(jwt_data["jti"])
+
+    @app.cli.command('prune-blocklist')
+    def prune_blocklist_command():
+        """Delete expired rows from the token blocklist."""
+        removed = prune_expired(app.config['BLOCKLIST_PRUNE_BATCH_SIZE'])
+        print(f"Removed {removed} expired blocklist entries")
+
+    init_events(app)
+    init_jobs(app)
+    app.extensions['notifier'] = load_notifier(app.config['NOTIFIER'], app.config['NOTIFY_CONCURRENCY'])
+
+    init_docs(app)
 
     app.register_blueprint(auth_bp, url_prefix='/auth')
     app.register_blueprint(user_bp, url_prefix='/users')
     app.register_blueprint(donor_bp, url_prefix='/donors')
     app.register_blueprint(blood_request_bp, url_prefix='/blood-requests')
+    app.register_blueprint(blood_donation_bp, url_prefix='/blood-donations')
+    app.register_blueprint(stats_bp, url_prefix='/stats')
 
     @app.route("/")
     def index():
         return "Welcome to Bloodit!"
 
+    if app.config['METRICS_ENABLED']:
+        init_metrics(app)
+
     return app
 
-app = create_app()
+def __getattr__(name):
+    # Built on first access (`from main import app`, FLASK_APP=main) rather than
+    # at import, so importing create_app does not build and discard an app
+    if name == 'app':
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0')
+    create_app().run(debug=True, host='0.0.0.0')
@@ -0,0 +1,247 @@
+"""Per-request instrumentation exposed in the Prometheus text format at ``/metrics``.
+
+For every request the middleware records, labelled by endpoint, method and
+status:
+
+* latency, as a histogram
+* response size, as a histogram (streamed responses are not sized)
+* SQL statement count and time, from engine cursor events
+* time spent encoding JSON responses
+
+Statements slower than ``SLOW_QUERY_MS`` are logged with the endpoint that
+ran them. Pool, password hasher and user cache gauges are read at scrape time.
+
+Like the user cache, the metrics live in process memory: each gunicorn
+worker serves its own, so scrape the workers individually or sum the series.
+"""
+import threading
+import time
+from bisect import bisect_left
+from flask import Response, g, has_request_context, request
+from database import db
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (100, 1000, 10_000, 100_000, 1_000_000, 10_000_000)
+LABELS = ('endpoint', 'method', 'status')
+
+
+class Counter:
+    def __init__(self, name, help, labels=LABELS):
+        self.name, self.help, self.labels = name, help, labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, key, amount=1):
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_labels(self.labels, key)} {_number(value)}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, buckets, labels=LABELS):
+        self.name, self.help, self.labels, self.buckets = name, help, labels, buckets
+        # key -> [count per bucket (last one is +Inf), sum]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, key, value):
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            counts[0][bisect_left(self.buckets, value)] += 1
+            counts[1] += value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for key, (counts, total) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip((*self.buckets, '+Inf'), counts):
+                    cumulative += count
+                    labels = _labels((*self.labels, 'le'), (*key, _number(bound)))
+                    lines.append(f'{self.name}_bucket{labels} {cumulative}')
+                lines.append(f'{self.name}_sum{_labels(self.labels, key)} {_number(total)}')
+                lines.append(f'{self.name}_count{_labels(self.labels, key)} {cumulative}')
+        return lines
+
+
+def _labels(names, values):
+    if not names:
+        return ''
+    pairs = (f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return '{' + ','.join(pairs) + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _number(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _gauges(name, help, samples, labels=()):
+    lines = [f'# HELP {name} {help}', f'# TYPE {name} gauge']
+    lines.extend(f'{name}{_labels(labels, key)} {_number(value)}' for key, value in samples)
+    return lines
+
+
+class RequestStats:
+    """What one request has spent so far; kept on ``g`` and read when the response closes."""
+    __slots__ = ('started', 'sql_count', 'sql_seconds', 'serialize_seconds')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.serialize_seconds = 0.0
+
+
+class Metrics:
+    def __init__(self, slow_query_seconds):
+        self.slow_query_seconds = slow_query_seconds
+        self.latency = Histogram('http_request_duration_seconds',
+                                 'Time from the start of the request until the response was closed.',
+                                 LATENCY_BUCKETS)
+        self.size = Histogram('http_response_size_bytes', 'Size of response bodies with a known length.',
+                              SIZE_BUCKETS)
+        self.sql_count = Counter('http_request_sql_statements_total', 'SQL statements run by requests.')
+        self.sql_seconds = Counter('http_request_sql_seconds_total', 'Time requests spent waiting on SQL.')
+        self.serialize_seconds = Counter('http_request_serialization_seconds_total',
+                                         'Time requests spent encoding JSON responses.')
+        self.slow_queries = Counter('sql_slow_queries_total', 'Statements slower than SLOW_QUERY_MS.',
+                                    labels=('endpoint',))
+
+    def observe(self, key, stats, size):
+        self.latency.observe(key, time.perf_counter() - stats.started)
+        if size is not None:
+            self.size.observe(key, size)
+        self.sql_count.inc(key, stats.sql_count)
+        self.sql_seconds.inc(key, stats.sql_seconds)
+        self.serialize_seconds.inc(key, stats.serialize_seconds)
+
+    def render(self, app):
+        lines = []
+        for metric in (self.latency, self.size, self.sql_count, self.sql_seconds, self.serialize_seconds,
+                       self.slow_queries):
+            lines.extend(metric.render())
+        lines.extend(_pool_gauges(app))
+        lines.extend(_hasher_metrics(app.extensions['password_hasher']))
+        cache = app.extensions['user_cache']
+        lines += ['# HELP user_cache_lookups_total JWT user lookups by whether the cache had the user.',
+                  '# TYPE user_cache_lookups_total counter',
+                  f'user_cache_lookups_total{{result="hit"}} {cache.hits}',
+                  f'user_cache_lookups_total{{result="miss"}} {cache.misses}']
+        return '\n'.join(lines) + '\n'
+
+
+def _pool_gauges(app):
+    samples = {'size': [], 'checked_out': [], 'checked_in': [], 'overflow': []}
+    with app.app_context():
+        engines = dict(db.engines)
+    for bind, engine in engines.items():
+        pool = engine.pool
+        # Only QueuePool has a size; the static pool Flask-SQLAlchemy uses
+        # for in-memory SQLite has nothing to report
+        if not hasattr(pool, 'size'):
+            continue
+        key = (bind or 'default',)
+        samples['size'].append((key, pool.size()))
+        samples['checked_out'].append((key, pool.checkedout()))
+        samples['checked_in'].append((key, pool.checkedin()))
+        samples['overflow'].append((key, pool.overflow()))
+    lines = []
+    for name, values in samples.items():
+        lines.extend(_gauges(f'db_pool_{name}', f'Connection pool {name.replace("_", " ")}.', values, ('bind',)))
+    return lines
+
+
+HASHER_COUNTERS = (
+    ('calls', 'password_hasher_calls_total', 'Password hashes and checks run.'),
+    ('rejected', 'password_hasher_rejected_total', 'Hashes refused with a 503 because too many were in flight.'),
+    ('queue_seconds_total', 'password_hasher_queue_seconds_total', 'Time hashes waited for a pool process.'),
+    ('hash_seconds_total', 'password_hasher_hash_seconds_total', 'Time spent hashing.'),
+)
+
+
+def _hasher_metrics(hasher):
+    stats = dict(hasher.stats)
+    lines = []
+    for key, name, help in HASHER_COUNTERS:
+        lines += [f'# HELP {name} {help}', f'# TYPE {name} counter', f'{name} {_number(stats[key])}']
+    lines.extend(_gauges('password_hasher_queue_seconds_max', 'Longest wait for a pool process.',
+                         [((), stats['queue_seconds_max'])]))
+    return lines
+
+
+def _current_stats():
+    if has_request_context():
+        return g.get('_request_stats')
+    return None
+
+
+def init_metrics(app):
+    """Install the request middleware, SQL timing hooks and the ``/metrics`` endpoint."""
+    metrics = app.extensions['metrics'] = Metrics(app.config['SLOW_QUERY_MS'] / 1000)
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_started = time.perf_counter()
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._metrics_started
+        stats = _current_stats()
+        if stats is not None:
+            stats.sql_count += 1
+            stats.sql_seconds += elapsed
+        if elapsed >= metrics.slow_query_seconds:
+            endpoint = (request.endpoint if has_request_context() else None) or 'none'
+            metrics.slow_queries.inc((endpoint,))
+            app.logger.warning('Slow query (%.1fms) in %s: %s', elapsed * 1000, endpoint, statement)
+
+    with app.app_context():
+        engines = list(db.engines.values())
+    for engine in engines:
+        db.event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+        db.event.listen(engine, 'after_cursor_execute', after_cursor_execute)
+
+    # Time the encoding half of jsonify(); building the dicts is part of the view
+    encode = app.json.response
+
+    def timed_response(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return encode(*args, **kwargs)
+        finally:
+            stats = _current_stats()
+            if stats is not None:
+                stats.serialize_seconds += time.perf_counter() - started
+
+    app.json.response = timed_response
+
+    @app.before_request
+    def start_request_stats():
+        g._request_stats = RequestStats()
+
+    @app.after_request
+    def observe_request(response):
+        stats = g.get('_request_stats')
+        if stats is None:
+            return response
+        key = (request.endpoint or 'unmatched', request.method, str(response.status_code))
+        size = None if response.is_streamed else response.content_length
+        # On close, so streamed bodies count their full duration and queries
+        response.call_on_close(lambda: metrics.observe(key, stats, size))
+        return response
+
+    @app.route('/metrics')
+    def metrics_view():
+        return Response(metrics.render(app), mimetype='text/plain; version=0.0.4')
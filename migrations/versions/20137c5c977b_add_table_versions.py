@@ -0,0 +1,28 @@
+"""Add table versions
+
+Revision ID: 20137c5c977b
+Revises: 2b684106eaf0
+Create Date: 2026-10-17 18:31:33.244982
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20137c5c977b'
+down_revision = '2b684106eaf0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('table_version',
+    sa.Column('name', sa.String(length=64), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('table_version')
@@ -0,0 +1,26 @@
+"""Index user.blood_type for compatibility matching
+
+Revision ID: 255ddc7d0713
+Revises: 575341bd22ca
+Create Date: 2026-10-17 10:41:03.522817
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '255ddc7d0713'
+down_revision = '575341bd22ca'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_user_blood_type'), ['blood_type'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_user_blood_type'))
@@ -0,0 +1,30 @@
+"""Add blood donation export indexes
+
+Revision ID: 2b684106eaf0
+Revises: 59b564643e31
+Create Date: 2026-10-17 18:26:53.944430
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2b684106eaf0'
+down_revision = '59b564643e31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('blood_donation', schema=None) as batch_op:
+        batch_op.create_index('ix_blood_donation_created_at_id', ['created_at', 'id'], unique=False)
+        batch_op.create_index('ix_blood_donation_date_id', ['date', 'id'], unique=False)
+        batch_op.create_index('ix_blood_donation_status_date', ['status', 'date', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('blood_donation', schema=None) as batch_op:
+        batch_op.drop_index('ix_blood_donation_status_date')
+        batch_op.drop_index('ix_blood_donation_date_id')
+        batch_op.drop_index('ix_blood_donation_created_at_id')
@@ -0,0 +1,26 @@
+"""Index blood requests by (updated_at, id) for the event stream
+
+Revision ID: 3e8b5d1f6a20
+Revises: 7c1f4e2a9b3d
+Create Date: 2026-10-17 19:02:41.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3e8b5d1f6a20'
+down_revision = '7c1f4e2a9b3d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('blood_request', schema=None) as batch_op:
+        batch_op.create_index('ix_blood_request_updated_at_id', ['updated_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('blood_request', schema=None) as batch_op:
+        batch_op.drop_index('ix_blood_request_updated_at_id')
@@ -0,0 +1,35 @@
+"""Add donation and request counters to User
+
+Revision ID: 575341bd22ca
+Revises: c495b6b2baff
+Create Date: 2026-10-17 09:12:40.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '575341bd22ca'
+down_revision = 'c495b6b2baff'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('donation_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('request_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill from the existing rows
+    op.execute(
+        'UPDATE "user" SET '
+        'donation_count = (SELECT COUNT(*) FROM blood_donation WHERE blood_donation."userId" = "user".id), '
+        'request_count = (SELECT COUNT(*) FROM blood_request WHERE blood_request.requester_id = "user".id)'
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('request_count')
+        batch_op.drop_column('donation_count')
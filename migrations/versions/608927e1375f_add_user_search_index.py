@@ -0,0 +1,58 @@
+"""Add name/location search index on user (FTS5 on SQLite, pg_trgm on Postgres)
+
+Revision ID: 608927e1375f
+Revises: f40d0361a8b1
+Create Date: 2026-10-17 13:20:51.377942
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '608927e1375f'
+down_revision = 'f40d0361a8b1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE user_search USING fts5("
+            "name, location, content='user', content_rowid='id', tokenize='trigram')"
+        )
+        op.execute(
+            'CREATE TRIGGER user_search_ai AFTER INSERT ON "user" BEGIN '
+            'INSERT INTO user_search(rowid, name, location) VALUES (new.id, new.name, new.location); '
+            'END'
+        )
+        op.execute(
+            'CREATE TRIGGER user_search_ad AFTER DELETE ON "user" BEGIN '
+            "INSERT INTO user_search(user_search, rowid, name, location) VALUES ('delete', old.id, old.name, old.location); "
+            'END'
+        )
+        op.execute(
+            'CREATE TRIGGER user_search_au AFTER UPDATE OF name, location ON "user" BEGIN '
+            "INSERT INTO user_search(user_search, rowid, name, location) VALUES ('delete', old.id, old.name, old.location); "
+            'INSERT INTO user_search(rowid, name, location) VALUES (new.id, new.name, new.location); '
+            'END'
+        )
+        op.execute("INSERT INTO user_search(user_search) VALUES ('rebuild')")
+    elif dialect == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.execute('CREATE INDEX ix_user_name_trgm ON "user" USING gin (name gin_trgm_ops)')
+        op.execute('CREATE INDEX ix_user_location_trgm ON "user" USING gin (location gin_trgm_ops)')
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute('DROP TRIGGER IF EXISTS user_search_au')
+        op.execute('DROP TRIGGER IF EXISTS user_search_ad')
+        op.execute('DROP TRIGGER IF EXISTS user_search_ai')
+        op.execute('DROP TABLE IF EXISTS user_search')
+    elif dialect == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_user_location_trgm')
+        op.execute('DROP INDEX IF EXISTS ix_user_name_trgm')
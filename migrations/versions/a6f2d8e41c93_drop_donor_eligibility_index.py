@@ -0,0 +1,31 @@
+"""Drop donor eligibility index
+
+Revision ID: a6f2d8e41c93
+Revises: c37f9a1e5d42
+Create Date: 2026-10-18 14:27:05.613948
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6f2d8e41c93'
+down_revision = 'c37f9a1e5d42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Most donors are available and eligible, so the index hardly narrows a
+    # search; without ANALYZE statistics SQLite still drove matches and geo
+    # searches from it and sorted every eligible donor. The eligibility terms
+    # are cheap filters on rows the blood type, geo_cell and created_at
+    # indexes find.
+    with op.batch_alter_table('donor', schema=None) as batch_op:
+        batch_op.drop_index('ix_donor_is_available_eligible_from')
+
+
+def downgrade():
+    with op.batch_alter_table('donor', schema=None) as batch_op:
+        batch_op.create_index('ix_donor_is_available_eligible_from', ['is_available', 'eligible_from'], unique=False)
@@ -0,0 +1,35 @@
+"""Add blood stats
+
+Revision ID: b81d0c6e4f57
+Revises: 3e8b5d1f6a20
+Create Date: 2026-10-17 22:31:07.204915
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b81d0c6e4f57'
+down_revision = '3e8b5d1f6a20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Starts empty; the reconcile_stats job the job runner queues on start fills it
+    op.create_table('blood_stats',
+    sa.Column('blood_type', sa.String(length=3), nullable=False),
+    sa.Column('location', sa.String(length=120), nullable=False),
+    sa.Column('pending_requests', sa.Integer(), nullable=False),
+    sa.Column('units_requested', sa.Float(), nullable=False),
+    sa.Column('total_requests', sa.Integer(), nullable=False),
+    sa.Column('fulfilled_requests', sa.Integer(), nullable=False),
+    sa.Column('available_donors', sa.Integer(), nullable=False),
+    sa.Column('donations', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('blood_type', 'location')
+    )
+
+
+def downgrade():
+    op.drop_table('blood_stats')
@@ -0,0 +1,38 @@
+"""Normalize blood request status
+
+Revision ID: c37f9a1e5d42
+Revises: e5a93c27d1b8
+Create Date: 2026-10-18 09:12:44.180236
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c37f9a1e5d42'
+down_revision = 'e5a93c27d1b8'
+branch_labels = None
+depends_on = None
+
+# BloodRequest.STATUSES
+STATUSES = ('Pending', 'Fulfilled', 'Cancelled')
+
+
+def upgrade():
+    # PUT /blood-requests/<id> used to store status as sent, and the API docs
+    # spelled it in lower case. blood_stats only counts the stored spelling;
+    # the next reconcile_stats run recounts the rows fixed here.
+    blood_request = sa.table('blood_request', sa.column('status', sa.String))
+    for status in STATUSES:
+        op.execute(
+            blood_request.update()
+            .where(sa.func.lower(sa.func.trim(blood_request.c.status)) == status.lower(),
+                   blood_request.c.status != status)
+            .values(status=status)
+        )
+
+
+def downgrade():
+    # The original spellings are not kept
+    pass
@@ -0,0 +1,38 @@
+"""Add donor blood_type
+
+Revision ID: d18b7c4e9f20
+Revises: a6f2d8e41c93
+Create Date: 2026-10-18 16:03:51.274410
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd18b7c4e9f20'
+down_revision = 'a6f2d8e41c93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('donor', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('blood_type', sa.String(length=3), nullable=True))
+
+    # Copy each donor's blood type from their user, as Donor._sync_blood_type does
+    user = sa.table('user', sa.column('id', sa.Integer), sa.column('blood_type', sa.String))
+    donor = sa.table('donor', sa.column('user_id', sa.Integer), sa.column('blood_type', sa.String))
+    op.execute(donor.update().values(
+        blood_type=sa.select(user.c.blood_type).where(user.c.id == donor.c.user_id).scalar_subquery()
+    ))
+
+    with op.batch_alter_table('donor', schema=None) as batch_op:
+        batch_op.alter_column('blood_type', existing_type=sa.String(length=3), nullable=False)
+        batch_op.create_index('ix_donor_blood_type_eligible', ['blood_type', 'is_available', 'eligible_from'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('donor', schema=None) as batch_op:
+        batch_op.drop_index('ix_donor_blood_type_eligible')
+        batch_op.drop_column('blood_type')
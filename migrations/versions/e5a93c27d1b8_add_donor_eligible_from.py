@@ -0,0 +1,55 @@
+"""Add donor eligible_from
+
+Revision ID: e5a93c27d1b8
+Revises: b81d0c6e4f57
+Create Date: 2026-10-17 23:48:19.530662
+
+"""
+import datetime
+from alembic import op
+import sqlalchemy as sa
+from flask import current_app
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a93c27d1b8'
+down_revision = 'b81d0c6e4f57'
+branch_labels = None
+depends_on = None
+
+# Donor.NEVER_DONATED
+NEVER_DONATED = datetime.datetime(1970, 1, 1)
+
+
+def upgrade():
+    with op.batch_alter_table('donor', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('eligible_from', sa.DateTime(), nullable=False,
+                                      server_default=sa.text(f"'{NEVER_DONATED.isoformat(' ')}'")))
+
+    # Backfill the donors who have donated, as Donor.eligible_from computes it
+    donor = sa.table('donor', sa.column('id', sa.Integer), sa.column('last_donation', sa.DateTime),
+                     sa.column('eligible_from', sa.DateTime))
+    connection = op.get_bind()
+    deferral_days = current_app.config['DONATION_DEFERRAL_DAYS']
+    rows = connection.execute(sa.select(donor.c.id, donor.c.last_donation).where(donor.c.last_donation.is_not(None)))
+    updates = [
+        {'donor_id': id, 'value': datetime.datetime.combine(
+            last_donation.date() + datetime.timedelta(days=deferral_days), datetime.time())}
+        for id, last_donation in rows
+    ]
+    if updates:
+        connection.execute(donor.update().where(donor.c.id == sa.bindparam('donor_id'))
+                           .values(eligible_from=sa.bindparam('value')), updates)
+
+    with op.batch_alter_table('donor', schema=None) as batch_op:
+        batch_op.create_index('ix_donor_is_available_eligible_from', ['is_available', 'eligible_from'], unique=False)
+    # Most donors are eligible, so the new index is only worth using on its own;
+    # without statistics SQLite also picks it over the blood type and geo_cell
+    # indexes when searching for matches
+    op.execute('ANALYZE donor')
+
+
+def downgrade():
+    with op.batch_alter_table('donor', schema=None) as batch_op:
+        batch_op.drop_index('ix_donor_is_available_eligible_from')
+        batch_op.drop_column('eligible_from')
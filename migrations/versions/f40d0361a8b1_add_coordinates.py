@@ -0,0 +1,40 @@
+"""Add coordinates and grid cell index to User and BloodRequest
+
+Revision ID: f40d0361a8b1
+Revises: 255ddc7d0713
+Create Date: 2026-10-17 11:58:27.904113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f40d0361a8b1'
+down_revision = '255ddc7d0713'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('latitude', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('longitude', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('geo_cell', sa.Integer(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_user_geo_cell'), ['geo_cell'], unique=False)
+
+    with op.batch_alter_table('blood_request', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('latitude', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('longitude', sa.Float(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('blood_request', schema=None) as batch_op:
+        batch_op.drop_column('longitude')
+        batch_op.drop_column('latitude')
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_user_geo_cell'))
+        batch_op.drop_column('geo_cell')
+        batch_op.drop_column('longitude')
+        batch_op.drop_column('latitude')
@@ -0,0 +1,52 @@
+"""Add indexes for the list endpoint filters and keyset ordering
+
+Revision ID: fbe9d8134bc7
+Revises: 608927e1375f
+Create Date: 2026-10-17 14:36:12.640581
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'fbe9d8134bc7'
+down_revision = '608927e1375f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.create_index('ix_user_created_at_id', ['created_at', 'id'], unique=False)
+
+    with op.batch_alter_table('donor', schema=None) as batch_op:
+        batch_op.create_index('ix_donor_created_at_id', ['created_at', 'id'], unique=False)
+
+    with op.batch_alter_table('blood_request', schema=None) as batch_op:
+        batch_op.create_index('ix_blood_request_created_at_id', ['created_at', 'id'], unique=False)
+        batch_op.create_index('ix_blood_request_requester_id_created_at', ['requester_id', 'created_at', 'id'], unique=False)
+        batch_op.create_index('ix_blood_request_donor_id_created_at', ['donor_id', 'created_at', 'id'], unique=False)
+        batch_op.create_index('ix_blood_request_blood_type_created_at', ['blood_type', 'created_at', 'id'], unique=False)
+        batch_op.create_index('ix_blood_request_status_created_at', ['status', 'created_at', 'id'], unique=False)
+
+    with op.batch_alter_table('blood_donation', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_blood_donation_userId'), ['userId'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('blood_donation', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_blood_donation_userId'))
+
+    with op.batch_alter_table('blood_request', schema=None) as batch_op:
+        batch_op.drop_index('ix_blood_request_status_created_at')
+        batch_op.drop_index('ix_blood_request_blood_type_created_at')
+        batch_op.drop_index('ix_blood_request_donor_id_created_at')
+        batch_op.drop_index('ix_blood_request_requester_id_created_at')
+        batch_op.drop_index('ix_blood_request_created_at_id')
+
+    with op.batch_alter_table('donor', schema=None) as batch_op:
+        batch_op.drop_index('ix_donor_created_at_id')
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_index('ix_user_created_at_id')
@@ -1,9 +1,10 @@
 from database import db
+from serialization import serializer
 from datetime import date, time, datetime
 
 class BloodDonation(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    userId = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    userId = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
     bloodGroup = db.Column(db.String(3), nullable=False)
     date = db.Column(db.Date, nullable=False)
     time = db.Column(db.Time, nullable=False)
@@ -14,5 +15,39 @@ class BloodDonation(db.Model):
 
     user = db.relationship('User', back_populates='donations')
 
+    # Keyset pagination orders by (created_at, id); exports by (date, id)
+    __table_args__ = (
+        db.Index('ix_blood_donation_created_at_id', 'created_at', 'id'),
+        db.Index('ix_blood_donation_date_id', 'date', 'id'),
+        db.Index('ix_blood_donation_status_date', 'status', 'date', 'id'),
+    )
+
+    to_dict = serializer(
+        'id',
+        ('user_id', 'userId'),
+        ('blood_group', 'bloodGroup'),
+        'date',
+        'time',
+        'status',
+        'ref',
+        'created_at',
+        'updated_at',
+    )
+
+    @staticmethod
+    def export_columns():
+        """Donation columns labelled with the :meth:`to_dict` keys, for streaming exports."""
+        return (
+            BloodDonation.id,
+            BloodDonation.userId.label('user_id'),
+            BloodDonation.bloodGroup.label('blood_group'),
+            BloodDonation.date,
+            BloodDonation.time,
+            BloodDonation.status,
+            BloodDonation.ref,
+            BloodDonation.created_at,
+            BloodDonation.updated_at,
+        )
+
     def __repr__(self):
         return f'<BloodDonation {self.id}>'
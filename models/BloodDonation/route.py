@@ -1,9 +1,14 @@
 from flask import Blueprint, request, jsonify
+from sqlalchemy import select
 from database import db
 from models.BloodDonation.model import BloodDonation
+from models.BloodRequest.compatibility import BLOOD_TYPES
 from models.Donor.model import Donor
-from flasgger import swag_from
-from datetime import date
+import export
+from pagination import InvalidPageRequest, get_page_args, keyset, split_page, page_response
+from apidocs import swag_from
+import conditional
+from datetime import date, time, datetime
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
 blood_donation_bp = Blueprint('blood_donation', __name__, url_prefix='/blood-donations')
@@ -26,19 +31,20 @@ blood_donation_bp = Blueprint('blood_donation', __name__, url_prefix='/blood-don
             'in': 'body',
             'required': True,
             'schema': {
-                'id': 'BloodDonation',
-                'required': ['blood_group', 'donation_date', 'quantity'],
+                'required': ['blood_group', 'donation_date'],
                 'properties': {
-                    'blood_group': {'type': 'string'},
+                    'blood_group': {'type': 'string', 'enum': list(BLOOD_TYPES)},
                     'donation_date': {'type': 'string', 'format': 'date'},
-                    'quantity': {'type': 'integer'}
+                    'donation_time': {'type': 'string', 'example': '09:30'},
+                    'status': {'type': 'string', 'example': 'Scheduled'},
+                    'ref': {'type': 'string'}
                 }
             }
         }
     ],
     'responses': {
         201: {'description': 'Blood donation created successfully'},
-        400: {'description': 'Invalid input'},
+        400: {'description': 'Invalid input, or a missing or unknown blood_group'},
         403: {'description': 'User is not a registered donor'}
     }
 })
@@ -54,14 +60,24 @@ def create_blood_donation():
     if not donor:
         return jsonify({"message": "User is not a registered donor"}), 403
 
+    try:
+        donation_date = date.fromisoformat(data['donation_date'])
+        donation_time = time.fromisoformat(data.get('donation_time') or '00:00')
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"message": "Invalid input"}), 400
+    if data.get('blood_group') not in BLOOD_TYPES:
+        return jsonify({"message": f"blood_group must be one of {', '.join(BLOOD_TYPES)}"}), 400
+
     new_donation = BloodDonation(
-        donor_id=donor.id,
-        blood_group=data['blood_group'],
-        donation_date=date.fromisoformat(data['donation_date']),
-        quantity=data.get('quantity')
+        userId=donor.user_id,
+        bloodGroup=data.get('blood_group'),
+        date=donation_date,
+        time=donation_time,
+        status=data.get('status', 'Scheduled'),
+        ref=data.get('ref')
     )
 
-    donor.last_donation = new_donation.donation_date
+    donor.last_donation = datetime.combine(donation_date, donation_time)
 
     db.session.add(new_donation)
     db.session.add(donor)
@@ -73,22 +89,114 @@ def create_blood_donation():
 @jwt_required()
 @swag_from({
     'tags': ['Blood Donation'],
+    'security': [{'BearerAuth': []}],
+    'parameters': [
+        {
+            'name': 'limit',
+            'in': 'query',
+            'type': 'integer',
+            'required': False,
+            'description': 'Page size (capped by PAGINATION_MAX_LIMIT)'
+        },
+        {
+            'name': 'cursor',
+            'in': 'query',
+            'type': 'string',
+            'required': False,
+            'description': 'Opaque cursor taken from the X-Next-Cursor header of the previous page'
+        }
+    ],
     'responses': {
         200: {
-            'description': 'A list of blood donations',
+            'description': 'A page of blood donations ordered by creation time',
             'schema': {
                 'type': 'array',
                 'items': {
                     '$ref': '#/definitions/BloodDonation'
                 }
             }
+        },
+        400: {
+            'description': 'Invalid limit or cursor'
+        },
+        304: {
+            'description': 'Not modified since the ETag sent in If-None-Match'
         }
     }
 })
+@conditional.versioned('blood_donation')
 def get_blood_donations():
-    """Get all blood donations"""
-    donations = BloodDonation.query.all()
-    return jsonify([donation.to_dict() for donation in donations]), 200
+    """Get a page of blood donations"""
+    try:
+        limit, cursor = get_page_args()
+    except InvalidPageRequest as e:
+        return jsonify({"message": str(e)}), 400
+
+    query = keyset(BloodDonation.query, BloodDonation.created_at, BloodDonation.id, limit, cursor)
+    donations, next_cursor = split_page(query.all(), limit)
+    return page_response([donation.to_dict() for donation in donations], next_cursor), 200
+
+@blood_donation_bp.route('/export', methods=['GET'])
+@jwt_required()
+@swag_from({
+    'tags': ['Blood Donation'],
+    'security': [{'BearerAuth': []}],
+    'produces': ['application/x-ndjson', 'text/csv'],
+    'parameters': [
+        {
+            'name': 'format',
+            'in': 'query',
+            'type': 'string',
+            'enum': ['ndjson', 'csv'],
+            'default': 'ndjson',
+            'required': False
+        },
+        {
+            'name': 'since',
+            'in': 'query',
+            'type': 'string',
+            'format': 'date',
+            'required': False,
+            'description': 'Only donations on or after this date; with a time, from the start of its day'
+        },
+        {
+            'name': 'until',
+            'in': 'query',
+            'type': 'string',
+            'format': 'date',
+            'required': False,
+            'description': 'Only donations before this date; with a time, up to the end of its day'
+        },
+        {
+            'name': 'status',
+            'in': 'query',
+            'type': 'string',
+            'required': False,
+            'description': 'Filter donations by status'
+        }
+    ],
+    'responses': {
+        200: {
+            'description': 'Every matching blood donation ordered by date, streamed one row per line'
+        },
+        400: {
+            'description': 'Invalid format or date range'
+        }
+    }
+})
+def export_blood_donations():
+    """Stream blood donations as NDJSON or CSV"""
+    try:
+        fmt, since, until, status = export.get_export_args()
+    except export.InvalidExportRequest as e:
+        return jsonify({"message": str(e)}), 400
+
+    stmt = select(*BloodDonation.export_columns())
+    if status:
+        stmt = stmt.where(BloodDonation.status == status)
+    stmt = export.day_range(stmt, BloodDonation.date, since, until)
+    stmt = stmt.order_by(BloodDonation.date, BloodDonation.id)
+    return export.export_response(stmt, fmt, 'blood-donations')
 
 @blood_donation_bp.route('/<int:donation_id>', methods=['GET'])
 @jwt_required()
@@ -113,10 +221,14 @@ def get_blood_donations():
         },
         404: {
             'description': 'Blood donation not found'
+        },
+        304: {
+            'description': 'Not modified since the ETag sent in If-None-Match'
         }
     }
 })
 def get_blood_donation(donation_id):
     """Get a blood donation by ID"""
     donation = db.get_or_404(BloodDonation, donation_id)
-    return jsonify(donation.to_dict())
+    etag = conditional.make_etag(donation.id, donation.updated_at)
+    return conditional.not_modified(etag) or conditional.with_etag(jsonify(donation.to_dict()), etag)
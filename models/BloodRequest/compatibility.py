@@ -0,0 +1,52 @@
+"""ABO/Rh red cell compatibility, precomputed once at import time.
+
+Each of the eight blood types gets a bit; ``DONOR_MASKS[recipient]`` has the
+bits of every donor type the recipient can safely receive.
+"""
+
+BLOOD_TYPES = ('O-', 'O+', 'A-', 'A+', 'B-', 'B+', 'AB-', 'AB+')
+BIT = {blood_type: 1 << i for i, blood_type in enumerate(BLOOD_TYPES)}
+
+
+def _antigens(blood_type):
+    abo, rh = blood_type[:-1], blood_type[-1]
+    antigens = set() if abo == 'O' else set(abo)
+    if rh == '+':
+        antigens.add('D')
+    return antigens
+
+
+def _can_receive(recipient, donor):
+    # A donor is compatible when they carry no antigen the recipient lacks
+    return _antigens(donor) <= _antigens(recipient)
+
+
+DONOR_MASKS = {
+    recipient: sum(BIT[donor] for donor in BLOOD_TYPES if _can_receive(recipient, donor))
+    for recipient in BLOOD_TYPES
+}
+
+RECIPIENT_COUNTS = {
+    donor: sum(1 for recipient in BLOOD_TYPES if DONOR_MASKS[recipient] & BIT[donor])
+    for donor in BLOOD_TYPES
+}
+
+# Compatible donor types per recipient, best match first: the exact type, then
+# the types that can serve the fewest recipients, so universal O- donors are
+# asked last.
+COMPATIBLE_DONORS = {
+    recipient: tuple(sorted(
+        (donor for donor in BLOOD_TYPES if DONOR_MASKS[recipient] & BIT[donor]),
+        key=lambda donor: (donor != recipient, RECIPIENT_COUNTS[donor], BLOOD_TYPES.index(donor))
+    ))
+    for recipient in BLOOD_TYPES
+}
+
+
+def compatible_donor_types(recipient):
+    """Donor blood types ``recipient`` can receive from, ranked; empty for unknown types."""
+    return COMPATIBLE_DONORS.get(recipient, ())
+
+
+def is_compatible(recipient, donor):
+    return bool(DONOR_MASKS.get(recipient, 0) & BIT.get(donor, 0))
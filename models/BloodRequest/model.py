@@ -1,12 +1,26 @@
 from database import db
+from serialization import serializer
 import datetime
 
+# As stored and served; clients may send any case
+STATUSES = ('Pending', 'Fulfilled', 'Cancelled')
+
+def normalize_status(value):
+    """The stored spelling of ``value``, matched case-insensitively; raises ``ValueError``."""
+    if isinstance(value, str):
+        for status in STATUSES:
+            if value.strip().lower() == status.lower():
+                return status
+    raise ValueError(f"status must be one of {', '.join(STATUSES)}")
+
 class BloodRequest(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     requester_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     blood_type = db.Column(db.String(3), nullable=False)
     quantity = db.Column(db.Float, nullable=False)
     location = db.Column(db.String(120), nullable=False)
+    latitude = db.Column(db.Float, nullable=True)
+    longitude = db.Column(db.Float, nullable=True)
     name = db.Column(db.String(120), nullable=False)
     phone = db.Column(db.String(20), nullable=True)
     status = db.Column(db.String(20), default='Pending', nullable=False)
@@ -17,27 +31,41 @@ class BloodRequest(db.Model):
     requester = db.relationship('User', foreign_keys=[requester_id], back_populates='requests')
     donor = db.relationship('User', foreign_keys=[donor_id])
 
-    def __init__(self, requester_id, blood_type, quantity, location, name, phone, donor_id=None):
+    # Keyset pagination orders by (created_at, id); each list filter gets its own prefix
+    __table_args__ = (
+        db.Index('ix_blood_request_created_at_id', 'created_at', 'id'),
+        db.Index('ix_blood_request_requester_id_created_at', 'requester_id', 'created_at', 'id'),
+        db.Index('ix_blood_request_donor_id_created_at', 'donor_id', 'created_at', 'id'),
+        db.Index('ix_blood_request_blood_type_created_at', 'blood_type', 'created_at', 'id'),
+        db.Index('ix_blood_request_status_created_at', 'status', 'created_at', 'id'),
+        # Event stream resumes and polling read changes in (updated_at, id) order
+        db.Index('ix_blood_request_updated_at_id', 'updated_at', 'id'),
+    )
+
+    def __init__(self, requester_id, blood_type, quantity, location, name, phone, donor_id=None, latitude=None, longitude=None):
         self.requester_id = requester_id
         self.blood_type = blood_type
         self.quantity = quantity
         self.location = location
+        self.latitude = latitude
+        self.longitude = longitude
         self.donor_id = donor_id
         self.name = name
         self.phone = phone
         self.status = 'Pending'
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'requester_id': self.requester_id,
-            'blood_type': self.blood_type,
-            'quantity': self.quantity,
-            'location': self.location,
-            'name': self.name,
-            'phone': self.phone,
-            'status': self.status,
-            'donor_id': self.donor_id,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat()
-        }
+    to_dict = serializer(
+        'id',
+        'requester_id',
+        'blood_type',
+        'quantity',
+        'location',
+        'latitude',
+        'longitude',
+        'name',
+        'phone',
+        'status',
+        'donor_id',
+        'created_at',
+        'updated_at',
+    )
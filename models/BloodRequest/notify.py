@@ -0,0 +1,87 @@
+"""Tell compatible, eligible donors near a new blood request about it.
+
+Creating a request only queues a ``match_donors`` job. That job walks the
+matching donors in ``user.id`` order, ``NOTIFY_BATCH_SIZE`` at a time: each
+batch becomes one ``notify_donors`` job, and the next batch is another
+``match_donors`` job, so no job runs long and a restart resumes where the
+last batch left off. "Near" means within ``NOTIFY_RADIUS_KM`` when the
+request has coordinates and the same location name otherwise. Requests no
+longer pending by the time a job runs notify nobody. "Eligible" means
+available and past the deferral after their last donation (``Donor.eligible``).
+"""
+from flask import current_app
+from sqlalchemy import func, select
+from database import db
+import geo
+import jobs
+from models.BloodRequest.model import BloodRequest
+from models.BloodRequest.compatibility import compatible_donor_types
+from models.Donor.model import Donor
+from models.User.model import User
+
+
+def _pending_request(request_id):
+    req = db.session.get(BloodRequest, request_id)
+    return req if req is not None and req.status == 'Pending' else None
+
+
+def queue_matching(req):
+    """Queue the donor search for ``req``, a request added to the session; it runs after commit."""
+    db.session.flush()
+    jobs.enqueue('match_donors', {'request_id': req.id})
+
+
+@jobs.handler('match_donors')
+def match_donors(payload):
+    req = _pending_request(payload['request_id'])
+    if req is None:
+        return
+    batch_size = current_app.config['NOTIFY_BATCH_SIZE']
+    query = (
+        select(User.id, User.latitude, User.longitude)
+        .join(Donor, Donor.user_id == User.id)
+        .where(User.blood_type.in_(compatible_donor_types(req.blood_type)), Donor.eligible(),
+               User.id != req.requester_id, User.id > payload.get('after_id', 0))
+        .order_by(User.id)
+        .limit(batch_size)
+    )
+    radius_km = current_app.config['NOTIFY_RADIUS_KM']
+    if req.latitude is not None:
+        query = query.where(User.geo_cell.in_(geo.cells_within(req.latitude, req.longitude, radius_km)))
+    else:
+        query = query.where(func.lower(User.location) == req.location.lower())
+    rows = db.session.execute(query).all()
+
+    user_ids = [
+        row.id for row in rows
+        if req.latitude is None
+        or geo.haversine_km(req.latitude, req.longitude, row.latitude, row.longitude) <= radius_km
+    ]
+    if user_ids:
+        jobs.enqueue('notify_donors', {'request_id': req.id, 'user_ids': user_ids})
+    if len(rows) == batch_size:
+        jobs.enqueue('match_donors', {'request_id': req.id, 'after_id': rows[-1].id})
+
+
+@jobs.handler('notify_donors')
+def notify_donors(payload):
+    req = _pending_request(payload['request_id'])
+    if req is None:
+        return
+    message = {
+        'request_id': req.id,
+        'blood_type': req.blood_type,
+        'quantity': req.quantity,
+        'location': req.location,
+        'text': f'{req.blood_type} blood is needed in {req.location}. Can you donate?',
+    }
+    recipients = db.session.execute(
+        select(User.id, User.name, User.email).where(User.id.in_(payload['user_ids']))
+    ).mappings().all()
+    failed = current_app.extensions['notifier'].send_many([(dict(recipient), message) for recipient in recipients])
+    if failed:
+        # Retry only the donors who were not reached
+        raise jobs.RetryLater(
+            f'{len(failed)} of {len(recipients)} notifications failed, e.g. {failed[0][1]!r}',
+            payload={**payload, 'user_ids': [recipient['id'] for recipient, _ in failed]},
+        )
@@ -1,8 +1,23 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
+from sqlalchemy import literal, select, union_all
 from database import db
-from models.BloodRequest.model import BloodRequest
+from models.BloodRequest.model import STATUSES, BloodRequest, normalize_status
+from models.BloodRequest.compatibility import BLOOD_TYPES, compatible_donor_types
+from models.BloodRequest.notify import queue_matching
+from models.BloodStats.model import add_requests, bump_stats, new_deltas
+from models.Donor.model import Donor, eligibility_day
+from models.User.model import User, bump_counter
+from collections import Counter
+import datetime
+import math
+import bulk
+import export
+import geo
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from flasgger import swag_from
+from apidocs import swag_from
+import conditional
+import events
+from pagination import InvalidPageRequest, get_page_args, keyset, split_page, page_response
 
 blood_request_bp = Blueprint('blood-request', __name__, url_prefix='/blood-requests')
 
@@ -12,13 +27,19 @@ blood_request_bp = Blueprint('blood-request', __name__, url_prefix='/blood-reque
     'tags': ['Blood Request'],
     'responses': {
         200: {
-            'description': 'A list of blood requests',
+            'description': 'A page of blood requests ordered by creation time',
             'schema': {
                 'type': 'array',
                 'items': {
                     '$ref': '#/definitions/BloodRequest'
                 }
             }
+        },
+        400: {
+            'description': 'Invalid limit or cursor'
+        },
+        304: {
+            'description': 'Not modified since the ETag sent in If-None-Match'
         }
     },
     'security': [{'BearerAuth': []}],
@@ -43,11 +64,31 @@ blood_request_bp = Blueprint('blood-request', __name__, url_prefix='/blood-reque
             'type': 'string',
             'required': False,
             'description': 'Filter requests by blood type'
+        },
+        {
+            'name': 'limit',
+            'in': 'query',
+            'type': 'integer',
+            'required': False,
+            'description': 'Page size (capped by PAGINATION_MAX_LIMIT)'
+        },
+        {
+            'name': 'cursor',
+            'in': 'query',
+            'type': 'string',
+            'required': False,
+            'description': 'Opaque cursor taken from the X-Next-Cursor header of the previous page'
         }
     ]
 }
 )
+@conditional.versioned('blood_request')
 def get_blood_requests():
+    try:
+        limit, cursor = get_page_args()
+    except InvalidPageRequest as e:
+        return jsonify({'message': str(e)}), 400
+
     query = BloodRequest.query
 
     donor_id = request.args.get('donor_id')
@@ -61,7 +102,143 @@ def get_blood_requests():
     if blood_type:
         query = query.filter_by(blood_type=blood_type)
 
-    return jsonify([req.to_dict() for req in query.all()]), 200
+    reqs, next_cursor = split_page(keyset(query, BloodRequest.created_at, BloodRequest.id, limit, cursor).all(), limit)
+    return page_response([req.to_dict() for req in reqs], next_cursor), 200
+
+@blood_request_bp.route('/stream', methods=['GET'])
+@jwt_required()
+@swag_from({
+    'tags': ['Blood Request'],
+    'security': [{'BearerAuth': []}],
+    'produces': ['text/event-stream'],
+    'parameters': [
+        {
+            'name': 'blood_type',
+            'in': 'query',
+            'type': 'string',
+            'required': False,
+            'description': 'Only requests for these blood types, comma separated'
+        },
+        {
+            'name': 'location',
+            'in': 'query',
+            'type': 'string',
+            'required': False,
+            'description': 'Only requests in this location (case-insensitive)'
+        },
+        {
+            'name': 'near',
+            'in': 'query',
+            'type': 'string',
+            'required': False,
+            'description': 'Only requests within radius_km of "lat,lon"'
+        },
+        {
+            'name': 'radius_km',
+            'in': 'query',
+            'type': 'number',
+            'required': False,
+            'description': 'Search radius for near (capped by GEO_MAX_RADIUS_KM)'
+        },
+        {
+            'name': 'Last-Event-ID',
+            'in': 'header',
+            'type': 'string',
+            'required': False,
+            'description': 'Resume after this event; sent by EventSource on reconnect'
+        }
+    ],
+    'responses': {
+        200: {
+            'description': 'Server-Sent Events: "created" and "updated" with a BloodRequest as data, '
+                           'and "reset" when events since Last-Event-ID can no longer be replayed'
+        },
+        400: {
+            'description': 'Invalid near or radius_km'
+        },
+        503: {
+            'description': 'This worker cannot hold another stream open (sync worker, or EVENT_MAX_THREAD_SUBSCRIBERS reached); retry later'
+        }
+    }
+})
+def stream_blood_requests():
+    try:
+        subscription = events.subscribe()
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    except events.StreamUnavailable as e:
+        response = jsonify({'message': str(e)})
+        response.headers['Retry-After'] = '5'
+        return response, 503
+    response = Response(subscription.frames(), mimetype='text/event-stream')
+    response.call_on_close(subscription.close)
+    response.headers['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    # Lets asgi.py serve the stream on its event loop instead of a thread
+    response.subscription = subscription
+    return response
+
+@blood_request_bp.route('/export', methods=['GET'])
+@jwt_required()
+@swag_from({
+    'tags': ['Blood Request'],
+    'security': [{'BearerAuth': []}],
+    'produces': ['application/x-ndjson', 'text/csv'],
+    'parameters': [
+        {
+            'name': 'format',
+            'in': 'query',
+            'type': 'string',
+            'enum': ['ndjson', 'csv'],
+            'default': 'ndjson',
+            'required': False
+        },
+        {
+            'name': 'since',
+            'in': 'query',
+            'type': 'string',
+            'format': 'date-time',
+            'required': False,
+            'description': 'Only requests created at or after this time'
+        },
+        {
+            'name': 'until',
+            'in': 'query',
+            'type': 'string',
+            'format': 'date-time',
+            'required': False,
+            'description': 'Only requests created before this time'
+        },
+        {
+            'name': 'status',
+            'in': 'query',
+            'type': 'string',
+            'required': False,
+            'description': 'Filter requests by status'
+        }
+    ],
+    'responses': {
+        200: {
+            'description': 'Every matching blood request ordered by creation time, streamed one row per line'
+        },
+        400: {
+            'description': 'Invalid format or date range'
+        }
+    }
+})
+def export_blood_requests():
+    try:
+        fmt, since, until, status = export.get_export_args()
+    except export.InvalidExportRequest as e:
+        return jsonify({'message': str(e)}), 400
+
+    stmt = select(BloodRequest.__table__)
+    if status:
+        stmt = stmt.where(BloodRequest.status == status)
+    stmt = export.date_range(stmt, BloodRequest.created_at, since, until)
+    stmt = stmt.order_by(BloodRequest.created_at, BloodRequest.id)
+    return export.export_response(stmt, fmt, 'blood-requests')
 
 @blood_request_bp.route('/<int:id>', methods=['GET'])
 @jwt_required()
@@ -85,13 +262,17 @@ def get_blood_requests():
         },
         404: {
             'description': 'Blood request not found'
+        },
+        304: {
+            'description': 'Not modified since the ETag sent in If-None-Match'
         }
     }
 })
 def get_blood_request(id):
     req = db.session.get(BloodRequest, id)
     if req:
-        return jsonify(req.to_dict()), 200
+        etag = conditional.make_etag(req.id, req.updated_at)
+        return conditional.not_modified(etag) or conditional.with_etag(jsonify(req.to_dict()), etag)
     return jsonify({'message': 'Blood request not found'}), 404
 
 @blood_request_bp.route('/', methods=['POST'])
@@ -112,6 +293,8 @@ def get_blood_request(id):
                                     'quantity': {'type': 'integer'},
                 'phone': {'type': 'string'},
                     'location': {'type': 'string'},
+                    'latitude': {'type': 'number'},
+                    'longitude': {'type': 'number'},
                     'donor_id': {'type': 'string', 'nullable': True}
                 }
             }
@@ -123,6 +306,9 @@ def get_blood_request(id):
             'schema': {
                 '$ref': '#/definitions/BloodRequest'
             }
+        },
+        400: {
+            'description': 'Invalid coordinates'
         }
     }
 })
@@ -130,6 +316,11 @@ def create_blood_request():
     data = request.get_json()
     requester_id = get_jwt_identity()
 
+    try:
+        latitude, longitude = geo.validate_coordinates(data.get('latitude'), data.get('longitude'))
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+
     new_request = BloodRequest(
         requester_id=requester_id,
         blood_type=data.get('blood_type'),
@@ -137,9 +328,13 @@ def create_blood_request():
         name=data.get('name'),
         phone=data.get('phone'),
         location=data.get('location'),
-        donor_id=data.get('donor_id')
+        donor_id=data.get('donor_id'),
+        latitude=latitude,
+        longitude=longitude
     )
     db.session.add(new_request)
+    # Donors are found and notified in the background, after the response
+    queue_matching(new_request)
     db.session.commit()
     return jsonify(new_request.to_dict()), 201
 
@@ -163,7 +358,7 @@ def create_blood_request():
                 'type': 'object',
                 'properties': {
                     'donor_id': {'type': 'string', 'nullable': True},
-                    'status': {'type': 'string'}
+                    'status': {'type': 'string', 'enum': list(STATUSES), 'description': 'Case-insensitive'}
                 }
             }
         }
@@ -175,6 +370,9 @@ def create_blood_request():
                 '$ref': '#/definitions/BloodRequest'
             }
         },
+        400: {
+            'description': 'Unknown status'
+        },
         401: {
             'description': 'Unauthorized'
         },
@@ -193,9 +391,166 @@ def update_blood_request(id):
         return jsonify({'message': 'Unauthorized'}), 401
 
     data = request.get_json()
+    if 'status' in data:
+        try:
+            req.status = normalize_status(data['status'])
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
     req.donor_id = data.get('donor_id', req.donor_id)
-    req.status = data.get('status', req.status)
     db.session.commit()
     return jsonify(req.to_dict()), 200
 
+@blood_request_bp.route('/<int:id>/matches', methods=['GET'])
+@jwt_required()
+@swag_from({
+    'tags': ['Blood Request'],
+    'security': [{'BearerAuth': []}],
+    'parameters': [
+        {
+            'name': 'id',
+            'in': 'path',
+            'type': 'integer',
+            'required': True
+        },
+        {
+            'name': 'limit',
+            'in': 'query',
+            'type': 'integer',
+            'required': False,
+            'description': 'Maximum number of donors to return (capped by PAGINATION_MAX_LIMIT)'
+        }
+    ],
+    'responses': {
+        200: {
+            'description': 'Eligible donors whose blood is ABO/Rh compatible with the request, other than the requester: best matching blood type first, then those eligible longest first',
+            'schema': {
+                'type': 'array',
+                'items': {
+                    '$ref': '#/definitions/Donor'
+                }
+            }
+        },
+        400: {
+            'description': 'Invalid limit or unknown blood type on the request'
+        },
+        404: {
+            'description': 'Blood request not found'
+        },
+        304: {
+            'description': 'Not modified since the ETag sent in If-None-Match'
+        }
+    }
+})
+@conditional.versioned('blood_request', 'donor', 'user', vary=eligibility_day)
+def get_blood_request_matches(id):
+    try:
+        limit, _ = get_page_args()
+    except InvalidPageRequest as e:
+        return jsonify({'message': str(e)}), 400
+
+    req = db.session.execute(
+        select(BloodRequest.blood_type, BloodRequest.requester_id).where(BloodRequest.id == id)
+    ).first()
+    if req is None:
+        return jsonify({'message': 'Blood request not found'}), 404
+
+    donor_types = compatible_donor_types(req.blood_type)
+    if not donor_types:
+        return jsonify({'message': f'Unknown blood type {req.blood_type}'}), 400
+
+    now = datetime.datetime.utcnow()
+    # One branch per compatible type, each a range scan on ix_donor_blood_type_eligible
+    # that reads donors longest eligible first and stops after `limit` rows; the
+    # branches are then merged in rank order.
+    branches = [
+        select(
+            select(*Donor.projection(), literal(rank).label('match_rank'))
+            .join(User, Donor.user_id == User.id)
+            .where(Donor.blood_type == donor_type, Donor.eligible(now), Donor.user_id != req.requester_id)
+            .order_by(Donor.eligible_from, Donor.id)
+            .limit(limit)
+            .subquery()
+        )
+        for rank, donor_type in enumerate(donor_types)
+    ]
+    matches = union_all(*branches).subquery()
+    query = select(matches).order_by(matches.c.match_rank, matches.c.eligible_from, matches.c.id).limit(limit)
+    return jsonify([Donor.row_to_dict(row) for row in db.session.execute(query)]), 200
+
+@blood_request_bp.route('/import', methods=['POST'])
+@jwt_required()
+@swag_from({
+    'tags': ['Blood Request'],
+    'security': [{'BearerAuth': []}],
+    'consumes': ['application/x-ndjson', 'text/csv'],
+    'parameters': [
+        {
+            'name': 'body',
+            'in': 'body',
+            'required': True,
+            'description': 'Blood requests to create, all owned by the caller. One JSON object per line (application/x-ndjson) or CSV with a header row (text/csv). Fields: blood_type, quantity, location, name, phone, latitude, longitude, donor_id, status (case-insensitive, default Pending)',
+            'schema': {'type': 'string'}
+        }
+    ],
+    'responses': {
+        200: {
+            'description': 'Import report; rows that failed are listed by line number',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'inserted': {'type': 'integer'},
+                    'failed': {'type': 'integer'},
+                    'errors': {
+                        'type': 'array',
+                        'items': {
+                            'type': 'object',
+                            'properties': {
+                                'line': {'type': 'integer'},
+                                'error': {'type': 'string'}
+                            }
+                        }
+                    }
+                }
+            }
+        },
+        415: {
+            'description': 'Unsupported content type'
+        }
+    }
+})
+def import_blood_requests():
+    requester_id = int(get_jwt_identity())
+
+    def validate(record):
+        bulk.require(record, 'blood_type', 'quantity', 'location', 'name')
+        if record['blood_type'] not in BLOOD_TYPES:
+            raise ValueError(f"Unknown blood type {record['blood_type']!r}")
+        quantity = float(record['quantity'])
+        # float() also accepts "inf" and "nan"
+        if not math.isfinite(quantity) or quantity <= 0:
+            raise ValueError('quantity must be a positive number')
+        latitude, longitude = geo.validate_coordinates(record.get('latitude'), record.get('longitude'))
+        return {
+            'requester_id': requester_id,
+            'blood_type': record['blood_type'],
+            'quantity': quantity,
+            'location': record['location'],
+            'name': record['name'],
+            'phone': record.get('phone'),
+            'status': normalize_status(record['status']) if record.get('status') else 'Pending',
+            'donor_id': int(record['donor_id']) if record.get('donor_id') else None,
+            'latitude': latitude,
+            'longitude': longitude,
+        }
+
+    def after_insert(rows):
+        # Core inserts skip the ORM listeners that keep User.request_count and blood_stats in sync
+        connection = db.session.connection()
+        for user_id, count in Counter(row['requester_id'] for row in rows).items():
+            bump_counter(connection, 'request_count', user_id, count)
+        deltas = new_deltas()
+        for row in rows:
+            add_requests(deltas, row['blood_type'], row['location'], row['status'], 1, row['quantity'])
+        bump_stats(connection, deltas)
 
+    return bulk.import_records(BloodRequest, validate, after_insert=after_insert)
@@ -0,0 +1,174 @@
+from collections import Counter, defaultdict
+from sqlalchemy import select
+from database import db
+from serialization import serializer
+from models.BloodDonation.model import BloodDonation
+from models.BloodRequest.model import BloodRequest
+from models.Donor.model import Donor
+from models.TableVersion.model import upsert_insert
+from models.User.model import User
+
+COUNTS = ('pending_requests', 'units_requested', 'total_requests', 'fulfilled_requests', 'available_donors', 'donations')
+
+
+class BloodStats(db.Model):
+    """Supply and demand per blood type and location.
+
+    Kept current by the listeners below, which adjust the counts in the same
+    transaction as each ORM write to a request, donor or donation; Core bulk
+    imports call :func:`bump_stats` themselves. Anything that slips past both
+    (a raw SQL fix, a user who moves) is corrected by the periodic
+    ``reconcile_stats`` job.
+    """
+    __tablename__ = 'blood_stats'
+
+    blood_type = db.Column(db.String(3), primary_key=True)
+    # See location_key; '' when unknown
+    location = db.Column(db.String(120), primary_key=True)
+    pending_requests = db.Column(db.Integer, default=0, nullable=False)
+    # Sum of quantity over pending requests
+    units_requested = db.Column(db.Float, default=0, nullable=False)
+    total_requests = db.Column(db.Integer, default=0, nullable=False)
+    fulfilled_requests = db.Column(db.Integer, default=0, nullable=False)
+    # Donors with is_available set, whether or not they are past their deferral:
+    # eligibility changes with the date rather than with a write, so no listener
+    # could keep a count of it current
+    available_donors = db.Column(db.Integer, default=0, nullable=False)
+    donations = db.Column(db.Integer, default=0, nullable=False)
+
+    to_dict = serializer(
+        'blood_type',
+        'location',
+        'pending_requests',
+        'units_requested',
+        'available_donors',
+        'donations',
+        'total_requests',
+        'fulfilled_requests',
+        ('fulfilment_rate', lambda stats: round(stats.fulfilled_requests / stats.total_requests, 4)
+                            if stats.total_requests else None),
+    )
+
+
+def location_key(location):
+    """Locations are free text; stats group them case- and whitespace-insensitively."""
+    return (location or '').strip().lower()
+
+
+def new_deltas():
+    """``(blood_type, location_key) -> Counter`` of column deltas, for :func:`bump_stats`."""
+    return defaultdict(Counter)
+
+
+def add_requests(deltas, blood_type, location, status, count, units):
+    """Count ``count`` requests totalling ``units``; both negative to take them away."""
+    counts = deltas[blood_type, location_key(location)]
+    counts['total_requests'] += count
+    if status == 'Pending':
+        counts['pending_requests'] += count
+        counts['units_requested'] += units or 0
+    elif status == 'Fulfilled':
+        counts['fulfilled_requests'] += count
+
+
+def add_donors(deltas, connection, user_ids, sign=1):
+    """Count available donors for ``user_ids`` (one entry per donor) under their user's blood type and location."""
+    per_user = Counter(user_ids)
+    users = connection.execute(
+        select(User.id, User.blood_type, User.location).where(User.id.in_(per_user))
+    ).all()
+    for user in users:
+        deltas[user.blood_type, location_key(user.location)]['available_donors'] += sign * per_user[user.id]
+
+
+def bump_stats(connection, deltas):
+    """Apply ``deltas`` to ``blood_stats`` on ``connection``, creating rows as needed."""
+    table = BloodStats.__table__
+    # Sorted so concurrent writers lock the rows in the same order
+    rows = [
+        {'blood_type': blood_type, 'location': location, **{column: counts.get(column, 0) for column in COUNTS}}
+        for (blood_type, location), counts in sorted(deltas.items()) if any(counts.values())
+    ]
+    if not rows:
+        return
+    upsert = upsert_insert(connection)
+    if upsert is not None:
+        # One executemany however many rows a bulk import touches
+        stmt = upsert(table)
+        connection.execute(stmt.on_conflict_do_update(
+            index_elements=[table.c.blood_type, table.c.location],
+            set_={column: table.c[column] + stmt.excluded[column] for column in COUNTS},
+        ), rows)
+        return
+    for row in rows:
+        result = connection.execute(
+            table.update().where(table.c.blood_type == row['blood_type'], table.c.location == row['location'])
+            .values({column: table.c[column] + row[column] for column in COUNTS})
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(row))
+
+
+def _history(target, attr):
+    """The value of ``attr`` before the flush in progress."""
+    history = db.inspect(target).attrs[attr].history
+    return history.deleted[0] if history.deleted else getattr(target, attr)
+
+
+@db.event.listens_for(BloodRequest, 'after_insert')
+def _request_inserted(mapper, connection, target):
+    deltas = new_deltas()
+    add_requests(deltas, target.blood_type, target.location, target.status, 1, target.quantity)
+    bump_stats(connection, deltas)
+
+@db.event.listens_for(BloodRequest, 'after_update')
+def _request_updated(mapper, connection, target):
+    fields = ('blood_type', 'location', 'status', 'quantity')
+    blood_type, location, status, quantity = before = [_history(target, attr) for attr in fields]
+    if before != [getattr(target, attr) for attr in fields]:
+        deltas = new_deltas()
+        add_requests(deltas, blood_type, location, status, -1, -(quantity or 0))
+        add_requests(deltas, target.blood_type, target.location, target.status, 1, target.quantity)
+        bump_stats(connection, deltas)
+
+@db.event.listens_for(BloodRequest, 'after_delete')
+def _request_deleted(mapper, connection, target):
+    deltas = new_deltas()
+    add_requests(deltas, target.blood_type, target.location, target.status, -1, -(target.quantity or 0))
+    bump_stats(connection, deltas)
+
+@db.event.listens_for(Donor, 'after_insert')
+def _donor_inserted(mapper, connection, target):
+    if target.is_available:
+        deltas = new_deltas()
+        add_donors(deltas, connection, [target.user_id])
+        bump_stats(connection, deltas)
+
+@db.event.listens_for(Donor, 'after_update')
+def _donor_updated(mapper, connection, target):
+    was_available = bool(_history(target, 'is_available'))
+    if was_available != bool(target.is_available):
+        deltas = new_deltas()
+        add_donors(deltas, connection, [target.user_id], sign=1 if target.is_available else -1)
+        bump_stats(connection, deltas)
+
+@db.event.listens_for(Donor, 'after_delete')
+def _donor_deleted(mapper, connection, target):
+    if target.is_available:
+        deltas = new_deltas()
+        add_donors(deltas, connection, [target.user_id], sign=-1)
+        bump_stats(connection, deltas)
+
+def _donation_bumped(connection, target, sign):
+    location = connection.scalar(select(User.location).where(User.id == target.userId))
+    deltas = new_deltas()
+    deltas[target.bloodGroup, location_key(location)]['donations'] += sign
+    bump_stats(connection, deltas)
+
+@db.event.listens_for(BloodDonation, 'after_insert')
+def _donation_inserted(mapper, connection, target):
+    _donation_bumped(connection, target, 1)
+
+@db.event.listens_for(BloodDonation, 'after_delete')
+def _donation_deleted(mapper, connection, target):
+    _donation_bumped(connection, target, -1)
@@ -0,0 +1,58 @@
+from flask import Blueprint, request, jsonify
+from models.BloodStats.model import BloodStats, location_key
+# Imported to register the reconcile_stats job
+from models.BloodStats import reconcile
+from apidocs import swag_from
+import conditional
+from flask_jwt_extended import jwt_required
+
+stats_bp = Blueprint('stats', __name__, url_prefix='/stats')
+
+@stats_bp.route('/', methods=['GET'])
+@jwt_required()
+@swag_from({
+    'tags': ['Stats'],
+    'security': [{'BearerAuth': []}],
+    'parameters': [
+        {
+            'name': 'blood_type',
+            'in': 'query',
+            'type': 'string',
+            'required': False,
+            'description': 'Only this blood type'
+        },
+        {
+            'name': 'location',
+            'in': 'query',
+            'type': 'string',
+            'required': False,
+            'description': 'Only this location (case-insensitive)'
+        }
+    ],
+    'responses': {
+        200: {
+            'description': 'Supply and demand per blood type and location, read from the summary table. available_donors counts donors who are marked available, including those still deferred after a recent donation',
+            'schema': {
+                'type': 'array',
+                'items': {
+                    '$ref': '#/definitions/BloodStats'
+                }
+            }
+        },
+        304: {
+            'description': 'Not modified since the ETag sent in If-None-Match'
+        }
+    }
+})
+# Writes that move a count bump their source table; reconciliation bumps blood_stats
+@conditional.versioned('blood_stats', 'blood_request', 'donor', 'blood_donation')
+def get_stats():
+    query = BloodStats.query
+    blood_type = request.args.get('blood_type')
+    location = request.args.get('location')
+    if blood_type:
+        query = query.filter_by(blood_type=blood_type)
+    if location is not None:
+        query = query.filter_by(location=location_key(location))
+    stats = query.order_by(BloodStats.blood_type, BloodStats.location).all()
+    return jsonify([row.to_dict() for row in stats]), 200
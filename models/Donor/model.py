@@ -1,30 +1,132 @@
+from flask import current_app
+from sqlalchemy import select
 from database import db
+from models.User.model import User
+from serialization import serializer
 import datetime
 
+# eligible_from of donors who have never donated: always in the past, so
+# "eligible now" is one comparison on eligible_from without an IS NULL branch
+NEVER_DONATED = datetime.datetime(1970, 1, 1)
+
+def eligible_from(last_donation, deferral_days):
+    """When a donor who last gave blood at ``last_donation`` may donate again.
+
+    Midnight (UTC) starting the day ``deferral_days`` after it, so eligibility
+    only ever changes at a day boundary; see :func:`eligibility_day`.
+    """
+    if last_donation is None:
+        return NEVER_DONATED
+    return datetime.datetime.combine(last_donation.date() + datetime.timedelta(days=deferral_days), datetime.time())
+
+def eligibility_day():
+    """What, besides table writes, decides who is eligible: the current UTC date.
+
+    For ``conditional.versioned(vary=...)``, so cached eligibility lists expire at midnight.
+    """
+    return datetime.datetime.utcnow().date()
+
+def _eligible_from_json(value):
+    # null rather than the 1970 placeholder for donors who have never donated
+    return None if value is None or value <= NEVER_DONATED else value
+
 class Donor(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, unique=True)
     medical_history = db.Column(db.Text, nullable=True)
     is_available = db.Column(db.Boolean, default=True)
     last_donation = db.Column(db.DateTime, nullable=True)
+    # Start of the day DONATION_DEFERRAL_DAYS after last_donation, kept in sync by _sync_eligible_from
+    eligible_from = db.Column(db.DateTime, default=NEVER_DONATED, nullable=False)
+    # Copy of user.blood_type, kept in sync by _sync_blood_type, so one index
+    # serves "eligible donors of this type, longest eligible first"
+    blood_type = db.Column(db.String(3), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow, nullable=False)
 
     user = db.relationship('User', back_populates='donor')
 
+    __table_args__ = (
+        db.Index('ix_donor_created_at_id', 'created_at', 'id'),
+        # Matches: blood_type = ? AND is_available AND eligible_from <= now ORDER BY eligible_from, id
+        db.Index('ix_donor_blood_type_eligible', 'blood_type', 'is_available', 'eligible_from'),
+    )
+
     def __init__(self, user_id, medical_history=None, is_available=True, last_donation=None):
         self.user_id = user_id
         self.medical_history = medical_history
         self.is_available = is_available
         self.last_donation = last_donation
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'user': self.user.to_dict(),
-            'medical_history': self.medical_history,
-            'is_available': self.is_available,
-            'last_donation': self.last_donation.isoformat() if self.last_donation else None,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat()
-        }
+    to_dict = serializer(
+        'id',
+        ('user', 'user', User.to_dict),
+        'medical_history',
+        'is_available',
+        'last_donation',
+        ('eligible_from', 'eligible_from', _eligible_from_json),
+        'created_at',
+        'updated_at',
+    )
+
+    @staticmethod
+    def eligible(now=None):
+        """Filter for donors who are available and past their deferral period at ``now``."""
+        now = now or datetime.datetime.utcnow()
+        return db.and_(Donor.is_available.is_(True), Donor.eligible_from <= now)
+
+    @staticmethod
+    def projection():
+        """Columns needed by the Donor response, for use in a single ``Donor JOIN User`` select."""
+        return (
+            Donor.id,
+            Donor.medical_history,
+            Donor.is_available,
+            Donor.last_donation,
+            Donor.eligible_from,
+            Donor.created_at,
+            Donor.updated_at,
+            User.id.label('user_id'),
+            User.name.label('user_name'),
+            User.email.label('user_email'),
+            User.blood_type.label('user_blood_type'),
+            User.location.label('user_location'),
+            User.gender.label('user_gender'),
+            User.latitude.label('user_latitude'),
+            User.longitude.label('user_longitude'),
+            User.created_at.label('user_created_at'),
+            User.updated_at.label('user_updated_at'),
+            User.donation_count.label('user_donation_count'),
+            User.request_count.label('user_request_count'),
+        )
+
+    # Serializes a row selected with projection(); same shape as to_dict
+    row_to_dict = staticmethod(serializer(
+        'id',
+        ('user', serializer(*((key, f'user_{attr}') for key, attr in User.FIELDS))),
+        'medical_history',
+        'is_available',
+        'last_donation',
+        ('eligible_from', 'eligible_from', _eligible_from_json),
+        'created_at',
+        'updated_at',
+    ))
+
+
+@db.event.listens_for(Donor, 'before_insert')
+@db.event.listens_for(Donor, 'before_update')
+def _sync_eligible_from(mapper, connection, target):
+    target.eligible_from = eligible_from(target.last_donation, current_app.config['DONATION_DEFERRAL_DAYS'])
+
+
+@db.event.listens_for(Donor, 'before_insert')
+def _sync_blood_type(mapper, connection, target):
+    # Rendered into the INSERT, so it costs no extra round trip
+    target.blood_type = select(User.blood_type).where(User.id == target.user_id).scalar_subquery()
+
+
+@db.event.listens_for(User, 'after_update')
+def _sync_donor_blood_type(mapper, connection, target):
+    if db.inspect(target).attrs.blood_type.history.deleted:
+        table = Donor.__table__
+        connection.execute(table.update().where(table.c.user_id == target.id).values(blood_type=target.blood_type))
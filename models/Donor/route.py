@@ -1,12 +1,40 @@
-from flask import Blueprint, jsonify, request
-from models.Donor.model import Donor
+from flask import Blueprint, current_app, jsonify, request
+from sqlalchemy import select
+from models.Donor.model import Donor, eligibility_day, eligible_from
 from models.User.model import User
+from models.BloodStats.model import add_donors, bump_stats, new_deltas
 from database import db
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from flasgger import swag_from
+from apidocs import swag_from
+import conditional
+import bulk
+import geo
+import search
+from pagination import InvalidPageRequest, get_page_args, keyset, split_page, page_response
 
 donor_bp = Blueprint('donor_bp', __name__, url_prefix='/donors')
 
+def _nearest(query, latitude, longitude, radius_km, k):
+    """The ``k`` rows of ``query`` nearest to the point, as ``(distance_km, row)``.
+
+    Walks grid rings outwards (see :func:`geo.rings`) with one ``geo_cell IN``
+    lookup per ring, and stops as soon as the k-th candidate is provably closer
+    than anything in the unvisited rings, or the radius is fully covered
+    (at most ``geo.MAX_RINGS`` lookups).
+    """
+    found = []
+    for cells, covered_km in geo.rings(latitude, longitude, radius_km):
+        if not cells:
+            continue
+        for row in db.session.execute(query.where(User.geo_cell.in_(cells))):
+            distance = geo.haversine_km(latitude, longitude, row.user_latitude, row.user_longitude)
+            if distance <= radius_km:
+                found.append((distance, row))
+        found.sort(key=lambda item: item[0])
+        if covered_km >= radius_km or (len(found) >= k and found[k - 1][0] <= covered_km):
+            break
+    return found[:k]
+
 @donor_bp.route('/', methods=['GET'])
 @jwt_required()
 @swag_from({
@@ -33,38 +61,107 @@ donor_bp = Blueprint('donor_bp', __name__, url_prefix='/donors')
             'type': 'string',
             'required': False,
             'description': 'Filter by donor name (case-insensitive)'
+        },
+        {
+            'name': 'near',
+            'in': 'query',
+            'type': 'string',
+            'required': False,
+            'description': 'lat,lon; returns the nearest eligible donors ordered by distance (no cursor)'
+        },
+        {
+            'name': 'eligible',
+            'in': 'query',
+            'type': 'boolean',
+            'required': False,
+            'description': 'Only donors who are available and past their deferral period after their last donation'
+        },
+        {
+            'name': 'radius_km',
+            'in': 'query',
+            'type': 'number',
+            'required': False,
+            'description': 'Search radius for near, capped by GEO_MAX_RADIUS_KM'
+        },
+        {
+            'name': 'limit',
+            'in': 'query',
+            'type': 'integer',
+            'required': False,
+            'description': 'Page size (capped by PAGINATION_MAX_LIMIT)'
+        },
+        {
+            'name': 'cursor',
+            'in': 'query',
+            'type': 'string',
+            'required': False,
+            'description': 'Opaque cursor taken from the X-Next-Cursor header of the previous page'
         }
     ],
     'responses': {
         200: {
-            'description': 'A list of donors, optionally filtered',
+            'description': 'A page of donors, optionally filtered',
             'schema': {
                 'type': 'array',
                 'items': {
                     '$ref': '#/definitions/Donor'
                 }
             }
+        },
+        400: {
+            'description': 'Invalid limit, cursor, near or radius_km'
+        },
+        304: {
+            'description': 'Not modified since the ETag sent in If-None-Match'
         }
     }
 })
+@conditional.versioned('donor', 'user', vary=eligibility_day)
 def get_donors():
-    query = Donor.query.join(User)
+    try:
+        limit, cursor = get_page_args()
+    except InvalidPageRequest as e:
+        return jsonify({'message': str(e)}), 400
+
+    # Plain rows straight from one joined SELECT; no ORM identities or lazy loads
+    query = select(*Donor.projection()).join(User, Donor.user_id == User.id)
 
     blood_group = request.args.get('blood_group')
     location = request.args.get('location')
     name = request.args.get('name')
 
+    if request.args.get('eligible', '').lower() in ('1', 'true', 'yes'):
+        query = query.where(Donor.eligible())
     if blood_group:
         query = query.filter(User.blood_type == blood_group)
 
+    dialect = db.engine.dialect.name
     if location:
-        query = query.filter(User.location.ilike(f'%{location}%'))
+        query = query.filter(search.contains(dialect, User.id, User.location, location))
 
     if name:
-        query = query.filter(User.name.ilike(f'%{name}%'))
+        query = query.filter(search.contains(dialect, User.id, User.name, name))
 
-    donors = query.all()
-    return jsonify([donor.to_dict() for donor in donors]), 200
+    near = request.args.get('near')
+    if near:
+        try:
+            latitude, longitude = geo.parse_near(near)
+            radius_km = float(request.args.get('radius_km', current_app.config['GEO_DEFAULT_RADIUS_KM']))
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
+        radius_km = min(radius_km, current_app.config['GEO_MAX_RADIUS_KM'])
+
+        query = query.where(Donor.eligible())
+        donors = []
+        for distance, row in _nearest(query, latitude, longitude, radius_km, limit):
+            donor = Donor.row_to_dict(row)
+            donor['distance_km'] = round(distance, 3)
+            donors.append(donor)
+        return page_response(donors, None), 200
+
+    rows = db.session.execute(keyset(query, Donor.created_at, Donor.id, limit, cursor)).all()
+    rows, next_cursor = split_page(rows, limit)
+    return page_response([Donor.row_to_dict(row) for row in rows], next_cursor), 200
 
 @donor_bp.route('/<int:id>', methods=['GET'])
 @jwt_required()
@@ -88,13 +185,18 @@ def get_donors():
         },
         404: {
             'description': 'Donor not found'
+        },
+        304: {
+            'description': 'Not modified since the ETag sent in If-None-Match'
         }
     }
 })
 def get_donor(id):
     donor = db.session.get(Donor, id)
     if donor:
-        return jsonify(donor.to_dict()), 200
+        user = donor.user
+        etag = conditional.make_etag(donor.id, donor.updated_at, user.updated_at, user.donation_count, user.request_count)
+        return conditional.not_modified(etag) or conditional.with_etag(jsonify(donor.to_dict()), etag)
     return jsonify({'message': 'Donor not found'}), 404
 
 @donor_bp.route('/', methods=['POST'])
@@ -124,16 +226,23 @@ def get_donor(id):
             'schema': {
                 '$ref': '#/definitions/Donor'
             }
+        },
+        400: {
+            'description': 'Invalid last_donation'
         }
     }
 })
 def create_donor():
     data = request.get_json()
+    try:
+        last_donation = bulk.parse_datetime(data['last_donation']) if data.get('last_donation') else None
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
     new_donor = Donor(
         user_id=int(get_jwt_identity()),
         medical_history=data.get('medical_history', ''),
         is_available=data.get('is_available', True),
-        last_donation=data.get('last_donation', None)
+        last_donation=last_donation
     )
     db.session.add(new_donor)
     db.session.commit()
@@ -174,6 +283,9 @@ def create_donor():
                 '$ref': '#/definitions/Donor'
             }
         },
+        400: {
+            'description': 'Invalid last_donation'
+        },
         401: {
             'description': 'Unauthorized'
         },
@@ -192,8 +304,93 @@ def update_donor(id):
         return jsonify({'message': 'Unauthorized'}), 401
 
     data = request.get_json()
+    if 'last_donation' in data:
+        try:
+            donor.last_donation = bulk.parse_datetime(data['last_donation']) if data['last_donation'] else None
+        except ValueError as e:
+            return jsonify({'message': str(e)}), 400
     donor.medical_history = data.get('medical_history', donor.medical_history)
     donor.is_available = data.get('is_available', donor.is_available)
-    donor.last_donation = data.get('last_donation', donor.last_donation)
     db.session.commit()
     return jsonify(donor.to_dict()), 200
+
+@donor_bp.route('/import', methods=['POST'])
+@jwt_required()
+@swag_from({
+    'tags': ['Donor'],
+    'security': [{'BearerAuth': []}],
+    'consumes': ['application/x-ndjson', 'text/csv'],
+    'parameters': [
+        {
+            'name': 'body',
+            'in': 'body',
+            'required': True,
+            'description': 'Donor profiles to create for existing users, who need not be the caller (e.g. accounts just created with /users/import). One JSON object per line (application/x-ndjson) or CSV with a header row (text/csv). Fields: user_id, medical_history, is_available, last_donation',
+            'schema': {'type': 'string'}
+        }
+    ],
+    'responses': {
+        200: {
+            'description': 'Import report; rows that failed are listed by line number',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'inserted': {'type': 'integer'},
+                    'failed': {'type': 'integer'},
+                    'errors': {
+                        'type': 'array',
+                        'items': {
+                            'type': 'object',
+                            'properties': {
+                                'line': {'type': 'integer'},
+                                'error': {'type': 'string'}
+                            }
+                        }
+                    }
+                }
+            }
+        },
+        415: {
+            'description': 'Unsupported content type'
+        }
+    }
+})
+def import_donors():
+    """Bulk-create donor profiles from an NDJSON or CSV stream.
+
+    Unlike ``POST /donors/``, rows may name any ``user_id``: this is the
+    second half of onboarding a blood drive, after ``POST /users/import``
+    created the accounts, and whoever runs it registers donors for people
+    other than themselves. A profile only makes its user a candidate for
+    matching and notifications; it exposes nothing about them, and each user
+    can still edit or mark themselves unavailable through ``PUT /donors/<id>``.
+    """
+    return bulk.import_records(Donor, _validate_donor_row, _copy_blood_types, _count_imported_donors)
+
+def _validate_donor_row(record):
+    bulk.require(record, 'user_id')
+    last_donation = bulk.parse_datetime(record['last_donation']) if record.get('last_donation') else None
+    return {
+        'user_id': int(record['user_id']),
+        'medical_history': record.get('medical_history', ''),
+        'is_available': bulk.parse_bool(record.get('is_available', True)),
+        'last_donation': last_donation,
+        # Core inserts skip the listener that maintains it
+        'eligible_from': eligible_from(last_donation, current_app.config['DONATION_DEFERRAL_DAYS']),
+    }
+
+def _copy_blood_types(rows):
+    # Core inserts skip the listener that copies it from the user; rows naming
+    # an unknown user keep None and fail the insert
+    blood_types = dict(db.session.execute(
+        select(User.id, User.blood_type).where(User.id.in_({row['user_id'] for row in rows}))
+    ).all())
+    for row in rows:
+        row['blood_type'] = blood_types.get(row['user_id'])
+
+def _count_imported_donors(rows):
+    # Core inserts skip the ORM listeners that keep blood_stats in sync
+    connection = db.session.connection()
+    deltas = new_deltas()
+    add_donors(deltas, connection, [row['user_id'] for row in rows if row['is_available']])
+    bump_stats(connection, deltas)
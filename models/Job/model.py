@@ -0,0 +1,32 @@
+from database import db
+import datetime
+
+class Job(db.Model):
+    """A unit of background work, stored so it outlives the process that queued it.
+
+    Jobs are inserted in the transaction of the write that caused them and
+    deleted once they succeed. A job whose attempts run out stays behind as
+    ``failed`` with the last error, for someone to look at.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(64), nullable=False)
+    payload = db.Column(db.JSON, nullable=False)
+    # pending -> running -> (deleted | pending again | failed)
+    status = db.Column(db.String(16), default='pending', nullable=False)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    max_attempts = db.Column(db.Integer, nullable=False)
+    run_at = db.Column(db.DateTime, default=datetime.datetime.utcnow, nullable=False)
+    locked_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.datetime.utcnow, nullable=False)
+
+    # No list is built from jobs, so writes to them need no table_version bump
+    __versioned__ = False
+
+    # Workers look for the oldest due pending job
+    __table_args__ = (
+        db.Index('ix_job_status_run_at', 'status', 'run_at'),
+    )
+
+    def __repr__(self):
+        return f'<Job {self.id} {self.kind} {self.status}>'
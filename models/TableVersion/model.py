@@ -0,0 +1,48 @@
+import importlib
+from sqlalchemy import select
+from database import db
+
+class TableVersion(db.Model):
+    """Write counter per table, bumped in the same transaction as the write.
+
+    List ETags are derived from these, so a poll that finds nothing changed
+    costs one primary-key lookup instead of the list query.
+    """
+    name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<TableVersion {self.name}={self.version}>'
+
+
+# Dialects with INSERT .. ON CONFLICT; imported on first use since the
+# postgresql module alone costs ~50ms of startup on SQLite deployments
+_UPSERT_DIALECTS = ('sqlite', 'postgresql')
+
+def upsert_insert(connection):
+    """The dialect's ``insert`` with ``on_conflict_do_update``, or ``None`` where there is none."""
+    if connection.dialect.name in _UPSERT_DIALECTS:
+        return importlib.import_module(f'sqlalchemy.dialects.{connection.dialect.name}').insert
+    return None
+
+def bump_versions(connection, *names):
+    """Increment the version of each table in ``names`` on ``connection``."""
+    table = TableVersion.__table__
+    # Sorted so concurrent writers lock the rows in the same order
+    names = sorted(set(names))
+    upsert = upsert_insert(connection)
+    if upsert is not None:
+        stmt = upsert(table).values([{'name': name, 'version': 1} for name in names])
+        connection.execute(stmt.on_conflict_do_update(index_elements=[table.c.name], set_={'version': table.c.version + 1}))
+        return
+    for name in names:
+        result = connection.execute(table.update().where(table.c.name == name).values(version=table.c.version + 1))
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(name=name, version=1))
+
+def get_versions(*names):
+    """Current version of each table in ``names``; tables never written are at 0."""
+    rows = db.session.execute(select(TableVersion.name, TableVersion.version).where(TableVersion.name.in_(names)))
+    versions = dict.fromkeys(names, 0)
+    versions.update((name, version) for name, version in rows)
+    return versions
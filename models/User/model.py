@@ -1,16 +1,32 @@
 from database import db
-from werkzeug.security import generate_password_hash, check_password_hash
+from hashing import get_hasher
 import datetime
+from collections import namedtuple
+import geo
+import search
+from serialization import serializer
 from models.BloodDonation.model import BloodDonation
+from models.BloodRequest.model import BloodRequest
+from models.TableVersion.model import bump_versions
+
+# Immutable snapshot of the fields auth needs; safe to cache across requests
+UserIdentity = namedtuple('UserIdentity', 'id name email blood_type location gender')
 
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(80), nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(256), nullable=False)
-    blood_type = db.Column(db.String(3), nullable=False)
+    blood_type = db.Column(db.String(3), nullable=False, index=True)
     location = db.Column(db.String(120), nullable=True)
     gender = db.Column(db.String(10), nullable=True)
+    latitude = db.Column(db.Float, nullable=True)
+    longitude = db.Column(db.Float, nullable=True)
+    # Grid cell of (latitude, longitude), see geo.py; kept in sync by _sync_geo_cell
+    geo_cell = db.Column(db.Integer, nullable=True, index=True)
+    # Denormalised counters, kept in sync by the BloodDonation/BloodRequest listeners below
+    donation_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    request_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow, nullable=False)
     
@@ -18,22 +34,68 @@ class User(db.Model):
     donations = db.relationship('BloodDonation', back_populates='user', lazy='dynamic')
     requests = db.relationship('BloodRequest', foreign_keys='BloodRequest.requester_id', back_populates='requester', lazy='dynamic')
 
+    __table_args__ = (
+        db.Index('ix_user_created_at_id', 'created_at', 'id'),
+    )
+
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = get_hasher().hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
-
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'name': self.name,
-            'email': self.email,
-            'blood_type': self.blood_type,
-            'location': self.location,
-            'gender': self.gender,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat(),
-            'donations': self.donations.count(),
-            'requests': self.requests.count()
-        }
+        return get_hasher().verify(self.password_hash, password)
+
+    def password_needs_rehash(self):
+        return get_hasher().needs_rehash(self.password_hash)
+
+    def identity(self):
+        return UserIdentity(self.id, self.name, self.email, self.blood_type, self.location, self.gender)
+
+    # (key, attribute) pairs of the response; dates are encoded by the JSON provider
+    FIELDS = (
+        ('id', 'id'),
+        ('name', 'name'),
+        ('email', 'email'),
+        ('blood_type', 'blood_type'),
+        ('location', 'location'),
+        ('gender', 'gender'),
+        ('latitude', 'latitude'),
+        ('longitude', 'longitude'),
+        ('created_at', 'created_at'),
+        ('updated_at', 'updated_at'),
+        ('donations', 'donation_count'),
+        ('requests', 'request_count'),
+    )
+    to_dict = serializer(*FIELDS)
+
+
+db.event.listen(User.__table__, 'after_create', search.install)
+db.event.listen(User.__table__, 'before_drop', search.uninstall)
+
+@db.event.listens_for(User, 'before_insert')
+@db.event.listens_for(User, 'before_update')
+def _sync_geo_cell(mapper, connection, target):
+    target.geo_cell = geo.cell_key(target.latitude, target.longitude)
+
+def bump_counter(connection, column, user_id, delta):
+    table = User.__table__
+    connection.execute(
+        table.update().where(table.c.id == user_id).values({column: table.c[column] + delta})
+    )
+    # Core update: the flush listener that versions ORM writes does not see it
+    bump_versions(connection, table.name)
+
+@db.event.listens_for(BloodDonation, 'after_insert')
+def _donation_inserted(mapper, connection, target):
+    bump_counter(connection, 'donation_count', target.userId, 1)
+
+@db.event.listens_for(BloodDonation, 'after_delete')
+def _donation_deleted(mapper, connection, target):
+    bump_counter(connection, 'donation_count', target.userId, -1)
+
+@db.event.listens_for(BloodRequest, 'after_insert')
+def _request_inserted(mapper, connection, target):
+    bump_counter(connection, 'request_count', target.requester_id, 1)
+
+@db.event.listens_for(BloodRequest, 'after_delete')
+def _request_deleted(mapper, connection, target):
+    bump_counter(connection, 'request_count', target.requester_id, -1)
@@ -1,8 +1,14 @@
 from flask import Blueprint, request, jsonify
 from database import db
 from models.User.model import User
-from flasgger import swag_from
+from models.BloodRequest.compatibility import BLOOD_TYPES
+from hashing import get_hasher
+import bulk
+import geo
+from apidocs import swag_from
+import conditional
 from flask_jwt_extended import jwt_required
+from pagination import InvalidPageRequest, get_page_args, keyset, split_page, page_response
 
 user_bp = Blueprint('user', __name__, url_prefix='/users')
 
@@ -29,7 +35,9 @@ user_bp = Blueprint('user', __name__, url_prefix='/users')
                     'password': {'type': 'string', 'format': 'password', 'example': 'a_strong_password'},
                     'blood_type': {'type': 'string', 'example': 'O+'},
                     'gender': {'type': 'string', 'example': 'male'},
-                    'location': {'type': 'string', 'example': 'New York'}
+                    'location': {'type': 'string', 'example': 'New York'},
+                    'latitude': {'type': 'number', 'example': 40.7128},
+                    'longitude': {'type': 'number', 'example': -74.006}
                 }
             }
         }
@@ -52,12 +60,19 @@ def create_user():
     if not data:
         return jsonify({"message": "Invalid input"}), 400
 
+    try:
+        latitude, longitude = geo.validate_coordinates(data.get('latitude'), data.get('longitude'))
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
     new_user = User(
         name=data['name'],
         email=data['email'],
         blood_type=data['blood_type'],
         location=data.get('location'),
-        gender= data.get('gender')
+        gender= data.get('gender'),
+        latitude=latitude,
+        longitude=longitude
     )
     new_user.set_password(data['password'])
 
@@ -75,22 +90,50 @@ def create_user():
 @swag_from({
     'tags': ['User'],
     'security': [{'BearerAuth': []}],
+    'parameters': [
+        {
+            'name': 'limit',
+            'in': 'query',
+            'type': 'integer',
+            'required': False,
+            'description': 'Page size (capped by PAGINATION_MAX_LIMIT)'
+        },
+        {
+            'name': 'cursor',
+            'in': 'query',
+            'type': 'string',
+            'required': False,
+            'description': 'Opaque cursor taken from the X-Next-Cursor header of the previous page'
+        }
+    ],
     'responses': {
         200: {
-            'description': 'A list of users',
+            'description': 'A page of users ordered by creation time',
             'schema': {
                 'type': 'array',
                 'items': {
                     '$ref': '#/definitions/User'
                 }
             }
+        },
+        400: {
+            'description': 'Invalid limit or cursor'
+        },
+        304: {
+            'description': 'Not modified since the ETag sent in If-None-Match'
         }
     }
 })
+@conditional.versioned('user')
 def get_users():
-    """Get all users"""
-    users = User.query.all()
-    return jsonify([user.to_dict() for user in users]), 200
+    """Get a page of users"""
+    try:
+        limit, cursor = get_page_args()
+    except InvalidPageRequest as e:
+        return jsonify({'message': str(e)}), 400
+
+    users, next_cursor = split_page(keyset(User.query, User.created_at, User.id, limit, cursor).all(), limit)
+    return page_response([user.to_dict() for user in users], next_cursor), 200
 
 @user_bp.route('/<int:user_id>', methods=['GET'])
 @jwt_required()
@@ -122,6 +165,9 @@ def get_users():
         },
         404: {
             'description': 'User not found'
+        },
+        304: {
+            'description': 'Not modified since the ETag sent in If-None-Match'
         }
     }
 })
@@ -129,5 +175,75 @@ def get_user(user_id):
     """Get a user by ID"""
     user = db.session.get(User, user_id)
     if user:
-        return jsonify(user.to_dict())
+        # The counters are bumped with a Core UPDATE that leaves updated_at alone
+        etag = conditional.make_etag(user.id, user.updated_at, user.donation_count, user.request_count)
+        return conditional.not_modified(etag) or conditional.with_etag(jsonify(user.to_dict()), etag)
     return jsonify({'message': 'User not found'}), 404
+
+@user_bp.route('/import', methods=['POST'])
+@jwt_required()
+@swag_from({
+    'tags': ['User'],
+    'security': [{'BearerAuth': []}],
+    'consumes': ['application/x-ndjson', 'text/csv'],
+    'parameters': [
+        {
+            'name': 'body',
+            'in': 'body',
+            'required': True,
+            'description': 'Users to create. One JSON object per line (application/x-ndjson) or CSV with a header row (text/csv). Fields: name, email, password, blood_type, location, gender, latitude, longitude',
+            'schema': {'type': 'string'}
+        }
+    ],
+    'responses': {
+        200: {
+            'description': 'Import report; rows that failed are listed by line number',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'inserted': {'type': 'integer'},
+                    'failed': {'type': 'integer'},
+                    'errors': {
+                        'type': 'array',
+                        'items': {
+                            'type': 'object',
+                            'properties': {
+                                'line': {'type': 'integer'},
+                                'error': {'type': 'string'}
+                            }
+                        }
+                    }
+                }
+            }
+        },
+        415: {
+            'description': 'Unsupported content type'
+        }
+    }
+})
+def import_users():
+    """Bulk-create users from an NDJSON or CSV stream"""
+    return bulk.import_records(User, _validate_user_row, prepare=_hash_passwords)
+
+def _validate_user_row(record):
+    bulk.require(record, 'name', 'email', 'password', 'blood_type')
+    if record['blood_type'] not in BLOOD_TYPES:
+        raise ValueError(f"Unknown blood type {record['blood_type']!r}")
+    latitude, longitude = geo.validate_coordinates(record.get('latitude'), record.get('longitude'))
+    return {
+        'name': record['name'],
+        'email': record['email'],
+        'password': str(record['password']),
+        'blood_type': record['blood_type'],
+        'location': record.get('location'),
+        'gender': record.get('gender'),
+        'latitude': latitude,
+        'longitude': longitude,
+        # Core inserts skip the ORM before_insert hook that normally sets this
+        'geo_cell': geo.cell_key(latitude, longitude),
+    }
+
+def _hash_passwords(rows):
+    hashes = get_hasher().hash_many([row.pop('password') for row in rows])
+    for row, password_hash in zip(rows, hashes):
+        row['password_hash'] = password_hash
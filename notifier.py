@@ -0,0 +1,78 @@
+"""Pluggable delivery of donor notifications.
+
+``NOTIFIER`` picks the backend: ``log`` (the default) writes each message to
+the app log, ``memory`` keeps them in a list for tests and local runs, and
+``package.module:Class`` loads any :class:`Notifier` subclass, e.g. one that
+sends SMS or push messages. ``send`` delivers one message and raises on
+failure; ``send_many`` fans a batch out over at most ``NOTIFY_CONCURRENCY``
+threads per process.
+"""
+import importlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class Notifier:
+    def __init__(self, concurrency=8):
+        self.concurrency = concurrency
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def send(self, recipient, message):
+        """Deliver ``message`` (a dict) to ``recipient`` (a dict with id, name and email)."""
+        raise NotImplementedError
+
+    def send_many(self, deliveries):
+        """Send each ``(recipient, message)``; returns ``(recipient, error)`` for those that failed."""
+        futures = [(recipient, self._executor().submit(self.send, recipient, message))
+                   for recipient, message in deliveries]
+        failed = []
+        for recipient, future in futures:
+            error = future.exception()
+            if error is not None:
+                failed.append((recipient, error))
+        return failed
+
+    def _executor(self):
+        # Created lazily so each forked server worker gets its own threads
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='notify')
+            return self._pool
+
+    def shutdown(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+
+class LogNotifier(Notifier):
+    def send(self, recipient, message):
+        logger.info('Notify user %s <%s>: %s', recipient['id'], recipient['email'], message['text'])
+
+
+class MemoryNotifier(Notifier):
+    def __init__(self, concurrency=8):
+        super().__init__(concurrency)
+        self.sent = []
+        self._lock = threading.Lock()
+
+    def send(self, recipient, message):
+        with self._lock:
+            self.sent.append((recipient, message))
+
+
+NOTIFIERS = {'log': LogNotifier, 'memory': MemoryNotifier}
+
+
+def load_notifier(name, concurrency):
+    if name in NOTIFIERS:
+        return NOTIFIERS[name](concurrency)
+    module, _, cls = name.partition(':')
+    if not cls:
+        raise ValueError(f"NOTIFIER must be one of {', '.join(NOTIFIERS)} or 'package.module:Class', not {name!r}")
+    return getattr(importlib.import_module(module), cls)(concurrency)
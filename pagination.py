@@ -0,0 +1,76 @@
+import base64
+import datetime
+import json
+from urllib.parse import urlencode
+from flask import current_app, request, jsonify
+from sqlalchemy import tuple_
+
+
+class InvalidPageRequest(ValueError):
+    pass
+
+
+def encode_cursor(created_at, id):
+    raw = json.dumps([created_at.isoformat(), id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.datetime.fromisoformat(created_at), int(id)
+    except (ValueError, TypeError):
+        raise InvalidPageRequest('Invalid cursor')
+
+
+def get_page_args():
+    """Read ``limit`` and ``cursor`` from the query string.
+
+    The limit is clamped to ``PAGINATION_MAX_LIMIT``; a missing limit falls
+    back to ``PAGINATION_DEFAULT_LIMIT``.
+    """
+    max_limit = current_app.config['PAGINATION_MAX_LIMIT']
+    limit = request.args.get('limit', current_app.config['PAGINATION_DEFAULT_LIMIT'])
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        raise InvalidPageRequest('limit must be an integer')
+    if limit < 1:
+        raise InvalidPageRequest('limit must be positive')
+
+    cursor = request.args.get('cursor')
+    return min(limit, max_limit), decode_cursor(cursor) if cursor else None
+
+
+def keyset(query, created_col, id_col, limit, cursor=None):
+    """Restrict ``query`` to the page after ``cursor`` ordered by ``(created_at, id)``.
+
+    Works on both legacy ``Query`` objects and ``select()`` statements. One
+    extra row is fetched so :func:`split_page` can tell whether a next page
+    exists without a ``COUNT``.
+    """
+    if cursor is not None:
+        query = query.where(tuple_(created_col, id_col) > tuple_(*cursor))
+    return query.order_by(created_col, id_col).limit(limit + 1)
+
+
+def split_page(rows, limit):
+    """Return ``(rows, next_cursor)`` for a result fetched through :func:`keyset`."""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last.created_at, last.id)
+
+
+def page_response(items, next_cursor):
+    """JSON array response with the next cursor in ``X-Next-Cursor`` and ``Link``."""
+    response = jsonify(items)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+        args = request.args.to_dict()
+        args['cursor'] = next_cursor
+        next_url = f'{request.base_url}?{urlencode(args)}'
+        response.headers['Link'] = f'<{next_url}>; rel="next"'
+    return response
@@ -0,0 +1,66 @@
+"""Substring search index over ``user.name`` and ``user.location``.
+
+On SQLite this is an external-content FTS5 table using the trigram tokenizer,
+kept in sync with ``user`` by triggers. On Postgres it is a pair of
+``pg_trgm`` GIN indexes, which serve ``ILIKE '%term%'`` directly. Either way
+:func:`contains` builds the filter that goes through the index.
+"""
+from sqlalchemy import column, table, text
+
+SEARCH_TABLE = 'user_search'
+SEARCH_COLUMNS = ('name', 'location')
+# The trigram tokenizer cannot match anything shorter than three characters
+MIN_TERM_LENGTH = 3
+
+SQLITE_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+    f"name, location, content='user', content_rowid='id', tokenize='trigram')",
+    f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_ai AFTER INSERT ON "user" BEGIN
+        INSERT INTO {SEARCH_TABLE}(rowid, name, location) VALUES (new.id, new.name, new.location);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_ad AFTER DELETE ON "user" BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, name, location) VALUES ('delete', old.id, old.name, old.location);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_au AFTER UPDATE OF name, location ON "user" BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, name, location) VALUES ('delete', old.id, old.name, old.location);
+        INSERT INTO {SEARCH_TABLE}(rowid, name, location) VALUES (new.id, new.name, new.location);
+    END""",
+    f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')",
+)
+
+POSTGRES_DDL = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    'CREATE INDEX IF NOT EXISTS ix_user_name_trgm ON "user" USING gin (name gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS ix_user_location_trgm ON "user" USING gin (location gin_trgm_ops)',
+)
+
+_search = table(SEARCH_TABLE, column('rowid'), column(SEARCH_TABLE))
+
+
+def install(target, connection, **kw):
+    """Create the search index; used as an ``after_create`` listener on the user table."""
+    ddl = {'sqlite': SQLITE_DDL, 'postgresql': POSTGRES_DDL}.get(connection.dialect.name, ())
+    for statement in ddl:
+        connection.execute(text(statement))
+
+
+def uninstall(target, connection, **kw):
+    if connection.dialect.name == 'sqlite':
+        connection.execute(text(f'DROP TABLE IF EXISTS {SEARCH_TABLE}'))
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    """Keep Alembic autogenerate away from the FTS5 table and its shadow tables."""
+    return not (type_ == 'table' and reflected and name.startswith(SEARCH_TABLE))
+
+
+def contains(dialect_name, id_column, text_column, term):
+    """Case-insensitive substring filter on ``text_column`` served by the search index."""
+    if dialect_name == 'sqlite' and len(term) >= MIN_TERM_LENGTH:
+        phrase = '"' + term.replace('"', '""') + '"'
+        return id_column.in_(
+            _search.select()
+            .with_only_columns(_search.c.rowid)
+            .where(_search.c[SEARCH_TABLE].op('MATCH')(f'{text_column.key} : {phrase}'))
+        )
+    return text_column.ilike(f'%{term}%')
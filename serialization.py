@@ -0,0 +1,106 @@
+"""JSON encoding for responses.
+
+Models serialise through :func:`serializer`, which compiles a field list into
+a single ``attrgetter`` call and leaves dates and datetimes as Python objects.
+The app's JSON provider encodes those as ISO 8601. ``JSON_PROVIDER`` picks
+the provider: ``orjson`` (the default, when installed) encodes them natively in
+C, and ``default`` uses the standard library.
+"""
+import datetime
+import operator
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+def serializer(*fields):
+    """Compile ``fields`` into a function mapping an object or row to a dict.
+
+    Each field is an attribute name, a ``(key, attribute)`` pair, a
+    ``(key, attribute, convert)`` triple, or a ``(key, function)`` pair where
+    ``function`` is called with the whole object (for nested dicts).
+    """
+    keys, attrs, converted, computed, order = [], [], [], [], []
+    for field in fields:
+        if isinstance(field, str):
+            field = (field, field)
+        key, source, *convert = field
+        order.append(key)
+        if callable(source):
+            computed.append((key, source))
+            continue
+        keys.append(key)
+        attrs.append(source)
+        if convert:
+            converted.append((key, convert[0]))
+
+    get = operator.attrgetter(*attrs)
+    # attrgetter returns a bare value rather than a tuple for a single attribute
+    values = get if len(attrs) > 1 else lambda obj: (get(obj),)
+
+    def to_dict(obj):
+        data = dict(zip(keys, values(obj)))
+        for key, convert in converted:
+            data[key] = convert(data[key])
+        if computed:
+            for key, function in computed:
+                data[key] = function(obj)
+            data = {key: data[key] for key in order}
+        return data
+
+    return to_dict
+
+
+def _default(o):
+    if isinstance(o, (datetime.date, datetime.time)):
+        return o.isoformat()
+    return DefaultJSONProvider.default(o)
+
+
+class IsoJSONProvider(DefaultJSONProvider):
+    """Flask's provider, but dates and times are ISO 8601 instead of HTTP dates."""
+    default = staticmethod(_default)
+
+
+class OrJSONProvider(IsoJSONProvider):
+    """orjson-backed provider; falls back to :func:`_default` for types orjson does not know."""
+
+    def _options(self, pretty=False):
+        # Flasgger's spec uses integer status codes as keys
+        options = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if pretty:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self._options(bool(kwargs.get('indent')))).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = (self.compact is None and self._app.debug) or self.compact is False
+        body = orjson.dumps(obj, default=self.default, option=self._options(pretty))
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+PROVIDERS = {
+    'default': IsoJSONProvider,
+    'orjson': OrJSONProvider,
+}
+
+
+def init_json(app):
+    name = app.config['JSON_PROVIDER']
+    if name not in PROVIDERS:
+        raise ValueError(f"JSON_PROVIDER must be one of {', '.join(PROVIDERS)}")
+    if name == 'orjson' and orjson is None:
+        app.logger.warning('orjson is not installed; using the standard library JSON provider')
+        name = 'default'
+    app.json = PROVIDERS[name](app)
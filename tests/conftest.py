@@ -7,6 +7,25 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 from main import create_app
 from database import db
 
+class StatementRecorder(list):
+    """``(statement, parameters)`` of every statement run on ``engine`` inside ``with recorder:``."""
+
+    def __init__(self, engine):
+        super().__init__()
+        self.engine = engine
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            self.append((statement, parameters))
+        self._record = record
+
+    def __enter__(self):
+        self.clear()
+        db.event.listen(self.engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc_info):
+        db.event.remove(self.engine, "before_cursor_execute", self._record)
+
 @pytest.fixture(scope='function')
 def client():
     app = create_app(config_overrides={
@@ -20,3 +39,9 @@ def client():
             yield client
             db.session.remove()
             db.drop_all()
+
+@pytest.fixture
+def statements(client):
+    """A :class:`StatementRecorder` for the client's database."""
+    with client.application.app_context():
+        return StatementRecorder(db.engine)
@@ -2,3 +2,119 @@ def test_home_page(client):
     response = client.get("/")
     assert response.status_code == 200
     assert b"Welcome to Bloodit!" in response.data
+
+def test_asgi_app(tmp_path):
+    """Test asgi.app as the server loads it: views on a pool of threads, the stream natively."""
+    import os
+    import subprocess
+    import sys
+    import pytest
+    pytest.importorskip("asgiref")
+
+    code = (
+        "import asyncio, time, asgi\n"
+        "asgi.flask_app.add_url_rule('/slow', 'slow', lambda: time.sleep(0.5) or 'slow')\n"
+        "async def request(path):\n"
+        "    sent = []\n"
+        "    async def receive():\n"
+        "        return {'type': 'http.request', 'body': b'', 'more_body': False}\n"
+        "    async def send(message):\n"
+        "        sent.append(message)\n"
+        "    scope = {'type': 'http', 'http_version': '1.1', 'method': 'GET', 'path': path, 'raw_path': path.encode(),\n"
+        "             'root_path': '', 'scheme': 'http', 'query_string': b'', 'headers': [],\n"
+        "             'server': ('testserver', 80), 'client': ('127.0.0.1', 1234)}\n"
+        "    await asgi.app(scope, receive, send)\n"
+        "    return sent[0]['status'], b''.join(m.get('body', b'') for m in sent[1:])\n"
+        "status, body = asyncio.run(request('/'))\n"
+        "print(status, b'Welcome to Bloodit!' in body)\n"
+        "status, body = asyncio.run(request('/blood-requests/stream'))\n"
+        "print(status, b'Missing Authorization Header' in body)\n"
+        "async def concurrently():\n"
+        "    return await asyncio.gather(*(request('/slow') for _ in range(4)))\n"
+        "start = time.monotonic()\n"
+        "responses = asyncio.run(concurrently())\n"
+        "print(all(status == 200 for status, _ in responses), time.monotonic() - start < 1.5)\n"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{tmp_path}/asgi.db", "JOB_WORKERS": "0"}
+    output = subprocess.run([sys.executable, "-c", code], cwd=root, env=env, capture_output=True, text=True, check=True).stdout
+    assert output.split("\n")[:3] == ["200 True", "401 True", "True True"]
+
+def test_json_providers_agree():
+    import datetime
+    import json
+    import pytest
+    pytest.importorskip("orjson")
+    from main import create_app
+    from models.User.model import User
+    from models.Donor.model import Donor
+
+    user = User(name="Ada", email="ada@test.com", blood_type="O+", latitude=6.5, longitude=3.4)
+    user.id, user.donation_count, user.request_count = 1, 2, 0
+    user.created_at = user.updated_at = datetime.datetime(2026, 1, 2, 3, 4, 5, 678901)
+    donor = Donor(user_id=1, last_donation=datetime.datetime(2026, 1, 1))
+    donor.id, donor.user = 7, user
+    donor.created_at = donor.updated_at = datetime.datetime(2026, 1, 2)
+    payload = {"donor": donor.to_dict(), "day": datetime.date(2026, 1, 2), "at": datetime.time(9, 30)}
+
+    bodies = []
+    for provider in ("default", "orjson"):
+        app = create_app(config_overrides={"SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:", "JSON_PROVIDER": provider})
+        with app.app_context():
+            bodies.append(json.loads(app.json.response(payload).get_data()))
+            assert app.json.loads(app.json.dumps(payload)) == bodies[-1]
+    assert bodies[0] == bodies[1]
+    assert bodies[0]["donor"]["user"]["created_at"] == "2026-01-02T03:04:05.678901"
+    assert bodies[0]["donor"]["last_donation"] == "2026-01-01T00:00:00"
+    assert bodies[0]["day"] == "2026-01-02"
+    assert bodies[0]["at"] == "09:30:00"
+
+def test_openapi_spec_cached(client):
+    response = client.get("/apispec_1.json")
+    assert response.status_code == 200
+    spec = response.get_json()
+    assert "/blood-requests/export" in spec["paths"]
+    etag = response.headers["ETag"]
+
+    calls = []
+    swagger_spec = client.application.extensions["openapi_spec"]
+    original = swagger_spec._build
+    swagger_spec._build = lambda: calls.append(1) or original()
+    response = client.get("/apispec_1.json", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert client.get("/apispec_1.json").get_json() == spec
+    assert calls == []
+
+def test_swagger_disabled(tmp_path):
+    from main import create_app
+
+    app = create_app(config_overrides={"SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:", "SWAGGER_ENABLED": False})
+    client = app.test_client()
+    assert client.get("/apidocs/").status_code == 404
+    assert client.get("/apispec_1.json").status_code == 404
+    assert "flasgger" not in app.blueprints
+
+    # A spec written at build time is still served
+    path = tmp_path / "openapi.json"
+    result = create_app(config_overrides={"SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:"}).test_cli_runner().invoke(args=["openapi-spec", str(path)])
+    assert result.exit_code == 0
+    app = create_app(config_overrides={"SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:", "SWAGGER_ENABLED": False, "OPENAPI_SPEC_PATH": str(path)})
+    response = app.test_client().get("/apispec_1.json")
+    assert response.status_code == 200
+    assert response.data == path.read_bytes()
+    assert "/donors/" in response.get_json()["paths"]
+
+def test_cold_start_skips_optional_components():
+    import os
+    import subprocess
+    import sys
+
+    code = (
+        "import sys, main\n"
+        "assert 'app' not in vars(main)\n"
+        "main.create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'SWAGGER_ENABLED': False})\n"
+        "print(sorted(m for m in ('flasgger', 'flask_migrate', 'alembic') if m in sys.modules))\n"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=True).stdout
+    assert output.strip() == "[]"
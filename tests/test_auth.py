@@ -33,3 +33,144 @@ def test_login_no_json(client):
     """Test that login fails without a JSON body."""
     response = client.post("/auth/login")
     assert response.status_code == 415
+
+def test_user_lookup_is_cached(client, setup_user, statements):
+    """Test that authenticated requests do not hit the database for the user lookup."""
+    token = json.loads(client.post("/auth/login", json={"email": "test@example.com", "password": "testpassword"}).data)["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    client.get("/blood-requests/9999", headers=headers)
+    client.application.extensions["user_cache"].clear()
+
+    with statements:
+        response = client.get("/blood-requests/9999", headers=headers)
+    assert response.status_code == 404
+    first = len(statements)
+    with statements:
+        response = client.get("/blood-requests/9999", headers=headers)
+    assert response.status_code == 404
+    assert len(statements) == first - 1
+
+def test_user_lookup_cache_invalidated_on_update(client, setup_user):
+    """Test that changing the user row evicts the cached identity."""
+    token = json.loads(client.post("/auth/login", json={"email": "test@example.com", "password": "testpassword"}).data)["access_token"]
+    cache = client.application.extensions["user_cache"]
+
+    with client.application.app_context():
+        user = User.query.filter_by(email="test@example.com").first()
+        assert cache.get(user.id).name == "testuser"
+        user.name = "renamed"
+        db.session.commit()
+        assert cache.get(user.id) is None
+
+        db.session.delete(user)
+        db.session.commit()
+
+    response = client.get("/blood-requests/9999", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 401
+
+def test_logout_revokes_token(client, setup_user):
+    """Test that a token cannot be used after logging out."""
+    token = json.loads(client.post("/auth/login", json={"email": "test@example.com", "password": "testpassword"}).data)["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    assert client.get("/blood-requests/", headers=headers).status_code == 200
+    assert client.post("/auth/logout", headers=headers).status_code == 200
+    assert client.get("/blood-requests/", headers=headers).status_code == 401
+
+def test_blocklist_check_skips_database(client, setup_user, statements):
+    """Test that checking a token that is not revoked needs no query between refreshes."""
+    token = json.loads(client.post("/auth/login", json={"email": "test@example.com", "password": "testpassword"}).data)["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    client.get("/blood-requests/9999", headers=headers)
+    with statements:
+        response = client.get("/blood-requests/9999", headers=headers)
+    assert response.status_code == 404
+    # Only the blood request lookup itself
+    assert len(statements) == 1
+
+def test_blocklist_refresh_keeps_concurrent_revocations(client, monkeypatch):
+    """Test that a refresh keeps a token revoked after its SELECT, and only one caller refreshes at a time."""
+    import contextlib
+    import datetime
+    import blocklist
+
+    with client.application.app_context():
+        revoked = blocklist.RevokedTokens(60)
+        revoked.refresh()
+        expires_at = datetime.datetime.utcnow() + datetime.timedelta(minutes=10)
+        selects = []
+
+        @contextlib.contextmanager
+        def racing_requests(enabled):
+            # A request checking a token while the refresh is running
+            selects.append(revoked.is_revoked("other"))
+            yield
+            # A logout that commits after the SELECT has read the table
+            revoked.revoke("late", expires_at)
+
+        monkeypatch.setattr(blocklist, "read_replica", racing_requests)
+        revoked._next_refresh = 0
+        assert not revoked.is_revoked("current")
+        assert selects == [False]
+        assert revoked.is_revoked("late")
+
+def test_prune_expired_blocklist_entries(client):
+    """Test that expired entries are pruned in batches and live ones are kept."""
+    import datetime
+    from blocklist import prune_expired
+    from models.TokenBlocklist.model import TokenBlocklist
+
+    with client.application.app_context():
+        now = datetime.datetime.utcnow()
+        for i in range(7):
+            db.session.add(TokenBlocklist(jti=f"expired-{i}", expires_at=now - datetime.timedelta(minutes=1)))
+        db.session.add(TokenBlocklist(jti="live", expires_at=now + datetime.timedelta(minutes=10)))
+        db.session.commit()
+
+        assert prune_expired(batch_size=3) == 7
+        assert [entry.jti for entry in TokenBlocklist.query.all()] == ["live"]
+
+def test_login_rehashes_outdated_hash(client):
+    """Test that a hash made with old parameters is upgraded on successful login."""
+    from werkzeug.security import generate_password_hash
+
+    with client.application.app_context():
+        user = User(name="legacy", email="legacy@example.com", blood_type="A+",
+                    password_hash=generate_password_hash("legacypassword", "pbkdf2:sha256:1000"))
+        db.session.add(user)
+        db.session.commit()
+
+    response = client.post("/auth/login", json={"email": "legacy@example.com", "password": "legacypassword"})
+    assert response.status_code == 200
+
+    with client.application.app_context():
+        user = User.query.filter_by(email="legacy@example.com").first()
+        assert user.password_hash.startswith(client.application.config["PASSWORD_HASH_METHOD"] + "$")
+        assert user.check_password("legacypassword")
+
+def test_login_rejected_when_hasher_busy(client, setup_user):
+    """Test that logins over the hashing cap fail fast with 503."""
+    from hashing import PasswordHasher
+
+    client.application.extensions["password_hasher"] = PasswordHasher(max_pending=0)
+    response = client.post("/auth/login", json={"email": "test@example.com", "password": "testpassword"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert client.application.extensions["password_hasher"].stats["rejected"] == 1
+
+def test_hasher_process_pool():
+    """Test hashing in the process pool and the queue-time metrics."""
+    from hashing import PasswordHasher
+
+    hasher = PasswordHasher(method="pbkdf2:sha256:1000", workers=1)
+    try:
+        pwhash = hasher.hash("secret")
+        assert pwhash.startswith("pbkdf2:sha256:1000$")
+        assert hasher.verify(pwhash, "secret")
+        assert not hasher.verify(pwhash, "wrong")
+        assert not hasher.needs_rehash(pwhash)
+        assert hasher.stats["calls"] == 3
+        assert hasher.stats["queue_seconds_total"] >= 0
+    finally:
+        hasher.shutdown()
@@ -1,5 +1,8 @@
+import datetime
 import json
 from models.User.model import User
+from models.Donor.model import Donor
+from models.BloodRequest.compatibility import compatible_donor_types, is_compatible
 from database import db
 import pytest
 
@@ -103,6 +106,13 @@ def test_update_blood_request_status(client, requester_token):
     assert data["status"] == "Fulfilled"
     assert data["updated_at"] > original_updated_at
 
+    # Any case is accepted and stored as documented; unknown statuses are rejected
+    headers = {"Authorization": f"Bearer {requester_token}"}
+    response = client.put(f"/blood-requests/{request_id}", headers=headers, json={"status": " cancelled"})
+    assert json.loads(response.data)["status"] == "Cancelled"
+    response = client.put(f"/blood-requests/{request_id}", headers=headers, json={"status": "Done"})
+    assert response.status_code == 400
+
 def test_update_blood_request_unauthorized(client, requester_token, donor_token):
     """
     Test that a user cannot update a blood request they did not create.
@@ -128,3 +138,94 @@ def test_get_nonexistent_request(client, requester_token):
     """
     response = client.get("/blood-requests/9999", headers={"Authorization": f"Bearer {requester_token}"})
     assert response.status_code == 404
+
+def test_blood_requests_pagination(client, requester_token):
+    """
+    Test walking the blood request list page by page with the cursor.
+    """
+    headers = {"Authorization": f"Bearer {requester_token}"}
+    for i in range(5):
+        client.post(
+            "/blood-requests/",
+            headers=headers,
+            json={"name": f"Patient {i}", "phone": "555-0000", "blood_type": "O-", "quantity": 1, "location": "City Clinic"}
+        )
+
+    names = []
+    url = "/blood-requests/?limit=2"
+    while True:
+        response = client.get(url, headers=headers)
+        assert response.status_code == 200
+        page = json.loads(response.data)
+        assert len(page) <= 2
+        names.extend(req["name"] for req in page)
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+        url = f"/blood-requests/?limit=2&cursor={cursor}"
+
+    assert names == [f"Patient {i}" for i in range(5)]
+
+def test_blood_requests_invalid_cursor(client, requester_token):
+    """
+    Test that a malformed cursor is rejected.
+    """
+    response = client.get("/blood-requests/?cursor=not-a-cursor", headers={"Authorization": f"Bearer {requester_token}"})
+    assert response.status_code == 400
+
+def test_compatibility_table():
+    """
+    Test the precomputed ABO/Rh compatibility table.
+    """
+    assert compatible_donor_types("O-") == ("O-",)
+    assert compatible_donor_types("AB+")[0] == "AB+"
+    assert len(compatible_donor_types("AB+")) == 8
+    assert compatible_donor_types("A+")[0] == "A+"
+    assert compatible_donor_types("A+")[-1] == "O-"
+    assert is_compatible("A+", "O-")
+    assert not is_compatible("O-", "A+")
+    assert not is_compatible("B+", "A-")
+    assert compatible_donor_types("XYZ") == ()
+
+def test_blood_request_matches(client, requester_token):
+    """
+    Test that matches return available, eligible, compatible donors other than the requester,
+    with the exact type first and those eligible longest first within a type.
+    """
+    now = datetime.datetime.utcnow()
+    donors = [("O-", True, None), ("A+", True, now - datetime.timedelta(days=70)), ("B+", True, None),
+              ("A-", False, None), ("A+", True, None), ("A+", True, now - datetime.timedelta(days=3)),
+              ("A+", True, now - datetime.timedelta(days=100))]
+    with client.application.app_context():
+        for i, (blood_type, available, last_donation) in enumerate(donors):
+            user = User(name=f"Donor {i}", email=f"match{i}@test.com", blood_type=blood_type)
+            user.set_password("pw")
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(Donor(user_id=user.id, is_available=available, last_donation=last_donation))
+        # The requester (A-) is a compatible donor too
+        db.session.add(Donor(user_id=User.query.filter_by(email="requester@test.com").first().id))
+        db.session.commit()
+
+    headers = {"Authorization": f"Bearer {requester_token}"}
+    post_response = client.post(
+        "/blood-requests/",
+        headers=headers,
+        json={"name": "Match Case", "phone": "123", "blood_type": "A+", "quantity": 1, "location": "City Clinic"}
+    )
+    request_id = json.loads(post_response.data)["id"]
+
+    response = client.get(f"/blood-requests/{request_id}/matches", headers=headers)
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert [donor["user"]["name"] for donor in data] == ["Donor 4", "Donor 6", "Donor 1", "Donor 0"]
+
+    # Donors follow a change to their user's blood type
+    with client.application.app_context():
+        User.query.filter_by(email="match2@test.com").first().blood_type = "A+"
+        db.session.commit()
+    response = client.get(f"/blood-requests/{request_id}/matches", headers=headers)
+    assert [donor["user"]["name"] for donor in json.loads(response.data)] == ["Donor 2", "Donor 4", "Donor 6", "Donor 1", "Donor 0"]
+
+    response = client.get("/blood-requests/9999/matches", headers=headers)
+    assert response.status_code == 404
@@ -0,0 +1,107 @@
+import json
+from models.User.model import User
+from models.Donor.model import Donor
+from models.BloodRequest.model import BloodRequest
+from database import db
+import pytest
+
+@pytest.fixture
+def auth_token(client):
+    with client.application.app_context():
+        user = User(name="Hospital", email="hospital@test.com", blood_type="O+")
+        user.set_password("password")
+        db.session.add(user)
+        db.session.commit()
+
+    response = client.post("/auth/login", json={"email": "hospital@test.com", "password": "password"})
+    return json.loads(response.data)["access_token"]
+
+def test_import_users_ndjson(client, auth_token):
+    """Test importing users from NDJSON with a per-row error report."""
+    client.application.config["BULK_IMPORT_CHUNK_SIZE"] = 2
+    lines = [
+        {"name": "Ada", "email": "ada@test.com", "password": "pw1", "blood_type": "A+", "latitude": 6.5, "longitude": 3.4},
+        {"name": "Bola", "email": "bola@test.com", "password": "pw2", "blood_type": "XX"},
+        {"name": "Chidi", "email": "chidi@test.com", "password": "pw3", "blood_type": "B-"},
+        {"name": "Dup", "email": "ada@test.com", "password": "pw4", "blood_type": "O-"},
+    ]
+    body = "\n".join(json.dumps(line) for line in lines) + "\nnot json\n"
+    response = client.post("/users/import", data=body, content_type="application/x-ndjson",
+                           headers={"Authorization": f"Bearer {auth_token}"})
+    assert response.status_code == 200
+    report = json.loads(response.data)
+    assert report["inserted"] == 2
+    assert [error["line"] for error in report["errors"]] == [2, 4, 5]
+
+    with client.application.app_context():
+        ada = User.query.filter_by(email="ada@test.com").first()
+        assert ada.check_password("pw1")
+        assert ada.geo_cell is not None
+    response = client.post("/auth/login", json={"email": "chidi@test.com", "password": "pw3"})
+    assert response.status_code == 200
+
+def test_import_donors_csv(client, auth_token):
+    """Test importing donor profiles from CSV."""
+    with client.application.app_context():
+        user_id = User.query.filter_by(email="hospital@test.com").first().id
+
+    body = "user_id,medical_history,is_available,last_donation\n" \
+           f"{user_id},Healthy,false,2026-01-15T09:30:00\n" \
+           ",Missing user,true,\n"
+    response = client.post("/donors/import", data=body, content_type="text/csv",
+                           headers={"Authorization": f"Bearer {auth_token}"})
+    report = json.loads(response.data)
+    assert report["inserted"] == 1
+    assert report["errors"][0]["line"] == 3
+
+    with client.application.app_context():
+        donor = Donor.query.filter_by(user_id=user_id).first()
+        assert donor.is_available is False
+        assert donor.last_donation.year == 2026
+        assert donor.blood_type == "O+"
+
+def test_import_blood_requests_updates_counter(client, auth_token):
+    """Test that imported blood requests count towards the requester's counter."""
+    body = "\n".join(json.dumps({"name": f"Patient {i}", "blood_type": "O+", "quantity": 1, "location": "Clinic"}) for i in range(3))
+    response = client.post("/blood-requests/import", data=body, content_type="application/x-ndjson",
+                           headers={"Authorization": f"Bearer {auth_token}"})
+    assert json.loads(response.data)["inserted"] == 3
+
+    with client.application.app_context():
+        user = User.query.filter_by(email="hospital@test.com").first()
+        assert user.request_count == 3
+        assert BloodRequest.query.count() == 3
+
+def test_import_blood_requests_validates_rows(client, auth_token):
+    """Test that unknown blood types and non-finite quantities are reported, not stored."""
+    rows = [("O+", "2"), ("XX", "1"), ("A-", "inf"), ("B+", "nan"), ("AB-", "-1")]
+    body = "blood_type,quantity,location,name\n" + "".join(f"{blood_type},{quantity},Clinic,Patient\n" for blood_type, quantity in rows)
+    response = client.post("/blood-requests/import", data=body, content_type="text/csv",
+                           headers={"Authorization": f"Bearer {auth_token}"})
+    report = json.loads(response.data)
+    assert report["inserted"] == 1
+    assert [error["line"] for error in report["errors"]] == [3, 4, 5, 6]
+
+def test_import_csv_reports_bad_lines(client, auth_token):
+    """Test that invalid UTF-8 and malformed CSV fail their own line instead of the import."""
+    body = (b"blood_type,quantity,location,name\n"
+            b"O+,1,Clinic,Patient\n"
+            b"A+,1,Cl\xffinic,Patient\n"
+            # Over csv.field_size_limit()
+            b"B+,1," + b"x" * 200_000 + b",Patient\n"
+            b"O-,1,Clinic,Patient\n")
+    response = client.post("/blood-requests/import", data=body, content_type="text/csv",
+                           headers={"Authorization": f"Bearer {auth_token}"})
+    assert response.status_code == 200
+    report = json.loads(response.data)
+    assert report["inserted"] == 2
+    assert [error["line"] for error in report["errors"]] == [3, 4]
+    assert "UTF-8" in report["errors"][0]["error"]
+
+    response = client.post("/blood-requests/import", data=b"blood_\xfftype,quantity\nO+,1\n", content_type="text/csv",
+                           headers={"Authorization": f"Bearer {auth_token}"})
+    assert json.loads(response.data) == {"inserted": 0, "failed": 1, "errors": [{"line": 1, "error": "CSV header is not valid UTF-8"}]}
+
+def test_import_rejects_unknown_content_type(client, auth_token):
+    response = client.post("/users/import", json=[], headers={"Authorization": f"Bearer {auth_token}"})
+    assert response.status_code == 415
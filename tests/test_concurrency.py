@@ -0,0 +1,84 @@
+import sqlite3
+import threading
+from flask_jwt_extended import create_access_token
+from sqlalchemy import text
+from main import create_app
+from database import db, warm_pool
+from models.User.model import User
+from models.BloodRequest.model import BloodRequest
+import pytest
+
+WRITERS = 8
+REQUESTS_PER_WRITER = 15
+
+@pytest.fixture
+def file_app(tmp_path):
+    app = create_app(config_overrides={
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path}/concurrency.db",
+        "JWT_SECRET_KEY": "test-secret-key",
+        "PASSWORD_HASH_METHOD": "pbkdf2:sha256:1",
+        # Every request reads the user table as well as writing
+        "USER_CACHE_TTL": 0,
+        "DB_POOL_SIZE": WRITERS,
+        "SQLITE_BUSY_TIMEOUT_MS": 2000,
+    })
+    with app.app_context():
+        db.create_all()
+        user = User(name="Hospital", email="hospital@test.com", blood_type="O+")
+        user.set_password("password")
+        db.session.add(user)
+        db.session.commit()
+        app.config["TEST_TOKEN"] = create_access_token(identity=str(user.id))
+    app.config["TEST_DB_PATH"] = f"{tmp_path}/concurrency.db"
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+def test_sqlite_pragmas_applied(file_app):
+    """Test that file databases get WAL, NORMAL sync, the busy timeout and a sized pool."""
+    with file_app.app_context():
+        assert db.session.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert db.session.execute(text("PRAGMA synchronous")).scalar() == 1
+        assert db.session.execute(text("PRAGMA busy_timeout")).scalar() == 2000
+        assert db.engine.pool.size() == WRITERS
+    assert warm_pool(file_app, count=3) == 3
+
+def test_concurrent_writers(file_app):
+    """Test that concurrent writers, alongside a long-running read, never see "database is locked"."""
+    headers = {"Authorization": f"Bearer {file_app.config['TEST_TOKEN']}"}
+    failures = []
+
+    def writer(n):
+        client = file_app.test_client()
+        for i in range(REQUESTS_PER_WRITER):
+            response = client.post("/blood-requests/", headers=headers, json={
+                "blood_type": "O+", "quantity": 1, "location": "Lagos", "name": f"Patient {n}-{i}", "phone": "0800"})
+            if response.status_code != 201:
+                failures.append(response.get_data(as_text=True))
+            response = client.post("/auth/register", json={
+                "email": f"donor{n}-{i}@test.com", "password": "password", "name": "Donor",
+                "blood_type": "A+", "gender": "F", "location": "Lagos"})
+            if response.status_code != 201:
+                failures.append(response.get_data(as_text=True))
+
+    # A reader part-way through a statement, like a streaming export; with a
+    # rollback journal it keeps every writer from committing until it finishes
+    reader = sqlite3.connect(file_app.config["TEST_DB_PATH"])
+    rows = reader.execute("WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n LIMIT 100000) "
+                          "SELECT i FROM n, user")
+    rows.fetchone()
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(WRITERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    reader.close()
+
+    assert failures == []
+    with file_app.app_context():
+        total = WRITERS * REQUESTS_PER_WRITER
+        assert BloodRequest.query.count() == total
+        assert User.query.count() == total + 1
+        assert db.session.get(User, 1).request_count == total
@@ -0,0 +1,98 @@
+import json
+from models.User.model import User
+from models.Donor.model import Donor
+from database import db
+import pytest
+
+@pytest.fixture
+def auth_token(client):
+    with client.application.app_context():
+        user = User(name="Hospital", email="hospital@test.com", blood_type="O+")
+        user.set_password("password")
+        db.session.add(user)
+        db.session.commit()
+
+    response = client.post("/auth/login", json={"email": "hospital@test.com", "password": "password"})
+    return json.loads(response.data)["access_token"]
+
+def create_request(client, headers, name="Patient"):
+    response = client.post("/blood-requests/", headers=headers, json={"name": name, "blood_type": "O+", "quantity": 1, "location": "Lagos"})
+    return json.loads(response.data)
+
+def test_list_not_modified(client, auth_token, statements):
+    """Test that polling an unchanged list costs one version lookup and returns 304."""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    create_request(client, headers)
+
+    response = client.get("/blood-requests/", headers=headers)
+    etag = response.headers["ETag"]
+    assert response.status_code == 200
+    assert set(response.headers["Cache-Control"].split(", ")) == {"private", "no-cache"}
+
+    with statements:
+        response = client.get("/blood-requests/", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.data == b""
+    assert response.headers["ETag"] == etag
+    assert len(statements) == 1
+    assert "table_version" in statements[0][0]
+
+    # The query string is part of the ETag
+    response = client.get("/blood-requests/?limit=1", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+
+def test_list_etag_changes_on_write(client, auth_token):
+    """Test that ORM writes, Core counter updates and bulk imports all change list ETags."""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    requests_etag = client.get("/blood-requests/", headers=headers).headers["ETag"]
+    users_etag = client.get("/users/", headers=headers).headers["ETag"]
+
+    req = create_request(client, headers)
+    response = client.get("/blood-requests/", headers={**headers, "If-None-Match": requests_etag})
+    assert response.status_code == 200
+    assert len(json.loads(response.data)) == 1
+    requests_etag = response.headers["ETag"]
+    # The requester's request counter moved, so the user list changed too
+    assert client.get("/users/", headers={**headers, "If-None-Match": users_etag}).status_code == 200
+
+    client.put(f"/blood-requests/{req['id']}", headers=headers, json={"status": "Fulfilled"})
+    response = client.get("/blood-requests/", headers={**headers, "If-None-Match": requests_etag})
+    assert response.status_code == 200
+    requests_etag = response.headers["ETag"]
+
+    body = json.dumps({"name": "Imported", "blood_type": "A+", "quantity": 1, "location": "Lagos"}) + "\n"
+    client.post("/blood-requests/import", data=body, content_type="application/x-ndjson", headers=headers)
+    response = client.get("/blood-requests/", headers={**headers, "If-None-Match": requests_etag})
+    assert response.status_code == 200
+    assert len(json.loads(response.data)) == 2
+
+def test_detail_etags(client, auth_token):
+    """Test detail ETags for blood requests, users and donors."""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    req = create_request(client, headers)
+    response = client.get(f"/blood-requests/{req['id']}", headers=headers)
+    etag = response.headers["ETag"]
+    assert client.get(f"/blood-requests/{req['id']}", headers={**headers, "If-None-Match": etag}).status_code == 304
+    assert client.get(f"/blood-requests/{req['id']}", headers={**headers, "If-None-Match": "*"}).status_code == 304
+
+    client.put(f"/blood-requests/{req['id']}", headers=headers, json={"status": "Fulfilled"})
+    response = client.get(f"/blood-requests/{req['id']}", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert json.loads(response.data)["status"] == "Fulfilled"
+
+    with client.application.app_context():
+        user_id = User.query.filter_by(email="hospital@test.com").first().id
+    client.post("/donors/", headers=headers, json={"medical_history": "Healthy"})
+    with client.application.app_context():
+        donor_id = Donor.query.filter_by(user_id=user_id).first().id
+
+    user_etag = client.get(f"/users/{user_id}", headers=headers).headers["ETag"]
+    donor_etag = client.get(f"/donors/{donor_id}", headers=headers).headers["ETag"]
+    assert client.get(f"/donors/{donor_id}", headers={**headers, "If-None-Match": donor_etag}).status_code == 304
+
+    # A new request only touches the user's counter, not its updated_at
+    create_request(client, headers, name="Second")
+    response = client.get(f"/users/{user_id}", headers={**headers, "If-None-Match": user_etag})
+    assert response.status_code == 200
+    assert json.loads(response.data)["requests"] == 2
+    assert client.get(f"/donors/{donor_id}", headers={**headers, "If-None-Match": donor_etag}).status_code == 200
@@ -1,3 +1,4 @@
+import datetime
 import json
 from models.User.model import User
 from models.Donor.model import Donor
@@ -122,3 +123,180 @@ def test_unauthorized_update(client, user1_token, user2_token):
         json={"is_available": False}
     )
     assert response.status_code == 401
+
+def test_donor_list_matches_detail(client, user1_token, user2_token, statements):
+    """
+    Test that the projected list rows serialize exactly like the detail endpoint,
+    and that the list is fetched in a single statement after the version lookup.
+    """
+    for token in (user1_token, user2_token):
+        client.post("/donors/", headers={"Authorization": f"Bearer {token}"}, json={"medical_history": "Healthy"})
+
+    with statements:
+        response = client.get("/donors/", headers={"Authorization": f"Bearer {user1_token}"})
+
+    assert response.status_code == 200
+    # The ETag version lookup and the page query; the JWT user lookup is served from the cache
+    assert len(statements) == 2
+
+    listed = json.loads(response.data)
+    assert len(listed) == 2
+    for donor in listed:
+        detail = client.get(f"/donors/{donor['id']}", headers={"Authorization": f"Bearer {user1_token}"})
+        assert json.loads(detail.data) == donor
+
+def test_get_donors_near(client, user1_token):
+    """
+    Test the nearest-donor search: ordered by distance, bounded by radius,
+    unavailable donors excluded.
+    """
+    places = [
+        ("Lagos", 6.5244, 3.3792, True),
+        ("Ikeja", 6.6018, 3.3515, True),
+        ("Ibadan", 7.3775, 3.9470, True),
+        ("Abuja", 9.0765, 7.3986, True),
+        ("Yaba", 6.5095, 3.3711, False),
+    ]
+    with client.application.app_context():
+        for name, latitude, longitude, available in places:
+            user = User(name=name, email=f"{name}@test.com", blood_type="O+", latitude=latitude, longitude=longitude)
+            user.set_password("pw")
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(Donor(user_id=user.id, is_available=available))
+        db.session.commit()
+
+    headers = {"Authorization": f"Bearer {user1_token}"}
+    response = client.get("/donors/?near=6.52,3.38&radius_km=50", headers=headers)
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert [donor["user"]["name"] for donor in data] == ["Lagos", "Ikeja"]
+    assert data[0]["distance_km"] < data[1]["distance_km"]
+
+    response = client.get("/donors/?near=6.52,3.38&radius_km=200", headers=headers)
+    assert [donor["user"]["name"] for donor in json.loads(response.data)] == ["Lagos", "Ikeja", "Ibadan"]
+
+    response = client.get("/donors/?near=6.52,3.38&radius_km=1000&limit=1", headers=headers)
+    assert [donor["user"]["name"] for donor in json.loads(response.data)] == ["Lagos"]
+
+    response = client.get("/donors/?near=91,3.38", headers=headers)
+    assert response.status_code == 400
+
+def test_get_donors_near_matches_brute_force(client, user1_token):
+    """
+    Test that the ring walk returns exactly the k nearest donors.
+    """
+    import random
+    from geo import haversine_km
+
+    rng = random.Random(7)
+    points = []
+    with client.application.app_context():
+        for i in range(200):
+            latitude, longitude = rng.uniform(5.5, 7.5), rng.uniform(2.5, 4.5)
+            points.append((haversine_km(6.5, 3.4, latitude, longitude), f"Donor {i}"))
+            user = User(name=f"Donor {i}", email=f"donor{i}@test.com", blood_type="A+", latitude=latitude, longitude=longitude, password_hash="!")
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(Donor(user_id=user.id))
+        db.session.commit()
+
+    response = client.get("/donors/?near=6.5,3.4&radius_km=500&limit=15", headers={"Authorization": f"Bearer {user1_token}"})
+    expected = [name for _, name in sorted(points)[:15]]
+    assert [donor["user"]["name"] for donor in json.loads(response.data)] == expected
+
+def test_get_donors_near_high_latitude(client, user1_token, statements):
+    """
+    Test that searches near the poles stay within geo.MAX_RINGS lookups and
+    still find every donor in range, including across the antimeridian.
+    """
+    import geo
+
+    places = [("Oslo", 59.91, 10.75), ("Bergen", 60.39, 5.32), ("Helsinki", 60.17, 24.94),
+              ("Tromso", 69.65, 18.96), ("Alert", 82.5, -62.35), ("Pole", 89.9, 170.0)]
+    with client.application.app_context():
+        for name, latitude, longitude in places:
+            user = User(name=name, email=f"{name}@test.com", blood_type="O+", latitude=latitude, longitude=longitude, password_hash="!")
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(Donor(user_id=user.id))
+        db.session.commit()
+
+    headers = {"Authorization": f"Bearer {user1_token}"}
+    for near in ("60,0", "70,20", "86,0", "-89.9,0"):
+        latitude, longitude = map(float, near.split(","))
+        expected = sorted((geo.haversine_km(latitude, longitude, lat, lon), name)
+                          for name, lat, lon in places if geo.haversine_km(latitude, longitude, lat, lon) <= 500)
+        with statements:
+            response = client.get(f"/donors/?near={near}&radius_km=500&limit=50", headers=headers)
+        assert response.status_code == 200
+        assert [donor["user"]["name"] for donor in json.loads(response.data)] == [name for _, name in expected]
+        assert len(statements) <= geo.MAX_RINGS + 1
+    # Nothing in range of the last search: it walked the whole window and stopped
+    assert expected == [] and len(statements) > 40
+
+def test_get_donors_search_index(client, user1_token):
+    """
+    Test the name/location filters through the search index, including
+    rows updated after insert and terms too short for the trigram index.
+    """
+    with client.application.app_context():
+        for name, location in [("Ada Obi", "Lagos Island"), ("Bola Ade", "Ikeja, Lagos"), ("Chidi Eze", "Enugu")]:
+            user = User(name=name, email=f"{name.split()[0]}@test.com", blood_type="O+", location=location, password_hash="!")
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(Donor(user_id=user.id))
+        db.session.commit()
+
+        User.query.filter_by(name="Chidi Eze").first().location = "Lagos Mainland"
+        db.session.commit()
+
+    headers = {"Authorization": f"Bearer {user1_token}"}
+    def names(query):
+        response = client.get(f"/donors/?{query}", headers=headers)
+        assert response.status_code == 200
+        return sorted(donor["user"]["name"] for donor in json.loads(response.data))
+
+    assert names("location=lagos") == ["Ada Obi", "Bola Ade", "Chidi Eze"]
+    assert names("location=enugu") == []
+    assert names("name=ADE") == ["Bola Ade"]
+    assert names("name=ad") == ["Ada Obi", "Bola Ade"]
+    assert names('name=%22') == []
+    assert names("name=obi&location=island") == ["Ada Obi"]
+
+def test_donor_eligibility(client, user1_token, user2_token):
+    """
+    Test that eligible_from follows last_donation, including recorded donations,
+    and that ?eligible=true returns only available donors past their deferral.
+    """
+    headers1 = {"Authorization": f"Bearer {user1_token}"}
+    headers2 = {"Authorization": f"Bearer {user2_token}"}
+    response = client.post("/donors/", headers=headers1, json={"last_donation": "2026-01-10T15:30:00"})
+    donor1 = json.loads(response.data)
+    assert donor1["eligible_from"].startswith("2026-03-07T00:00:00")
+    donor2 = json.loads(client.post("/donors/", headers=headers2, json={}).data)
+    # Never donated: eligible, and served as null rather than a placeholder date
+    assert donor2["eligible_from"] is None
+
+    assert client.post("/donors/", headers=headers1, json={"last_donation": "last week"}).status_code == 400
+    assert client.put(f"/donors/{donor1['id']}", headers=headers1, json={"last_donation": "soon"}).status_code == 400
+
+    def eligible():
+        response = client.get("/donors/?eligible=true", headers=headers1)
+        assert response.status_code == 200
+        return sorted(donor["id"] for donor in json.loads(response.data))
+
+    assert eligible() == [donor1["id"], donor2["id"]]
+
+    # Recording a donation moves last_donation, and with it eligible_from
+    today = datetime.datetime.utcnow().date()
+    client.post("/blood-donations/", headers=headers2, json={"donation_date": today.isoformat(), "blood_group": "B-"})
+    donor2 = json.loads(client.get(f"/donors/{donor2['id']}", headers=headers2).data)
+    assert donor2["eligible_from"].startswith((today + datetime.timedelta(days=56)).isoformat())
+    assert eligible() == [donor1["id"]]
+
+    client.put(f"/donors/{donor1['id']}", headers=headers1, json={"is_available": False})
+    assert eligible() == []
+    client.put(f"/donors/{donor1['id']}", headers=headers1, json={"is_available": True, "last_donation": None})
+    assert json.loads(client.get(f"/donors/{donor1['id']}", headers=headers1).data)["eligible_from"] is None
+    assert eligible() == [donor1["id"]]
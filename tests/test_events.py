@@ -0,0 +1,210 @@
+import asyncio
+import json
+import time
+from flask_jwt_extended import create_access_token
+from sqlalchemy import insert
+from main import create_app
+from database import db
+import events
+from models.BloodRequest.model import BloodRequest
+from models.User.model import User
+import pytest
+
+LAGOS = (6.5244, 3.3792)
+
+@pytest.fixture
+def app():
+    app = create_app(config_overrides={
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+        "JWT_SECRET_KEY": "test-secret-key",
+        "JOB_WORKERS": 0,
+        "EVENT_HEARTBEAT_SECONDS": 0.05,
+        "EVENT_POLL_SECONDS": 0.05,
+    })
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def requester(app):
+    user = User(name="Requester", email="requester@test.com", blood_type="A+", password_hash="x")
+    db.session.add(user)
+    db.session.commit()
+    return user.id
+
+def auth(user_id):
+    return {"Authorization": f"Bearer {create_access_token(identity=str(user_id))}"}
+
+def create_request(app, requester, blood_type="A+", location="Lagos", coordinates=None):
+    body = {"blood_type": blood_type, "quantity": 1, "location": location, "name": "Patient", "phone": "0800"}
+    if coordinates:
+        body["latitude"], body["longitude"] = coordinates
+    response = app.test_client().post("/blood-requests/", json=body, headers=auth(requester))
+    assert response.status_code == 201
+    return response.get_json()["id"]
+
+def parse(text):
+    """(event, id, data) for each event in a chunk of the stream, skipping comments."""
+    parsed = []
+    for frame in text.split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in frame.splitlines() if not line.startswith(":"))
+        if fields:
+            parsed.append((fields["event"], fields.get("id"), json.loads(fields["data"])))
+    return parsed
+
+def read_events(chunks, count, timeout=5):
+    received = []
+    deadline = time.monotonic() + timeout
+    while len(received) < count and time.monotonic() < deadline:
+        received += parse(next(chunks).decode())
+    return received
+
+def open_stream(app, requester, query="", headers=None):
+    # As served by gunicorn's gthread worker
+    response = app.test_client().get(f"/blood-requests/stream{query}", environ_overrides={"wsgi.multithread": True},
+                                     headers={**auth(requester), **(headers or {})}, buffered=False)
+    assert response.status_code == 200
+    assert response.mimetype == "text/event-stream"
+    return response, response.iter_encoded()
+
+def test_stream_sends_matching_changes_after_commit(app, requester):
+    """Test that subscribers get created and updated requests matching their filters, once committed."""
+    response, chunks = open_stream(app, requester, "?blood_type=A%2B,O-&location=lagos")
+    wanted = create_request(app, requester, "A+")
+    create_request(app, requester, "B+")
+    create_request(app, requester, "O-", location="Abuja")
+    app.test_client().put(f"/blood-requests/{wanted}", json={"status": "Fulfilled"}, headers=auth(requester))
+
+    received = read_events(chunks, 2)
+    response.close()
+    assert [(event, data["id"], data["status"]) for event, _, data in received] == [
+        ("created", wanted, "Pending"),
+        ("updated", wanted, "Fulfilled"),
+    ]
+    # Each event id is a cursor a reconnecting client can resume from
+    assert received[0][1] != received[1][1]
+
+def test_stream_filters_by_distance(app, requester):
+    """Test that near and radius_km keep only requests close by, and are validated."""
+    response, chunks = open_stream(app, requester, f"?near={LAGOS[0]},{LAGOS[1]}&radius_km=10")
+    create_request(app, requester, coordinates=(51.5, -0.12))
+    create_request(app, requester, location="Unknown")
+    nearby = create_request(app, requester, coordinates=LAGOS)
+    received = read_events(chunks, 1)
+    response.close()
+    assert [data["id"] for _, _, data in received] == [nearby]
+
+    bad = app.test_client().get("/blood-requests/stream?near=north", headers=auth(requester))
+    assert bad.status_code == 400
+
+def test_rollback_publishes_nothing(app, requester):
+    """Test that changes rolled back never reach the bus."""
+    bus = app.extensions["blood_request_events"]
+    db.session.add(BloodRequest(requester, "A+", 1, "Lagos", "Patient", "0800"))
+    db.session.flush()
+    db.session.rollback()
+    assert bus.seq == 0
+    create_request(app, requester)
+    assert bus.seq == 1
+
+def test_last_event_id_resumes(app, requester, monkeypatch):
+    """Test that reconnecting resumes after Last-Event-ID from the buffer, then from the table, else resets."""
+    bus = app.extensions["blood_request_events"]
+    ids = [create_request(app, requester) for _ in range(3)]
+    first = bus.after(0)[0][1].id
+
+    response, chunks = open_stream(app, requester, headers={"Last-Event-ID": first})
+    assert [data["id"] for _, _, data in read_events(chunks, 2)] == ids[1:]
+    response.close()
+
+    # Another process, or one whose buffer has moved on, replays from the table
+    app.extensions["blood_request_events"] = events.EventBus(app, 1000, 0, 8)
+    response, chunks = open_stream(app, requester, headers={"Last-Event-ID": first})
+    assert [data["id"] for _, _, data in read_events(chunks, 2)] == ids[1:]
+    response.close()
+
+    monkeypatch.setattr(app.extensions["blood_request_events"], "buffer_size", 1)
+    response, chunks = open_stream(app, requester, headers={"Last-Event-ID": first})
+    assert read_events(chunks, 1) == [("reset", None, {})]
+    response.close()
+
+    response, chunks = open_stream(app, requester, headers={"Last-Event-ID": "garbage"})
+    assert read_events(chunks, 1) == [("reset", None, {})]
+    response.close()
+
+def test_stream_polls_for_writes_made_elsewhere(app, requester):
+    """Test that rows written without the ORM, e.g. by another process, are published by polling."""
+    response, chunks = open_stream(app, requester)
+    db.session.execute(insert(BloodRequest).values(
+        requester_id=requester, blood_type="AB-", quantity=2, location="Lagos", name="Patient", status="Pending"))
+    db.session.commit()
+    received = read_events(chunks, 1)
+    response.close()
+    assert [(event, data["blood_type"]) for event, _, data in received] == [("created", "AB-")]
+
+def test_stream_refuses_to_hold_a_worker(app, requester):
+    """Test that streams are refused on sync workers and beyond EVENT_MAX_THREAD_SUBSCRIBERS threads."""
+    response = app.test_client().get("/blood-requests/stream", headers=auth(requester),
+                                     environ_overrides={"wsgi.multithread": False})
+    assert response.status_code == 503
+
+    app.config["EVENT_MAX_THREAD_SUBSCRIBERS"] = 2
+    events.init_events(app)
+    streams = [open_stream(app, requester)[0] for _ in range(2)]
+    refused = app.test_client().get("/blood-requests/stream", headers=auth(requester),
+                                    environ_overrides={"wsgi.multithread": True})
+    assert refused.status_code == 503 and refused.headers["Retry-After"]
+    # Closing a stream frees its thread for the next subscriber
+    streams.pop().close()
+    streams.append(open_stream(app, requester)[0])
+    for response in streams:
+        response.close()
+
+def test_asgi_stream(tmp_path):
+    """Test that under ASGI the stream waits on the event loop and ends when the client disconnects."""
+    app = create_app(config_overrides={
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path}/events.db",
+        "JWT_SECRET_KEY": "test-secret-key",
+        "JOB_WORKERS": 0,
+    })
+    with app.app_context():
+        db.create_all()
+        user = User(name="Requester", email="requester@test.com", blood_type="A+", password_hash="x")
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+        headers = [(name.lower().encode(), value.encode()) for name, value in auth(user_id).items()]
+
+        async def run():
+            scope = {"type": "http", "method": "GET", "path": "/blood-requests/stream",
+                     "query_string": b"blood_type=O%2B", "headers": headers}
+            disconnect = asyncio.Event()
+            sent = []
+
+            async def receive():
+                await disconnect.wait()
+                return {"type": "http.disconnect"}
+
+            async def send(message):
+                sent.append(message)
+                if b"created" in message.get("body", b""):
+                    disconnect.set()
+
+            stream = asyncio.ensure_future(events.asgi_stream(app, scope, receive, send))
+            while len(sent) < 2:
+                await asyncio.sleep(0.01)
+            def post():
+                with app.app_context():
+                    create_request(app, user_id, "O+")
+            await asyncio.get_running_loop().run_in_executor(None, post)
+            await asyncio.wait_for(stream, 5)
+            return sent
+
+        sent = asyncio.run(run())
+        db.engine.dispose()
+    assert sent[0]["status"] == 200
+    assert (b"content-type", b"text/event-stream; charset=utf-8") in sent[0]["headers"]
+    assert parse(sent[-1]["body"].decode())[0][0] == "created"
@@ -0,0 +1,112 @@
+import csv
+import datetime
+import io
+import json
+from models.User.model import User
+from models.Donor.model import Donor
+from models.BloodRequest.model import BloodRequest
+from models.BloodDonation.model import BloodDonation
+from database import db
+import pytest
+
+@pytest.fixture
+def auth_token(client):
+    with client.application.app_context():
+        user = User(name="Hospital", email="hospital@test.com", blood_type="O+")
+        user.set_password("password")
+        db.session.add(user)
+        db.session.commit()
+
+    response = client.post("/auth/login", json={"email": "hospital@test.com", "password": "password"})
+    return json.loads(response.data)["access_token"]
+
+def add_requests(client, count):
+    with client.application.app_context():
+        user_id = User.query.filter_by(email="hospital@test.com").first().id
+        start = datetime.datetime(2026, 1, 1)
+        for i in range(count):
+            req = BloodRequest(requester_id=user_id, blood_type="O+", quantity=1, location="Lagos", name=f"Patient {i}", phone=None)
+            req.created_at = start + datetime.timedelta(days=i)
+            if i % 2:
+                req.status = "Fulfilled"
+            db.session.add(req)
+        db.session.commit()
+
+def test_export_blood_requests_ndjson(client, auth_token):
+    """Test that the export streams every row in chunks, across partition boundaries."""
+    client.application.config["EXPORT_CHUNK_SIZE"] = 2
+    add_requests(client, 5)
+
+    response = client.get("/blood-requests/export", headers={"Authorization": f"Bearer {auth_token}"})
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == "application/x-ndjson"
+    assert response.headers["Content-Disposition"] == 'attachment; filename="blood-requests.ndjson"'
+
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [row["name"] for row in rows] == [f"Patient {i}" for i in range(5)]
+    assert rows[0]["created_at"] == "2026-01-01T00:00:00"
+
+    detail = client.get(f"/blood-requests/{rows[0]['id']}", headers={"Authorization": f"Bearer {auth_token}"})
+    assert rows[0] == json.loads(detail.data)
+
+def test_export_blood_requests_filters_csv(client, auth_token):
+    """Test date range and status filters on a CSV export."""
+    add_requests(client, 6)
+
+    response = client.get("/blood-requests/export?format=csv&status=Fulfilled&since=2026-01-02&until=2026-01-06",
+                          headers={"Authorization": f"Bearer {auth_token}"})
+    assert response.status_code == 200
+    assert response.mimetype == "text/csv"
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert [row["name"] for row in rows] == ["Patient 1", "Patient 3"]
+    assert rows[0]["donor_id"] == ""
+
+    response = client.get("/blood-requests/export?format=csv&status=Unknown",
+                          headers={"Authorization": f"Bearer {auth_token}"})
+    assert response.get_data(as_text=True).splitlines() == [",".join(BloodRequest.__table__.columns.keys())]
+
+def test_export_invalid_arguments(client, auth_token):
+    """Test that a bad format or date range is rejected before streaming starts."""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    assert client.get("/blood-requests/export?format=xml", headers=headers).status_code == 400
+    assert client.get("/blood-requests/export?since=yesterday", headers=headers).status_code == 400
+    assert client.get("/blood-donations/export?since=2026-02-01&until=2026-01-01", headers=headers).status_code == 400
+
+def test_create_and_export_blood_donations(client, auth_token):
+    """Test recording donations and exporting them by donation date."""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    with client.application.app_context():
+        user_id = User.query.filter_by(email="hospital@test.com").first().id
+        db.session.add(Donor(user_id=user_id))
+        db.session.commit()
+
+    for body in ({"donation_date": "2026-03-01"}, {"blood_group": "Z+", "donation_date": "2026-03-01"},
+                 {"blood_group": "O+", "donation_date": "March"}):
+        assert client.post("/blood-donations/", json=body, headers=headers).status_code == 400
+
+    for day in ("2026-03-01", "2026-01-10", "2026-02-05"):
+        response = client.post("/blood-donations/", json={"blood_group": "O+", "donation_date": day, "donation_time": "09:30"}, headers=headers)
+        assert response.status_code == 201
+    assert json.loads(response.data)["user_id"] == user_id
+
+    with client.application.app_context():
+        assert Donor.query.filter_by(user_id=user_id).first().last_donation == datetime.datetime(2026, 2, 5, 9, 30)
+        assert BloodDonation.query.count() == 3
+
+    response = client.get("/blood-donations/export?until=2026-03-01", headers=headers)
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [row["date"] for row in rows] == ["2026-01-10", "2026-02-05"]
+    assert rows[0]["time"] == "09:30:00"
+    assert rows[0]["blood_group"] == "O+"
+
+    # Donations are dated by day: a bound with a time keeps the whole of its day
+    for query, days in (("since=2026-02-05T12:00&until=2026-03-01T00:00", ["2026-02-05"]),
+                        ("since=2026-01-10T00:00&until=2026-03-01T00:00:01", ["2026-01-10", "2026-02-05", "2026-03-01"]),
+                        ("since=2026-02-05T08:00&until=2026-02-05T09:00", ["2026-02-05"])):
+        response = client.get(f"/blood-donations/export?{query}", headers=headers)
+        assert [json.loads(line)["date"] for line in response.get_data(as_text=True).splitlines()] == days, query
+
+    response = client.get("/blood-donations/?limit=2", headers=headers)
+    assert len(json.loads(response.data)) == 2
+    assert "X-Next-Cursor" in response.headers
@@ -0,0 +1,164 @@
+import datetime
+import time
+from flask_jwt_extended import create_access_token
+from main import create_app
+from database import db
+import jobs
+from models.Job.model import Job
+from models.User.model import User
+from models.Donor.model import Donor
+import pytest
+
+LAGOS = (6.5244, 3.3792)
+
+@pytest.fixture
+def app():
+    app = create_app(config_overrides={
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+        "JWT_SECRET_KEY": "test-secret-key",
+        "NOTIFIER": "memory",
+        "NOTIFY_BATCH_SIZE": 2,
+        "JOB_MAX_ATTEMPTS": 3,
+        "JOB_RETRY_DELAY_SECONDS": 0,
+    })
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+def add_user(email, blood_type, location="Lagos", coordinates=LAGOS, donor=True, available=True, last_donation=None):
+    latitude, longitude = coordinates or (None, None)
+    user = User(name=email.split("@")[0], email=email, blood_type=blood_type, location=location,
+                latitude=latitude, longitude=longitude, password_hash="x")
+    db.session.add(user)
+    db.session.flush()
+    if donor:
+        db.session.add(Donor(user_id=user.id, is_available=available, last_donation=last_donation))
+    db.session.commit()
+    return user.id
+
+def create_request(app, requester_id, blood_type="A+", coordinates=LAGOS, location="Lagos"):
+    body = {"blood_type": blood_type, "quantity": 1, "location": location, "name": "Patient", "phone": "0800"}
+    if coordinates:
+        body["latitude"], body["longitude"] = coordinates
+    token = create_access_token(identity=str(requester_id))
+    response = app.test_client().post("/blood-requests/", json=body, headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 201
+    return response.get_json()["id"]
+
+def notified(app):
+    return sorted(recipient["email"] for recipient, _ in app.extensions["notifier"].sent)
+
+def test_new_request_notifies_matching_donors(app):
+    """Test that creating a request queues a job that notifies compatible, eligible donors nearby."""
+    requester = add_user("requester@test.com", "A+", donor=False)
+    add_user("exact@test.com", "A+")
+    add_user("universal@test.com", "O-")
+    add_user("incompatible@test.com", "B+")
+    add_user("unavailable@test.com", "A+", available=False)
+    add_user("deferred@test.com", "A+", last_donation=datetime.datetime.utcnow() - datetime.timedelta(days=10))
+    add_user("abroad@test.com", "A+", coordinates=(51.5, -0.12))
+    add_user("not-a-donor@test.com", "A+", donor=False)
+
+    request_id = create_request(app, requester)
+    # The response did not wait for any of it
+    assert notified(app) == []
+    assert [(job.kind, job.payload) for job in Job.query.all()] == [("match_donors", {"request_id": request_id})]
+
+    # Matching, notifying, and matching the next (empty) batch of two
+    assert app.extensions["job_runner"].run_pending() == 3
+    assert notified(app) == ["exact@test.com", "universal@test.com"]
+    _, message = app.extensions["notifier"].sent[0]
+    assert message["request_id"] == request_id and message["blood_type"] == "A+"
+    assert Job.query.count() == 0
+
+def test_matching_runs_in_batches(app):
+    """Test that donors are matched and notified a batch at a time, falling back to the location name."""
+    requester = add_user("requester@test.com", "O+", donor=False)
+    for n in range(5):
+        add_user(f"donor{n}@test.com", "O+", coordinates=None)
+    add_user("elsewhere@test.com", "O+", location="Abuja", coordinates=None)
+
+    create_request(app, requester, blood_type="O+", coordinates=None, location="lagos")
+    # Three match_donors batches of two, two and one, each with a notify_donors job
+    assert app.extensions["job_runner"].run_pending() == 6
+    assert notified(app) == [f"donor{n}@test.com" for n in range(5)]
+
+def test_failed_notifications_are_retried(app, monkeypatch):
+    """Test that a retry only resends what failed, and a job that keeps failing is kept as failed."""
+    requester = add_user("requester@test.com", "AB+", donor=False)
+    add_user("flaky@test.com", "AB+")
+    add_user("steady@test.com", "AB+")
+    failures = {"flaky@test.com": 1}
+    sent = []
+
+    def send(recipient, message):
+        if failures.get(recipient["email"], 0):
+            failures[recipient["email"]] -= 1
+            raise ConnectionError("gateway timeout")
+        sent.append(recipient["email"])
+    monkeypatch.setattr(app.extensions["notifier"], "send", send)
+
+    create_request(app, requester, blood_type="AB+")
+    app.extensions["job_runner"].run_pending()
+    assert sorted(sent) == ["flaky@test.com", "steady@test.com"]
+    assert Job.query.count() == 0
+
+    failures["flaky@test.com"] = 10
+    sent.clear()
+    create_request(app, requester, blood_type="AB+")
+    app.extensions["job_runner"].run_pending()
+    assert sent == ["steady@test.com"]
+    job = Job.query.one()
+    assert (job.kind, job.status, job.attempts) == ("notify_donors", "failed", 3)
+    assert job.payload["user_ids"] == [User.query.filter_by(email="flaky@test.com").one().id]
+    assert "gateway timeout" in job.last_error
+
+def test_jobs_survive_a_dead_worker(app):
+    """Test that a job left running by a worker that died is claimed again once its lock times out."""
+    ran = []
+    jobs.HANDLERS["test_record"] = ran.append
+    try:
+        stale = datetime.datetime.utcnow() - datetime.timedelta(hours=1)
+        db.session.add_all([
+            Job(kind="test_record", payload={"n": 1}, status="running", attempts=1, max_attempts=3,
+                run_at=stale, locked_at=stale),
+            Job(kind="test_record", payload={"n": 2}, status="running", attempts=1, max_attempts=3,
+                run_at=stale, locked_at=datetime.datetime.utcnow()),
+            Job(kind="test_record", payload={"n": 3}, status="pending", attempts=0, max_attempts=3,
+                run_at=datetime.datetime.utcnow() + datetime.timedelta(hours=1)),
+        ])
+        db.session.commit()
+
+        assert app.extensions["job_runner"].run_pending() == 1
+        assert ran == [{"n": 1}]
+        assert sorted(job.payload["n"] for job in Job.query.all()) == [2, 3]
+    finally:
+        del jobs.HANDLERS["test_record"]
+
+def test_worker_threads_pick_up_jobs(tmp_path):
+    """Test that the worker threads run a job as soon as the request that queued it commits."""
+    threaded = create_app(config_overrides={
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path}/jobs.db",
+        "JWT_SECRET_KEY": "test-secret-key",
+        "NOTIFIER": "memory",
+        "JOB_POLL_SECONDS": 60,
+    })
+    with threaded.app_context():
+        db.create_all()
+        requester = add_user("requester@test.com", "B-", donor=False)
+        add_user("donor@test.com", "B-")
+        runner = threaded.extensions["job_runner"]
+        runner.start()
+        try:
+            create_request(threaded, requester, blood_type="B-")
+            notifier = threaded.extensions["notifier"]
+            deadline = time.monotonic() + 10
+            while not notifier.sent and time.monotonic() < deadline:
+                time.sleep(0.05)
+            assert notified(threaded) == ["donor@test.com"]
+        finally:
+            runner.stop()
+            db.engine.dispose()
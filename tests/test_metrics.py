@@ -0,0 +1,76 @@
+import json
+import logging
+from models.User.model import User
+from database import db
+import pytest
+
+@pytest.fixture
+def auth_token(client):
+    with client.application.app_context():
+        user = User(name="Metrics", email="metrics@test.com", blood_type="O+")
+        user.set_password("password")
+        db.session.add(user)
+        db.session.commit()
+
+    response = client.post("/auth/login", json={"email": "metrics@test.com", "password": "password"})
+    return json.loads(response.data)["access_token"]
+
+def scrape(client):
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    samples = {}
+    for line in response.get_data(as_text=True).splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+def test_request_metrics(client, auth_token):
+    """Test latency, size, SQL and serialization metrics per endpoint."""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    for _ in range(2):
+        response = client.get("/users/", headers=headers, buffered=True)
+        assert response.status_code == 200
+    client.get("/no-such-page", buffered=True)
+
+    samples = scrape(client)
+    labels = 'endpoint="user.get_users",method="GET",status="200"'
+    assert samples[f"http_request_duration_seconds_count{{{labels}}}"] == 2
+    assert samples[f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}}'] == 2
+    assert samples[f"http_response_size_bytes_sum{{{labels}}}"] == 2 * len(response.data)
+    # The revoked token refresh once, then the table version lookup and the page query per request
+    assert samples[f"http_request_sql_statements_total{{{labels}}}"] == 5
+    assert samples[f"http_request_sql_seconds_total{{{labels}}}"] > 0
+    assert samples[f"http_request_serialization_seconds_total{{{labels}}}"] > 0
+    assert samples['http_request_duration_seconds_count{endpoint="unmatched",method="GET",status="404"}'] == 1
+    assert samples["password_hasher_calls_total"] == 2
+    assert samples['user_cache_lookups_total{result="hit"}'] == 2
+
+def test_streamed_response_metrics(client, auth_token):
+    """Test that a streamed export counts the queries it runs while streaming."""
+    response = client.get("/blood-requests/export", headers={"Authorization": f"Bearer {auth_token}"})
+    response.get_data()
+    response.close()
+
+    samples = scrape(client)
+    labels = 'endpoint="blood-request.export_blood_requests",method="GET",status="200"'
+    # The revoked token refresh, then the export query run from the response generator
+    assert samples[f"http_request_sql_statements_total{{{labels}}}"] == 2
+    assert f"http_response_size_bytes_count{{{labels}}}" not in samples
+
+def test_slow_query_log(client, auth_token, caplog):
+    """Test that statements over SLOW_QUERY_MS are logged with their endpoint."""
+    client.application.extensions["metrics"].slow_query_seconds = 0
+    with caplog.at_level(logging.WARNING):
+        client.get("/users/", headers={"Authorization": f"Bearer {auth_token}"})
+    assert any("Slow query" in record.message and "user.get_users" in record.message for record in caplog.records)
+    assert scrape(client)['sql_slow_queries_total{endpoint="user.get_users"}'] >= 1
+
+def test_pool_metrics(tmp_path):
+    """Test that pool gauges are reported for a pooled database."""
+    from main import create_app
+    app = create_app(config_overrides={"SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path}/metrics.db", "DB_POOL_SIZE": 3})
+    samples = scrape(app.test_client())
+    assert samples['db_pool_size{bind="default"}'] == 3
+    assert samples['db_pool_checked_out{bind="default"}'] == 0
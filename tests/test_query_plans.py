@@ -0,0 +1,139 @@
+import datetime
+import json
+import re
+import pytest
+from sqlalchemy import text
+from models.User.model import User
+from models.Donor.model import Donor
+from models.BloodRequest.model import BloodRequest
+from models.BloodRequest import notify
+from database import db
+
+# Every list endpoint, with each of its filters, must be served by an index
+ENDPOINTS = [
+    "/users/",
+    "/donors/",
+    "/donors/?blood_group=O%2B",
+    "/donors/?name=ada",
+    "/donors/?location=lagos",
+    "/donors/?near=6.5,3.4&radius_km=20",
+    "/donors/?eligible=true",
+    "/blood-requests/",
+    "/blood-requests/?blood_type=O%2B",
+    "/blood-requests/?requester_id=1",
+    "/blood-requests/?donor_id=1",
+    "/blood-requests/1/matches",
+    "/blood-requests/export",
+    "/blood-requests/export?status=Pending&since=2026-01-01",
+    "/blood-donations/",
+    "/blood-donations/export?status=Completed&since=2026-01-01&until=2026-02-01",
+    "/stats/",
+    "/stats/?blood_type=O%2B&location=Lagos",
+]
+
+@pytest.fixture
+def auth_token(client):
+    with client.application.app_context():
+        user = User(name="Ada Obi", email="ada@test.com", blood_type="O+", location="Lagos", latitude=6.5, longitude=3.4)
+        user.set_password("password")
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(Donor(user_id=user.id))
+        db.session.add(BloodRequest(requester_id=user.id, blood_type="O+", quantity=1, location="Lagos", name="Patient", phone=None))
+        db.session.commit()
+
+    response = client.post("/auth/login", json={"email": "ada@test.com", "password": "password"})
+    return json.loads(response.data)["access_token"]
+
+def full_scans(connection, statement, parameters):
+    """Tables the statement reads without an index, according to the planner."""
+    tables = set(db.metadata.tables)
+    if connection.dialect.name == "postgresql":
+        connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        plan = connection.exec_driver_sql(f"EXPLAIN {statement}", parameters).scalars().all()
+        return [line for line in plan if re.search(r"Seq Scan on (\w+)", line) and re.search(r"Seq Scan on (\w+)", line).group(1) in tables]
+
+    plan = [row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+    scans = []
+    for line in plan:
+        match = re.match(r"SCAN (\w+)", line)
+        if match and match.group(1) in tables and "INDEX" not in line:
+            scans.append(line)
+    return scans
+
+@pytest.mark.parametrize("url", ENDPOINTS)
+def test_list_endpoint_uses_indexes(client, auth_token, statements, url):
+    """Test that no statement run by a list endpoint falls back to a full table scan."""
+    with statements:
+        response = client.get(url, headers={"Authorization": f"Bearer {auth_token}"})
+        # Exports run their query while the body streams
+        response.get_data()
+    assert response.status_code == 200
+
+    with client.application.app_context():
+        connection = db.session.connection()
+        for statement, parameters in statements:
+            if statement.lstrip().upper().startswith("SELECT"):
+                assert full_scans(connection, statement, parameters) == [], statement
+
+# Searches that also filter on Donor.eligible(), with the index that must drive
+# them; every other donor/user access must be a lookup by key
+DRIVING_INDEXES = [
+    ("/blood-requests/1/matches", "ix_donor_blood_type_eligible"),
+    ("/donors/?eligible=true", "ix_donor_created_at_id"),
+    ("/donors/?near=6.5,3.4&radius_km=20", "ix_user_geo_cell"),
+]
+KEY_LOOKUPS = ("INTEGER PRIMARY KEY", "sqlite_autoindex_donor_1")
+
+@pytest.fixture
+def populated(client, auth_token):
+    """Donors of every blood type around Lagos, some deferred or unavailable; no ANALYZE statistics."""
+    blood_types = ["O-", "O+", "A-", "A+", "B-", "B+", "AB-", "AB+"]
+    with client.application.app_context():
+        for i in range(400):
+            user = User(name=f"Donor {i}", email=f"donor{i}@test.com", blood_type=blood_types[i % 8],
+                        location="Lagos", latitude=6.5 + i % 20 * 0.01, longitude=3.4 + i % 17 * 0.01)
+            user.password_hash = "x"
+            db.session.add(user)
+            db.session.flush()
+            last_donation = datetime.datetime.utcnow() - datetime.timedelta(days=i % 90) if i % 3 else None
+            db.session.add(Donor(user_id=user.id, is_available=i % 7 != 0, last_donation=last_donation))
+        db.session.commit()
+        assert not db.session.execute(text("SELECT name FROM sqlite_master WHERE name = 'sqlite_stat1'")).all()
+
+def driving_scans(connection, statement, parameters):
+    plan = [row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+    return [line for line in plan
+            if re.match(r"(SCAN|SEARCH) (donor|user)\b", line) and not any(key in line for key in KEY_LOOKUPS)]
+
+@pytest.mark.parametrize("url,index", DRIVING_INDEXES)
+def test_eligibility_searches_use_their_own_index(client, auth_token, populated, statements, url, index):
+    """Test that eligible-donor searches are driven by their filter's index without planner statistics."""
+    with statements:
+        response = client.get(url, headers={"Authorization": f"Bearer {auth_token}"})
+    assert response.status_code == 200
+    assert response.json
+
+    with client.application.app_context():
+        connection = db.session.connection()
+        searches = [statement for statement, _ in statements if "eligible_from <=" in statement]
+        assert searches
+        for statement, parameters in statements:
+            if statement in searches:
+                scans = driving_scans(connection, statement, parameters)
+                assert scans and all(index in line for line in scans), scans
+
+def test_match_donors_is_driven_by_user_indexes(client, auth_token, populated, statements):
+    """Test that the notification search starts from the blood type or geo_cell index, not from eligible donors."""
+    with client.application.app_context():
+        req = db.session.get(BloodRequest, 1)
+        req.latitude, req.longitude = 6.5, 3.4
+        db.session.commit()
+        with statements:
+            notify.match_donors({"request_id": 1})
+
+        connection = db.session.connection()
+        searches = [(statement, parameters) for statement, parameters in statements if "eligible_from <=" in statement]
+        assert len(searches) == 1
+        scans = driving_scans(connection, *searches[0])
+        assert scans and all(re.match(r"SEARCH user USING INDEX ix_user_(blood_type|geo_cell)\b", line) for line in scans), scans
@@ -0,0 +1,99 @@
+import json
+from flask_jwt_extended import create_access_token
+from main import create_app
+from database import REPLICA_BIND, db, read_replica
+from models.User.model import User
+import pytest
+
+@pytest.fixture
+def replica_app(tmp_path):
+    app = create_app(config_overrides={
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path}/primary.db",
+        "DATABASE_REPLICA_URL": f"sqlite:///{tmp_path}/replica.db",
+        "JWT_SECRET_KEY": "test-secret-key",
+        "PASSWORD_HASH_METHOD": "pbkdf2:sha256:1",
+    })
+    with app.app_context():
+        db.create_all()
+        db.metadata.create_all(db.engines[REPLICA_BIND])
+        # The same user on both, named after where it was read from
+        for bind, name in ((None, "Primary"), (REPLICA_BIND, "Replica")):
+            with db.engines[bind].begin() as connection:
+                connection.execute(User.__table__.insert(), [{"id": 1, "name": name, "email": "user@test.com",
+                                                              "blood_type": "O+", "password_hash": "x"}])
+        app.config["TEST_TOKEN"] = create_access_token(identity="1")
+    yield app
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+
+def engine_statements(app):
+    """Record which engine each statement runs on."""
+    statements = []
+    with app.app_context():
+        for bind, engine in db.engines.items():
+            db.event.listen(engine, "before_cursor_execute",
+                            lambda *args, bind=bind: statements.append((bind or "primary", args[2].split()[0])))
+    return statements
+
+def test_get_requests_read_from_replica(replica_app):
+    """Test that GET endpoints and the JWT user lookup read from the replica."""
+    statements = engine_statements(replica_app)
+    client = replica_app.test_client()
+    headers = {"Authorization": f"Bearer {replica_app.config['TEST_TOKEN']}"}
+
+    response = client.get("/users/1", headers=headers)
+    assert response.status_code == 200
+    assert json.loads(response.data)["name"] == "Replica"
+    response = client.get("/users/", headers=headers)
+    assert [user["name"] for user in json.loads(response.data)] == ["Replica"]
+    # Everything but the revoked token refresh
+    assert statements[0] == ("primary", "SELECT")
+    assert {bind for bind, _ in statements[1:]} == {REPLICA_BIND}
+
+def test_writes_go_to_primary(replica_app):
+    """Test that a POST reads its user from the replica but writes, and reads back, on the primary."""
+    statements = engine_statements(replica_app)
+    response = replica_app.test_client().post("/blood-requests/", json={
+        "blood_type": "O+", "quantity": 1, "location": "Lagos", "name": "Patient", "phone": "0800"},
+        headers={"Authorization": f"Bearer {replica_app.config['TEST_TOKEN']}"})
+    assert response.status_code == 201
+
+    # Revoked tokens from the primary, the JWT user lookup on the replica,
+    # then the insert and everything after it on the primary
+    assert statements[:3] == [("primary", "SELECT"), (REPLICA_BIND, "SELECT"), ("primary", "INSERT")]
+    assert all(bind == "primary" for bind, _ in statements[2:])
+    with replica_app.app_context():
+        assert db.session.get(User, 1).request_count == 1
+
+def test_user_lookup_falls_back_to_primary(replica_app):
+    """Test that a user not yet replicated can still authenticate."""
+    with replica_app.app_context():
+        with db.engines[None].begin() as connection:
+            connection.execute(User.__table__.insert(), [{"id": 2, "name": "New", "email": "new@test.com",
+                                                          "blood_type": "A+", "password_hash": "x"}])
+        token = create_access_token(identity="2")
+
+    response = replica_app.test_client().get("/users/1", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    assert json.loads(response.data)["name"] == "Replica"
+
+def test_read_your_writes(replica_app):
+    """Test that once a GET request has written, its later reads use the primary."""
+    with replica_app.test_request_context("/users/1", method="GET"):
+        assert db.session.get(User, 1).name == "Replica"
+        db.session.expunge_all()
+        user = User(name="Written", email="written@test.com", blood_type="B+", password_hash="x")
+        db.session.add(user)
+        db.session.flush()
+        assert User.query.filter_by(email="written@test.com").one() is user
+        assert db.session.get(User, 1).name == "Primary"
+        db.session.rollback()
+
+    with replica_app.test_request_context("/users/1", method="POST"):
+        assert db.session.get(User, 1).name == "Primary"
+        db.session.expunge_all()
+        with read_replica():
+            assert db.session.get(User, 1).name == "Replica"
+        db.session.remove()
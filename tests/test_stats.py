@@ -0,0 +1,106 @@
+import json
+from flask_jwt_extended import create_access_token
+from sqlalchemy import update
+from main import create_app
+from database import db
+from models.BloodRequest.model import BloodRequest
+from models.BloodStats.model import BloodStats
+from models.BloodStats.reconcile import computed_stats, reconcile
+from models.Job.model import Job
+from models.User.model import User
+import pytest
+
+@pytest.fixture
+def app():
+    app = create_app(config_overrides={
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+        "JWT_SECRET_KEY": "test-secret-key",
+        "JOB_WORKERS": 0,
+        "STATS_RECONCILE_SECONDS": 60,
+    })
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+def add_user(email, blood_type, location="Lagos"):
+    user = User(name=email.split("@")[0], email=email, blood_type=blood_type, location=location, password_hash="x")
+    db.session.add(user)
+    db.session.commit()
+    return user.id
+
+def auth(user_id):
+    return {"Authorization": f"Bearer {create_access_token(identity=str(user_id))}"}
+
+def stats(app, user_id, **filters):
+    response = app.test_client().get("/stats/", query_string=filters, headers=auth(user_id))
+    assert response.status_code == 200
+    return {(row["blood_type"], row["location"]): row for row in json.loads(response.data)}
+
+def test_write_paths_keep_stats_current(app):
+    """Test that requests, donors, donations and imports adjust the summary exactly as a recount would."""
+    client = app.test_client()
+    hospital = add_user("hospital@test.com", "O+", location=" LAGOS ")
+    donor = add_user("donor@test.com", "A+")
+    imported = add_user("imported@test.com", "A+", location="Abuja")
+
+    def create(blood_type, quantity, location="Lagos"):
+        body = {"blood_type": blood_type, "quantity": quantity, "location": location, "name": "Patient"}
+        return json.loads(client.post("/blood-requests/", json=body, headers=auth(hospital)).data)["id"]
+
+    fulfilled = create("A+", 2)
+    create("A+", 3, location="lagos ")
+    moved = create("B-", 1)
+    # Statuses in any case count under their stored spelling
+    client.put(f"/blood-requests/{fulfilled}", json={"status": "fulfilled"}, headers=auth(hospital))
+    client.put(f"/blood-requests/{moved}", json={"status": "CANCELLED"}, headers=auth(hospital))
+
+    donor_id = json.loads(client.post("/donors/", json={}, headers=auth(donor)).data)["id"]
+    client.post("/blood-donations/", json={"donation_date": "2026-10-01", "blood_group": "A+"}, headers=auth(donor))
+    client.put(f"/donors/{donor_id}", json={"is_available": False}, headers=auth(donor))
+    client.put(f"/donors/{donor_id}", json={"is_available": True}, headers=auth(donor))
+
+    client.post("/blood-requests/import", content_type="application/x-ndjson", headers=auth(hospital),
+                data=json.dumps({"blood_type": "A+", "quantity": 4, "location": "Abuja", "name": "Patient"}) + "\n" +
+                     json.dumps({"blood_type": "A+", "quantity": 1, "location": "Abuja", "name": "Patient", "status": "fulfilled"}))
+    client.post("/donors/import", content_type="text/csv", headers=auth(hospital),
+                data=f"user_id,is_available\n{imported},true\n{hospital},false\n")
+
+    summary = stats(app, hospital)
+    lagos = summary["A+", "lagos"]
+    assert (lagos["pending_requests"], lagos["units_requested"], lagos["total_requests"],
+            lagos["fulfilled_requests"], lagos["fulfilment_rate"]) == (1, 3, 2, 1, 0.5)
+    assert (lagos["available_donors"], lagos["donations"]) == (1, 1)
+    assert summary["B-", "lagos"]["pending_requests"] == 0
+    assert summary["A+", "abuja"]["available_donors"] == 1
+    assert summary["A+", "abuja"]["units_requested"] == 4
+    assert summary["A+", "abuja"]["fulfilment_rate"] == 0.5
+
+    assert list(stats(app, hospital, blood_type="A+", location="ABUJA")) == [("A+", "abuja")]
+    # Nothing for reconciliation to fix
+    assert reconcile() == 0
+    assert len(computed_stats()) == len(summary)
+
+def test_reconciliation_fixes_drift(app):
+    """Test that the reconcile_stats job rewrites drifted rows, changes the ETag and keeps itself scheduled."""
+    hospital = add_user("hospital@test.com", "O+")
+    db.session.add(BloodRequest(hospital, "O+", 2, "Lagos", "Patient", None))
+    db.session.commit()
+    etag = app.test_client().get("/stats/", headers=auth(hospital)).headers["ETag"]
+
+    db.session.execute(update(BloodStats).values(pending_requests=40))
+    db.session.commit()
+    runner = app.extensions["job_runner"]
+    runner.schedule_periodic()
+    runner.schedule_periodic()
+    assert [job.kind for job in Job.query.all()] == ["reconcile_stats"]
+
+    assert runner.run_pending() == 1
+    assert stats(app, hospital)["O+", "lagos"]["pending_requests"] == 1
+    assert app.test_client().get("/stats/", headers=auth(hospital)).headers["ETag"] != etag
+    # The next run is queued, once, for STATS_RECONCILE_SECONDS from now
+    job = Job.query.one()
+    assert (job.kind, job.status) == ("reconcile_stats", "pending")
+    assert (job.run_at - job.created_at).total_seconds() >= 59
@@ -64,3 +64,40 @@ def test_get_nonexistent_user(client, auth_token):
     """Test retrieving a nonexistent user returns 404."""
     response = client.get("/users/9999", headers={"Authorization": f"Bearer {auth_token}"})
     assert response.status_code == 404
+
+def test_get_users_limit_is_capped(client, auth_token):
+    """Test that the page size never exceeds PAGINATION_MAX_LIMIT."""
+    client.application.config["PAGINATION_MAX_LIMIT"] = 1
+    client.post("/users/", json={"name": "second", "email": "second@example.com", "password": "pw", "blood_type": "A+"})
+
+    response = client.get("/users/?limit=100", headers={"Authorization": f"Bearer {auth_token}"})
+    assert response.status_code == 200
+    assert len(json.loads(response.data)) == 1
+    assert "X-Next-Cursor" in response.headers
+
+def test_get_users_constant_query_count(client, auth_token, statements):
+    """Test that listing users does not issue per-user COUNT queries."""
+    for i in range(20):
+        client.post("/users/", json={"name": f"user{i}", "email": f"user{i}@example.com", "password": "pw", "blood_type": "B+"})
+
+    # Let the token blocklist do its periodic refresh outside the measured request
+    client.get("/users/?limit=1", headers={"Authorization": f"Bearer {auth_token}"})
+
+    with statements:
+        response = client.get("/users/?limit=100", headers={"Authorization": f"Bearer {auth_token}"})
+
+    assert response.status_code == 200
+    assert len(json.loads(response.data)) == 21
+    # The ETag version lookup and the page query; the JWT user lookup is served from the cache
+    assert len(statements) == 2
+
+def test_user_request_counter(client, auth_token):
+    """Test that creating a blood request bumps the requester's counter."""
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    client.post("/blood-requests/", headers=headers, json={"name": "Patient", "blood_type": "O+", "quantity": 1, "location": "Test City"})
+
+    with client.application.app_context():
+        user_id = User.query.filter_by(email="test@example.com").first().id
+    data = json.loads(client.get(f"/users/{user_id}", headers=headers).data)
+    assert data["requests"] == 1
+    assert data["donations"] == 0